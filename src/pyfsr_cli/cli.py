@@ -3,9 +3,11 @@ from typing import Optional
 
 import click
 
-from .commands import alerts, api, files, config as config_cmd
+from .commands import alerts, api, export, files, ingest, mirror, records, schema, config as config_cmd
 from .config import CLIState
-from .utils.output import error
+from .utils.compression import COMPRESSIONS
+from .utils.output import OUTPUT_FORMATS, error
+from .utils.schema import DEFAULT_SCHEMA_TTL
 
 
 @click.group()
@@ -14,17 +16,36 @@ from .utils.output import error
 @click.option('--username', envvar='PYFSR_USERNAME', help='Username for authentication')
 @click.option('--password', envvar='PYFSR_PASSWORD', help='Password for authentication')
 @click.option('--verify-ssl/--no-verify-ssl', help='Verify SSL certificates')
-@click.option('--output', type=click.Choice(['json', 'table', 'yaml']), default='json',
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='json',
               help='Output format')
 @click.option('--save-password/--no-save-password', default=False,
               help='Save password in config file (not recommended)')
+@click.option('--servers', help='Comma-separated config profiles to run the command against in parallel')
+@click.option('--all-profiles', is_flag=True, help='Run the command against every config profile')
+@click.option('--progress/--no-progress', default=True,
+              help='Report progress of bulk operations on stderr')
+@click.option('--compress-requests', type=click.Choice(COMPRESSIONS), envvar='PYFSR_COMPRESS_REQUESTS',
+              help='Compress large request bodies (the server must accept Content-Encoding)')
+@click.option('--transform-workers', default=0, envvar='PYFSR_TRANSFORM_WORKERS',
+              help='Processes that flatten and project listed records (0: none, transform while writing)')
+@click.option('--validate/--no-validate', default=True,
+              help='Check fields, picklist values and columns against the module schema before sending requests')
+@click.option('--schema-ttl', type=float, default=DEFAULT_SCHEMA_TTL, envvar='PYFSR_SCHEMA_TTL',
+              help='Seconds a cached module schema is used before it is fetched again')
 @click.version_option()
 @click.pass_context
 def cli(ctx: click.Context, server: Optional[str], token: Optional[str],
         username: Optional[str], password: Optional[str],
-        verify_ssl: bool, output: str, save_password: bool):
+        verify_ssl: bool, output: str, save_password: bool,
+        servers: Optional[str], all_profiles: bool, progress: bool, compress_requests: Optional[str],
+        transform_workers: int, validate: bool, schema_ttl: float):
     """PyFSR CLI - Command line interface for FortiSOAR API."""
     ctx.obj = CLIState()
+    ctx.obj.show_progress = progress
+    ctx.obj.compress_requests = compress_requests
+    ctx.obj.transform_workers = transform_workers
+    ctx.obj.validate = validate
+    ctx.obj.schema_ttl = schema_ttl
 
     try:
         ctx.obj.load_config({
@@ -36,6 +57,7 @@ def cli(ctx: click.Context, server: Optional[str], token: Optional[str],
             'output_format': output,
             'save_password': save_password
         })
+        ctx.obj.select_profiles(servers.split(',') if servers else None, all_profiles)
 
     except click.UsageError as e:
         error(str(e))
@@ -50,6 +72,11 @@ cli.add_command(alerts.alerts_group)
 cli.add_command(files.files_group)
 cli.add_command(config_cmd.config_group)
 cli.add_command(api.api_group)
+cli.add_command(mirror.mirror_group)
+cli.add_command(export.export_command)
+cli.add_command(schema.schema_group)
+cli.add_command(records.records_group)
+cli.add_command(ingest.ingest_group)
 
 # if __name__ == '__main__':
 #     cli()
@@ -1,9 +1,20 @@
 import json
+import os
+import sys
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
 
 import click
 
-from ..utils.custom_decorators import requires_client
-from ..utils.output import error
+from ..utils.concurrency import DEFAULT_CONCURRENCY, configure_pool, run_concurrently
+from ..utils.custom_decorators import requires_client, stdin_options
+from ..utils.jobs import Job
+from ..utils.jsonstream import stream_collection
+from ..utils.output import emit_ndjson, error
+from ..utils.progress import ProgressReporter, progress_for
+from ..utils.stdin import process_stdin, record_fields
+
+# Bytes read from the socket per write when streaming a response body
+CHUNK_SIZE = 64 * 1024
 
 
 @click.group(name='http')
@@ -12,16 +23,22 @@ def api_group():
 
     Common HTTP methods: GET, POST, PUT, DELETE.
 
+    Response bodies are streamed to stdout (or --output-file) as they
+    arrive, so large or binary responses are never held in memory.
+
     \b
     Examples:
     Get alerts:
         pyfsr http get /api/3/alerts
 
+    Get every alert, following hydra:next links:
+        pyfsr http get /api/3/alerts --paginate
+
     Create alert:
         pyfsr http post /api/3/alerts --data '{"name": "Test Alert"}'
 
-    Update alert:
-        pyfsr http put /api/3/alerts/123 --data '{"status": "Closed"}'
+    Update alert from stdin:
+        echo '{"status": "Closed"}' | pyfsr http put /api/3/alerts/123 --data -
 
     Delete alert:
         pyfsr http delete /api/3/alerts/123
@@ -29,84 +46,318 @@ def api_group():
     pass
 
 
+def parse_params(params: Tuple[str, ...]) -> Dict[str, Any]:
+    """Parse key=value query parameters.
+
+    Only the first '=' separates key and value, so values may contain '='.
+    A repeated key becomes a list, which requests encodes as repeated parameters.
+    """
+    query: Dict[str, Any] = {}
+    for param in params:
+        key, sep, value = param.partition('=')
+        if not sep or not key:
+            raise click.BadParameter(f"Expected key=value, got '{param}'", param_hint="'--params'")
+        if key not in query:
+            query[key] = value
+        elif isinstance(query[key], list):
+            query[key].append(value)
+        else:
+            query[key] = [query[key], value]
+    return query
+
+
+def read_body(data: Optional[str]) -> Optional[Any]:
+    """Load a JSON request body given inline, as a file path, or as '-' for stdin."""
+    if data is None:
+        return None
+    if data.lstrip()[:1] in ('{', '[') and not os.path.isfile(data):
+        text = data
+    else:
+        try:
+            with click.open_file(data, 'r') as f:
+                text = f.read()
+        except OSError as e:
+            raise click.BadParameter(f"Cannot read {data}: {e.strerror or e}", param_hint="'--data'")
+    if not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise click.BadParameter(f"Request body is not valid JSON: {e}", param_hint="'--data'")
+
+
+def read_endpoints(endpoints: Tuple[str, ...]) -> List[str]:
+    """Expand an endpoint argument of '-' into the endpoints listed on stdin, one per line."""
+    expanded: List[str] = []
+    for endpoint in endpoints:
+        if endpoint == '-':
+            expanded.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            expanded.append(endpoint)
+    return expanded
+
+
+def stream_response(response, sink: IO[bytes]) -> bytes:
+    """Copy a response body to a binary sink chunk by chunk without decoding it.
+
+    Returns:
+        The last chunk written, so callers can tell whether output ended with a newline
+    """
+    last = b''
+    for chunk in response.iter_content(CHUNK_SIZE):
+        if chunk:
+            sink.write(chunk)
+            last = chunk
+    return last
+
+
+def next_link(fields: Dict[str, Any]) -> Optional[str]:
+    """Get a collection's hydra:next link, at the top level or in its hydra:view."""
+    view = fields.get('hydra:view')
+    return fields.get('hydra:next') or (view.get('hydra:next') if isinstance(view, dict) else None)
+
+
+def iter_members(client, endpoint: str, params: Optional[Dict[str, Any]] = None,
+                 progress: Optional[ProgressReporter] = None) -> Iterator[Any]:
+    """Yield the members of every page of a collection, following its hydra:next links.
+
+    Members are parsed from the response stream one at a time. The next link
+    already carries the query string, so params only apply to the first page.
+    A response that is not a collection is yielded as a single value.
+    """
+    seen = set()
+    while endpoint and endpoint not in seen:
+        seen.add(endpoint)
+        page = stream_collection(client, endpoint, params)
+        yield from page
+        if not page.is_collection:
+            yield page.fields
+            return
+        if progress and len(seen) == 1 and page.get('hydra:totalItems') is not None:
+            progress.add_total(page.get('hydra:totalItems'))
+        endpoint = next_link(page.fields)
+        params = None
+
+
+def write_json_line(sink: IO[bytes], value: Any) -> None:
+    """Write one value as a line of newline-delimited JSON."""
+    sink.write(json.dumps(value, default=str).encode() + b'\n')
+
+
+def decode_response(response) -> Any:
+    """Decode a JSON response body, standing in its status code for an empty or non-JSON body (e.g. 204)."""
+    if not response.content:
+        return {'status': response.status_code}
+    try:
+        return response.json()
+    except ValueError:
+        return {'status': response.status_code}
+
+
+def send_requests(ctx: click.Context, method: str, endpoints: List[str], params: Tuple[str, ...] = (),
+                  body: Optional[Any] = None, paginate: bool = False, output_file: Optional[str] = None,
+                  parallel: int = 1) -> None:
+    """Send a request to each endpoint and write the responses.
+
+    A single endpoint has its body streamed through unchanged. With --paginate,
+    collection members from every page are written as NDJSON. With several
+    endpoints, up to ``parallel`` requests run at once and each decoded
+    response (or its members, when paginating) is written as NDJSON in
+    endpoint order; a response without a JSON body is written as its status
+    code. Endpoints whose request raised an HTTP or connection error are
+    reported and make the command exit 1.
+
+    Args:
+        ctx: Click context holding the client
+        method: HTTP method
+        endpoints: API endpoints to call
+        params: Query parameters in key=value format
+        body: Decoded JSON request body
+        paginate: Follow hydra:next links and write collection members
+        output_file: Path to write to instead of stdout
+        parallel: Maximum number of requests in flight
+    """
+    client = ctx.obj.client
+    query = parse_params(params) or None
+    to_stdout = output_file in (None, '-')
+
+    with click.open_file(output_file or '-', 'wb') as sink:
+        if len(endpoints) == 1 and not paginate:
+            try:
+                response = client.request(method, endpoints[0], params=query, data=body, stream=True)
+                last = stream_response(response, sink)
+            except Exception as e:
+                error(f"{method} {endpoints[0]} failed: {str(e)}")
+                ctx.exit(1)
+            if to_stdout and last and not last.endswith(b'\n'):
+                sink.write(b'\n')
+            return
+
+        if len(endpoints) == 1:
+            try:
+                with progress_for(ctx, 'Fetching pages') as progress:
+                    for member in progress.track(iter_members(client, endpoints[0], query, progress)):
+                        write_json_line(sink, member)
+            except Exception as e:
+                error(f"{method} {endpoints[0]} failed: {str(e)}")
+                ctx.exit(1)
+            return
+
+        def fetch(endpoint: str) -> List[Any]:
+            if paginate:
+                return list(iter_members(client, endpoint, query))
+            return [decode_response(client.request(method, endpoint, params=query, data=body))]
+
+        configure_pool(client, parallel)
+        failed = 0
+        with progress_for(ctx, f'{method} requests', len(endpoints), unit='requests') as progress:
+            results = run_concurrently(progress.wrap(fetch), endpoints, parallel, return_exceptions=True)
+        for endpoint, result in zip(endpoints, results):
+            if isinstance(result, Exception):
+                failed += 1
+                error(f"{method} {endpoint} failed: {str(result)}")
+                continue
+            for value in result:
+                write_json_line(sink, value)
+    if failed:
+        ctx.exit(1)
+
+
+def request_options(f):
+    """Add the options shared by every http command"""
+    f = click.option('--output-file', '-o', type=click.Path(dir_okay=False, allow_dash=True),
+                     help='Write the response body to this file instead of stdout')(f)
+    f = click.option('--params', '-p', multiple=True, help="Query parameters in key=value format")(f)
+    return f
+
+
+def multi_endpoint_options(f):
+    """Add the options for commands that accept a list of endpoints"""
+    f = click.option('--parallel', default=DEFAULT_CONCURRENCY,
+                     help='Number of requests in flight when several endpoints are given')(f)
+    f = click.argument('endpoints', nargs=-1, required=True)(f)
+    return f
+
+
 @api_group.command(name='get')
-@click.argument('endpoint')
-@click.option('--params', '-p', multiple=True, help="Query parameters in key=value format")
+@multi_endpoint_options
+@request_options
+@click.option('--paginate', is_flag=True, help='Follow hydra:next links and output every member as NDJSON')
 @click.pass_context
 @requires_client
-def http_get(ctx: click.Context, endpoint: str, params: list):
+def http_get(ctx: click.Context, endpoints: Tuple[str, ...], parallel: int, params: Tuple[str, ...],
+             output_file: Optional[str], paginate: bool):
     """Send GET request to FortiSOAR API.
 
+    Several endpoints may be given, or '-' to read them from stdin; their
+    responses are written as NDJSON, one line per endpoint.
+
     \b
     Examples:
       pyfsr http get /api/3/alerts
       pyfsr http get /api/3/alerts --params status=Open --params severity=High
+      pyfsr http get /api/3/alerts --paginate -p '$limit=500' > alerts.ndjson
+      pyfsr http get /api/3/files/123/download -o report.pdf
+      cat endpoints.txt | pyfsr http get - --parallel 16
+    """
+    send_requests(ctx, 'GET', read_endpoints(endpoints), params, paginate=paginate,
+                  output_file=output_file, parallel=parallel)
+
+
+def _send_stdin_records(ctx: click.Context, method: str, endpoint: str, batch_size: int,
+                        concurrency: int, resume: Optional[str]) -> None:
+    """Send one request per NDJSON record read from stdin and emit the responses as NDJSON.
+
+    The endpoint may reference record fields, e.g. /api/3/alerts/{uuid}.
     """
     client = ctx.obj.client
-    try:
-        query_params = {p.split('=')[0]: p.split('=')[1] for p in params} if params else {}
-        response = client.get(endpoint, params=query_params)
-        click.echo(response)
-    except Exception as e:
-        error(f"GET request failed: {str(e)}")
+
+    def send_one(record):
+        url = endpoint.format_map(record)
+        if method == 'post':
+            return client.post(url, data=record)
+        return client.put(url, data=record_fields(record))
+
+    configure_pool(client, concurrency)
+    with Job.start(ctx.obj, f'http {method}', {'endpoint': endpoint}, resume) as job, \
+            progress_for(ctx, f'{method.upper()} records') as progress:
+        if job.args['endpoint'] != endpoint:
+            raise click.UsageError(f"Job {job.id} sent records to {job.args['endpoint']}, not {endpoint}")
+        _, failed = process_stdin(send_one, f"{method.upper()} record", sys.stdin, batch_size, concurrency,
+                                  on_result=lambda record, response: emit_ndjson(response), job=job,
+                                  progress=progress)
+        if failed:
+            ctx.exit(1)
 
 
 @api_group.command(name='post')
 @click.argument('endpoint')
-@click.option('--data', '-d', type=click.File('r'), help="Path to JSON file with data")
+@click.option('--data', '-d', help="JSON body: inline, a file path, or '-' to read it from stdin")
+@request_options
+@stdin_options
 @click.pass_context
 @requires_client
-def http_post(ctx: click.Context, endpoint: str, data):
+def http_post(ctx: click.Context, endpoint: str, data: Optional[str], params: Tuple[str, ...],
+              output_file: Optional[str], from_stdin: bool, batch_size: int, concurrency: int,
+              resume: Optional[str]):
     """Send POST request to FortiSOAR API.
 
+    With --stdin, one request is sent per NDJSON record read from stdin.
+
     \b
     Examples:
       pyfsr http post /api/3/alerts -d alert_data.json
+      generate_alert | pyfsr http post /api/3/alerts -d -
+      cat alerts.ndjson | pyfsr http post /api/3/alerts --stdin
     """
-    client = ctx.obj.client
-    try:
-        payload = json.loads(data.read()) if data else {}
-        response = client.post(endpoint, data=payload)
-        click.echo(response)
-    except Exception as e:
-        error(f"POST request failed: {str(e)}")
+    if from_stdin:
+        _send_stdin_records(ctx, 'post', endpoint, batch_size, concurrency, resume)
+        return
+
+    send_requests(ctx, 'POST', [endpoint], params, read_body(data), output_file=output_file)
 
 
 @api_group.command(name='put')
 @click.argument('endpoint')
-@click.option('--data', '-d', type=click.File('r'), help="Path to JSON file with data")
+@click.option('--data', '-d', help="JSON body: inline, a file path, or '-' to read it from stdin")
+@request_options
+@stdin_options
 @click.pass_context
 @requires_client
-def http_put(ctx: click.Context, endpoint: str, data):
+def http_put(ctx: click.Context, endpoint: str, data: Optional[str], params: Tuple[str, ...],
+             output_file: Optional[str], from_stdin: bool, batch_size: int, concurrency: int,
+             resume: Optional[str]):
     """Send PUT request to FortiSOAR API.
 
+    With --stdin, one request is sent per NDJSON record read from stdin; the
+    endpoint may reference record fields such as {uuid}.
+
     \b
     Examples:
       pyfsr http put /api/3/alerts/123 -d alert_data.json
+      pyfsr http put /api/3/alerts/123 -d '{"status": "Closed"}'
+      cat changes.ndjson | pyfsr http put '/api/3/alerts/{uuid}' --stdin
     """
-    client = ctx.obj.client
-    try:
-        payload = json.loads(data.read()) if data else {}
-        response = client.put(endpoint, data=payload)
-        click.echo(response)
-    except Exception as e:
-        error(f"PUT request failed: {str(e)}")
+    if from_stdin:
+        _send_stdin_records(ctx, 'put', endpoint, batch_size, concurrency, resume)
+        return
+
+    send_requests(ctx, 'PUT', [endpoint], params, read_body(data), output_file=output_file)
 
 
 @api_group.command(name='delete')
-@click.argument('endpoint')
+@multi_endpoint_options
+@request_options
 @click.pass_context
 @requires_client
-def http_delete(ctx: click.Context, endpoint: str):
+def http_delete(ctx: click.Context, endpoints: Tuple[str, ...], parallel: int, params: Tuple[str, ...],
+                output_file: Optional[str]):
     """Send DELETE request to FortiSOAR API.
 
     \b
     Examples:
       pyfsr http delete /api/3/alerts/123
+      cat endpoints.txt | pyfsr http delete - --parallel 16
     """
-    client = ctx.obj.client
-    try:
-        response = client.delete(endpoint)
-        click.echo(response)
-    except Exception as e:
-        error(f"DELETE request failed: {str(e)}")
+    send_requests(ctx, 'DELETE', read_endpoints(endpoints), params, output_file=output_file,
+                  parallel=parallel)
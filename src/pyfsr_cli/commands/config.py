@@ -3,7 +3,7 @@ from typing import Optional
 
 import click
 
-from ..utils.output import error, success, warning
+from ..utils.output import OUTPUT_FORMATS, error, success, warning
 
 
 @click.group(name='config')
@@ -20,7 +20,7 @@ def config_group():
 @click.option('--verify-ssl/--no-verify-ssl', help='Verify SSL certificates')
 @click.option('--save-password/--no-save-password', default=True,
               help='Save password in config file (not recommended)')
-@click.option('--output', type=click.Choice(['json', 'table', 'yaml']), default='json',
+@click.option('--output', type=click.Choice(OUTPUT_FORMATS), default='json',
               help='Output format')
 @click.pass_context
 def init_config(ctx, server: str, token: Optional[str],
@@ -128,6 +128,11 @@ def show_config(ctx):
         for key, value in config_data.items():
             click.echo(f"{key}: {value}" if value is not None else f"{key}: Not Set")
 
+        if ctx.obj.profiles:
+            click.echo("\nProfiles:")
+            for name, profile in ctx.obj.profiles.items():
+                click.echo(f"{name}: {profile.server}")
+
     except click.UsageError as usage_error:
         error(f"Error: {str(usage_error)}")
         ctx.exit(1)
@@ -0,0 +1,179 @@
+"""Bulk export command for PyFSR CLI."""
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+
+from ..utils.concurrency import DEFAULT_CONCURRENCY, configure_pool
+from ..utils.custom_decorators import requires_client
+from ..utils.export import (DEFAULT_WINDOW_SIZE, EXPORT_FORMATS, Window, count_records, earliest_create_date,
+                            export_window, export_window_in_worker, merge_shards, parse_time, plan_windows,
+                            window_dict)
+from ..utils.jobs import Job
+from ..utils.output import error, success
+from ..utils.progress import ProgressReporter, progress_for
+
+DEFAULT_EXPORT_PAGE_SIZE = 500
+
+
+@click.command(name='export')
+@click.argument('module', default='alerts')
+@click.option('--out-dir', type=click.Path(file_okay=False), default='.', help='Directory the shards are written to')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='ndjson', help='Shard file format')
+@click.option('--since', help='Export records created at or after this ISO date or epoch time (default: oldest record)')
+@click.option('--until', help='Export records created before this ISO date or epoch time (default: now)')
+@click.option('--window-size', default=DEFAULT_WINDOW_SIZE,
+              help='Target number of records per time window, i.e. per shard')
+@click.option('--workers', default=4, help='Number of worker processes exporting windows in parallel')
+@click.option('--page-size', default=DEFAULT_EXPORT_PAGE_SIZE, help='Number of records fetched per request')
+@click.option('--columns', help='Comma-separated list of columns to export (dotted paths allowed)')
+@click.option('--view', default='full', type=click.Choice(['simple', 'full']),
+              help='Export view (simple: flattened, full: complete records)')
+@click.option('--merge', is_flag=True, help='Concatenate the shards into one file (ndjson, csv and tsv)')
+@click.option('--resume', metavar='JOB', help='Export the windows an interrupted export did not finish')
+@click.pass_context
+@requires_client
+def export_command(ctx, module: str, out_dir: str, fmt: str, since: Optional[str], until: Optional[str],
+                   window_size: int, workers: int, page_size: int, columns: Optional[str], view: str,
+                   merge: bool, resume: Optional[str]):
+    """Export a module's records in parallel, one shard per createDate window.
+
+    The time range is split into windows of about --window-size records,
+    using record counts from the server, and the windows are exported by a
+    pool of worker processes, each with its own connection. Shards are
+    named <module>-<n>.<format> and listed, with their time ranges and
+    record counts, in manifest.json.
+
+    \b
+    Examples:
+    Export every alert to NDJSON shards:
+        pyfsr export alerts --out-dir ./alerts
+
+    \b
+    Export a year as one CSV file:
+        pyfsr export alerts --since 2024-01-01 --until 2025-01-01 \\
+            --format csv --columns name,severity.itemValue,createDate --merge
+
+    \b
+    Finish an export that was interrupted:
+        pyfsr export alerts --resume <job>
+    """
+    try:
+        if resume:
+            job = Job.start(ctx.obj, 'export', {}, resume)
+        else:
+            if merge and fmt not in ('ndjson', 'csv', 'tsv'):
+                raise click.UsageError(f"--merge is not supported for {fmt}; shards are written side by side")
+            windows = _plan(ctx, module, since, until, window_size)
+            job = Job.start(ctx.obj, 'export', {
+                'module': module, 'out_dir': str(Path(out_dir).resolve()), 'format': fmt,
+                'page_size': page_size, 'view': view, 'merge': merge,
+                'columns': [c.strip() for c in columns.split(',')] if columns else None,
+                'windows': [window_dict(window) for window in windows],
+            })
+
+        with job:
+            args = job.args
+            windows = [Window(**window) for window in args['windows']]
+            out = Path(args['out_dir'])
+            out.mkdir(parents=True, exist_ok=True)
+            shards = [out / f"{args['module']}-{i:05d}.{args['format']}" for i in range(len(windows))]
+            pending = [i for i in range(len(windows)) if job.get(str(i)) is None]
+
+            with progress_for(ctx, f"Exporting {args['module']}", sum(windows[i].count for i in pending)) as progress:
+                failed = _export_windows(ctx, args, windows, shards, pending, workers, job, progress)
+            if failed:
+                error(f"{failed} of {len(windows)} windows failed to export")
+                ctx.exit(1)
+
+            records = [job.get(str(i)) for i in range(len(windows))]
+            if args['merge'] and shards:
+                target = out / f"{args['module']}.{args['format']}"
+                merge_shards(shards, target, args['format'])
+                files = [target.name]
+            else:
+                files = [shard.name for shard in shards]
+            _write_manifest(out, args, windows, records, files)
+            success(f"Exported {sum(records)} {args['module']} records in {len(windows)} windows to {out}")
+
+    except (click.exceptions.Exit, click.UsageError):
+        raise
+    except Exception as e:
+        error(f"Export failed: {str(e)}")
+        ctx.exit(1)
+
+
+def _plan(ctx: click.Context, module: str, since: Optional[str], until: Optional[str],
+          window_size: int) -> List[Window]:
+    """Split the requested time range into windows of about window_size records."""
+    client = ctx.obj.client
+    start = parse_time(since) if since else earliest_create_date(client, module)
+    end = parse_time(until) if until else time.time()
+    if start is None or start >= end:
+        return []
+
+    configure_pool(client, DEFAULT_CONCURRENCY)
+    return plan_windows(lambda window: count_records(client, module, window.filters()),
+                        start, end, window_size, DEFAULT_CONCURRENCY)
+
+
+def _export_windows(ctx: click.Context, args: Dict[str, Any], windows: List[Window], shards: List[Path],
+                    pending: List[int], workers: int, job: Job, progress: ProgressReporter) -> int:
+    """Export the pending windows, inline or across a process pool. Returns the number that failed."""
+    failed = 0
+
+    def finished(i: int, written: int) -> None:
+        job.set(str(i), written)
+        progress.advance(written)
+
+    if workers <= 1 or len(pending) <= 1:
+        for i in pending:
+            try:
+                finished(i, export_window(ctx.obj.client, args['module'], windows[i], shards[i], args['format'],
+                                          args['page_size'], args['columns'], args['view']))
+            except Exception as e:
+                error(f"Window {i} failed: {str(e)}")
+                failed += 1
+        return failed
+
+    # Spawned workers start clean instead of inheriting the parent's threads and open connections
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        futures = {
+            pool.submit(export_window_in_worker, ctx.obj.config, ctx.obj.compress_requests, args['module'],
+                        window_dict(windows[i]), str(shards[i]), args['format'], args['page_size'],
+                        args['columns'], args['view']): i
+            for i in pending
+        }
+        progress.in_flight = min(workers, len(futures))
+        for done, future in enumerate(as_completed(futures), 1):
+            progress.in_flight = min(workers, len(futures) - done)
+            i = futures[future]
+            try:
+                finished(i, future.result())
+            except Exception as e:
+                error(f"Window {i} failed: {str(e)}")
+                failed += 1
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return failed
+
+
+def _write_manifest(out: Path, args: Dict[str, Any], windows: List[Window], records: List[int],
+                    files: List[str]) -> None:
+    """Describe the export's windows and files in manifest.json."""
+    manifest = {
+        'module': args['module'],
+        'format': args['format'],
+        'files': files,
+        'windows': [{**window_dict(window), 'records': n} for window, n in zip(windows, records)],
+    }
+    if not args['merge']:
+        for entry, name in zip(manifest['windows'], files):
+            entry['file'] = name
+    with open(out / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
@@ -1,11 +1,28 @@
 """File and attachment management commands for PyFSR CLI."""
+import os
+import sys
+import tempfile
 from pathlib import Path
 from typing import Optional, List
 
 import click
 
-from ..utils.custom_decorators import requires_client
+from ..utils.batch import DEFAULT_CHUNK_SIZE, collect_ids, fetch_by_ids
+from ..utils.compression import COMPRESSIONS, compress_file
+from ..utils.concurrency import DEFAULT_CONCURRENCY, configure_pool, run_concurrently
+from ..utils.custom_decorators import requires_client, stdin_options, supports_fan_out
+from ..utils.fanout import iter_fan_out
+from ..utils.jobs import Job
+from ..utils.jsonstream import stream_collection
 from ..utils.output import format_output, error, success
+from ..utils.progress import ProgressReporter, progress_for
+from ..utils.stdin import process_stdin, record_id
+
+# Bytes read per write when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Record a partial download's offset every this many bytes
+CHECKPOINT_BYTES = 8 * 1024 * 1024
 
 
 @click.group(name='files')
@@ -18,35 +35,80 @@ def files_group():
 @click.argument('files', nargs=-1, type=click.Path(exists=True))
 @click.option('--description', help='Description for the attachment')
 @click.option('--tags', help='Comma-separated list of tags')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, help='Number of files uploaded in parallel')
+@click.option('--resume', metavar='JOB', help='Continue an interrupted upload, skipping files already uploaded')
+@click.option('--compress', type=click.Choice(COMPRESSIONS),
+              help='Compress each file before uploading it; the attachment gets a .gz or .zst suffix')
 @click.pass_context
 @requires_client
-def upload_files(ctx, files: List[str], description: Optional[str], tags: Optional[str]):
+def upload_files(ctx, files: List[str], description: Optional[str], tags: Optional[str],
+                 concurrency: int, resume: Optional[str], compress: Optional[str]):
     """Upload files to FortiSOAR.
 
-    Example:
+    Each uploaded file is checkpointed; if the run is interrupted, rerun it
+    with --resume and no files to upload only the ones that are left.
+
+    \b
+    Examples:
         pyfsr files upload report.pdf evidence.jpg --description "Investigation evidence"
+        pyfsr files upload capture.pcap --compress zstd
     """
     try:
-        tag_list = tags.split(',') if tags else []
-
-        for file_path in files:
-            path = Path(file_path)
-
-            # Upload file
-            file_record = ctx.obj.client.files.upload(str(path))
-
-            # Create attachment
-            attachment_data = {
-                'name': path.name,
-                'description': description,
-                'file': file_record['@id'],
-                'tags': tag_list
-            }
-
-            attachment = ctx.obj.client.post('/api/3/attachments', data=attachment_data)
-            success(f"Uploaded {path.name} - Attachment ID: {attachment.get('@id')}")
-            format_output(attachment, ctx.obj.config.output_format)
-
+        if not files and not resume:
+            raise click.UsageError("Provide at least one file to upload")
+
+        job_args = {
+            'files': [str(Path(file_path).resolve()) for file_path in files],
+            'description': description,
+            'tags': tags,
+            'compress': compress
+        }
+        with Job.start(ctx.obj, 'files upload', job_args, resume) as job:
+            tag_list = job.args['tags'].split(',') if job.args['tags'] else []
+            pending = [file_path for file_path in job.args['files'] if not job.is_done(file_path)]
+
+            def upload_one(file_path: str) -> dict:
+                path = Path(file_path)
+
+                # Upload file, compressing it into a scratch directory first if asked to
+                with tempfile.TemporaryDirectory() as scratch:
+                    if job.args['compress']:
+                        path = compress_file(path, Path(scratch), job.args['compress'])
+                    file_record = ctx.obj.client.files.upload(str(path))
+
+                # Create attachment
+                attachment_data = {
+                    'name': path.name,
+                    'description': job.args['description'],
+                    'file': file_record['@id'],
+                    'tags': tag_list
+                }
+
+                attachment = ctx.obj.client.post('/api/3/attachments', data=attachment_data)
+                job.done(file_path)
+                return attachment
+
+            configure_pool(ctx.obj.client, concurrency)
+            sizes = {file_path: os.path.getsize(file_path) for file_path in pending}
+            with progress_for(ctx, 'Uploading', sum(sizes.values()), unit='bytes') as progress:
+                results = run_concurrently(progress.wrap(upload_one, size=sizes.get), pending, concurrency,
+                                           return_exceptions=True)
+
+            failed = False
+            for file_path, attachment in zip(pending, results):
+                name = Path(file_path).name
+                if isinstance(attachment, Exception):
+                    error(f"Failed to upload {name}: {str(attachment)}")
+                    failed = True
+                    continue
+                success(f"Uploaded {name} - Attachment ID: {attachment.get('@id')}")
+                format_output(attachment, ctx.obj.config.output_format)
+
+            if failed:
+                ctx.exit(1)
+
+    except click.exceptions.Exit:
+        raise
     except Exception as e:
         error(f"Failed to upload files: {str(e)}")
         ctx.exit(1)
@@ -55,9 +117,10 @@ def upload_files(ctx, files: List[str], description: Optional[str], tags: Option
 @files_group.command('list')
 @click.option('--limit', default=30, help='Number of attachments to retrieve')
 @click.option('--tag', help='Filter by tag')
-@click.option('--columns', help='Comma-separated list of columns to display (table format only)')
+@click.option('--columns', help='Comma-separated list of columns to display (dotted paths allowed for csv/tsv)')
 @click.pass_context
 @requires_client
+@supports_fan_out
 def list_attachments(ctx, limit: int, tag: Optional[str], columns: Optional[str]):
     """List attachments.
 
@@ -69,14 +132,15 @@ def list_attachments(ctx, limit: int, tag: Optional[str], columns: Optional[str]
         if tag:
             params['tags'] = tag
 
-        attachments = ctx.obj.client.get('/api/3/attachments', params=params)
+        attachments = iter_fan_out(ctx.obj, lambda client: stream_collection(client, '/api/3/attachments', params))
 
         # Parse columns for table format
         table_columns = columns.split(',') if columns else None
 
-        format_output(attachments.get('hydra:member', []),
+        format_output(attachments,
                       ctx.obj.config.output_format,
-                      table_columns)
+                      table_columns,
+                      workers=ctx.obj.transform_workers)
 
     except Exception as e:
         error(f"Failed to list attachments: {str(e)}")
@@ -84,77 +148,203 @@ def list_attachments(ctx, limit: int, tag: Optional[str], columns: Optional[str]
 
 
 @files_group.command('get')
-@click.argument('attachment_id')
+@click.argument('attachment_ids', nargs=-1)
+@click.option('--ids-file', type=click.File('r'), help="File with one attachment ID per line ('-' for stdin)")
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, help='Number of IDs fetched per query')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, help='Number of requests in flight')
 @click.pass_context
 @requires_client
-def get_attachment(ctx, attachment_id: str):
-    """Get details of a specific attachment.
+@supports_fan_out
+def get_attachment(ctx, attachment_ids: List[str], ids_file, chunk_size: int, concurrency: int):
+    """Get details of one or more attachments.
 
     Example:
         pyfsr files get 12345678-90ab-cdef-1234-567890abcdef
     """
     try:
-        attachment = ctx.obj.client.get(f'/api/3/attachments/{attachment_id}')
-        format_output(attachment, ctx.obj.config.output_format)
+        ids = collect_ids(attachment_ids, ids_file, sys.stdin)
+        if not ids:
+            raise click.UsageError("Provide at least one attachment ID")
+
+        if len(ids) == 1 and not ctx.obj.targets:
+            format_output(ctx.obj.client.get(f'/api/3/attachments/{ids[0]}'), ctx.obj.config.output_format)
+            return
+
+        failed = []
+
+        def fetch(client):
+            configure_pool(client, concurrency)
+            return fetch_by_ids(
+                client, 'attachments', ids,
+                lambda attachment_id: client.get(f'/api/3/attachments/{attachment_id}'),
+                chunk_size, concurrency, failed
+            )
+
+        with progress_for(ctx, 'Fetching attachments', len(ids) * max(len(ctx.obj.targets), 1)) as progress:
+            format_output(progress.track(iter_fan_out(ctx.obj, fetch)), ctx.obj.config.output_format)
+        if failed:
+            ctx.exit(1)
+    except click.exceptions.Exit:
+        raise
     except Exception as e:
         error(f"Failed to get attachment: {str(e)}")
         ctx.exit(1)
 
 
+def _download_attachment(client, attachment_id: str, output_dir: Optional[str],
+                         job: Optional[Job] = None,
+                         progress: Optional[ProgressReporter] = None) -> tuple[str, Path]:
+    """Download one attachment, returning its name and the path it was written to.
+
+    The body is streamed to a '.part' file that is renamed into place once
+    complete. With a job, the bytes written so far are checkpointed as the
+    download proceeds, and a resumed job asks the server for the rest only.
+    """
+    # Get attachment details first
+    attachment = client.get(f'/api/3/attachments/{attachment_id}')
+
+    # Determine output path
+    if output_dir:
+        output_path = Path(output_dir) / attachment['name']
+    else:
+        output_path = Path.cwd() / attachment['name']
+
+    # Create parent directories if needed
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    part_path = output_path.with_name(f"{output_path.name}.part")
+    offset_key = f'offset:{attachment_id}'
+
+    offset = job.get(offset_key, 0) if job and part_path.exists() else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    # Ask for the file as stored: byte ranges of a compressed response would not line up with the file
+    headers['Accept-Encoding'] = 'identity'
+    response = client.request('GET', attachment['file'], headers=headers, stream=True)
+    if offset and response.status_code != 206:
+        # The server ignored the range and is sending the whole file again
+        offset = 0
+    length = response.headers.get('Content-Length')
+    if progress and length:
+        progress.add_total(offset + int(length))
+        progress.advance(offset)
+
+    with open(part_path, 'r+b' if offset else 'wb') as f:
+        # Drop anything written after the last checkpoint
+        f.truncate(offset)
+        f.seek(offset)
+        written = checkpointed = offset
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+            f.write(chunk)
+            written += len(chunk)
+            if progress:
+                progress.advance(len(chunk))
+            if job and written - checkpointed >= CHECKPOINT_BYTES:
+                f.flush()
+                job.set(offset_key, written)
+                checkpointed = written
+
+    os.replace(part_path, output_path)
+    if job:
+        job.done(attachment_id)
+    return attachment['name'], output_path
+
+
 @files_group.command('download')
-@click.argument('attachment_id')
+@click.argument('attachment_ids', nargs=-1)
 @click.option('--output-dir', type=click.Path(file_okay=False, dir_okay=True),
               help='Directory to save downloaded file')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, help='Number of files downloaded in parallel')
+@click.option('--resume', metavar='JOB', help='Continue an interrupted download where it stopped')
 @click.pass_context
 @requires_client
-def download_attachment(ctx, attachment_id: str, output_dir: Optional[str]):
-    """Download an attachment.
+def download_attachment(ctx, attachment_ids: List[str], output_dir: Optional[str], concurrency: int,
+                        resume: Optional[str]):
+    """Download one or more attachments.
+
+    Finished files and the byte offsets of partial ones are checkpointed; if
+    the run is interrupted, rerun it with --resume and no IDs to continue.
 
     Example:
         pyfsr files download 12345678-90ab-cdef-1234-567890abcdef --output-dir ./evidence
     """
     try:
-        # Get attachment details first
-        attachment = ctx.obj.client.get(f'/api/3/attachments/{attachment_id}')
-
-        # Get file content from file IRI
-        content = ctx.obj.client.get(attachment['file'])
-
-        # Determine output path
-        if output_dir:
-            output_path = Path(output_dir) / attachment['name']
-        else:
-            output_path = Path.cwd() / attachment['name']
-
-        # Create parent directories if needed
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Write file content
-        with open(output_path, 'wb') as f:
-            if isinstance(content, bytes):
-                f.write(content)
-            else:
-                raise TypeError(f"Expected bytes response, got {type(content)}")
-
-        success(f"Downloaded {attachment['name']} to {output_path}")
-
+        if not attachment_ids and not resume:
+            raise click.UsageError("Provide at least one attachment ID")
+
+        job_args = {
+            'ids': list(attachment_ids),
+            'output_dir': str(Path(output_dir or Path.cwd()).resolve())
+        }
+        with Job.start(ctx.obj, 'files download', job_args, resume) as job:
+            pending = [attachment_id for attachment_id in job.args['ids'] if not job.is_done(attachment_id)]
+
+            configure_pool(ctx.obj.client, concurrency)
+            with progress_for(ctx, 'Downloading', unit='bytes') as progress:
+                # Bytes are counted as they arrive, so finished files add nothing more
+                download = progress.wrap(
+                    lambda attachment_id: _download_attachment(ctx.obj.client, attachment_id,
+                                                               job.args['output_dir'], job, progress),
+                    size=lambda attachment_id: 0
+                )
+                results = run_concurrently(download, pending, concurrency, return_exceptions=True)
+
+            failed = False
+            for attachment_id, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    error(f"Failed to download attachment {attachment_id}: {str(result)}")
+                    failed = True
+                    continue
+                name, output_path = result
+                success(f"Downloaded {name} to {output_path}")
+
+            if failed:
+                ctx.exit(1)
+
+    except click.exceptions.Exit:
+        raise
     except Exception as e:
         error(f"Failed to download attachment: {str(e)}")
         ctx.exit(1)
 
 
 @files_group.command('delete')
-@click.argument('attachment_id')
+@click.argument('attachment_id', required=False)
 @click.option('--force/--no-force', default=False, help='Force deletion without confirmation')
+@stdin_options
 @click.pass_context
 @requires_client
-def delete_attachment(ctx, attachment_id: str, force: bool):
+def delete_attachment(ctx, attachment_id: Optional[str], force: bool, from_stdin: bool,
+                      batch_size: int, concurrency: int, resume: Optional[str]):
     """Delete an attachment.
 
+    With --stdin, every attachment read from stdin is deleted; this requires --force.
+
     Example:
         pyfsr files delete 12345678-90ab-cdef-1234-567890abcdef --force
     """
     try:
+        if from_stdin:
+            if not force:
+                raise click.UsageError("--stdin requires --force")
+
+            def delete_one(record):
+                record_uuid = record_id(record)
+                if not record_uuid:
+                    raise ValueError("record has no uuid or @id")
+                return ctx.obj.client.delete(f'/api/3/attachments/{record_uuid}')
+
+            configure_pool(ctx.obj.client, concurrency)
+            with Job.start(ctx.obj, 'files delete', {}, resume) as job, \
+                    progress_for(ctx, 'Deleting attachments') as progress:
+                deleted, failed = process_stdin(delete_one, 'delete attachment', sys.stdin,
+                                                batch_size, concurrency, job=job, progress=progress)
+                success(f"Deleted {deleted} attachments")
+                if failed:
+                    ctx.exit(1)
+            return
+
+        if not attachment_id:
+            raise click.UsageError("Provide an attachment ID or --stdin")
+
         # Get attachment details for confirmation
         attachment = ctx.obj.client.get(f'/api/3/attachments/{attachment_id}')
 
@@ -167,6 +357,8 @@ def delete_attachment(ctx, attachment_id: str, force: bool):
         ctx.obj.client.delete(f'/api/3/attachments/{attachment_id}')
         success(f"Deleted attachment: {attachment['name']}")
 
+    except click.exceptions.Exit:
+        raise
     except Exception as e:
         error(f"Failed to delete attachment: {str(e)}")
         ctx.exit(1)
@@ -0,0 +1,112 @@
+"""Event ingestion commands for PyFSR CLI."""
+import signal
+from pathlib import Path
+from typing import List, Optional
+
+import click
+
+from ..utils.concurrency import DEFAULT_CONCURRENCY, configure_pool
+from ..utils.custom_decorators import dedup_options, requires_client
+from ..utils.dedup import open_dedup
+from ..utils.ingest import (DEFAULT_BATCH_SIZE, DEFAULT_LINGER, DEFAULT_MAX_ATTEMPTS, DEFAULT_MEMORY_LIMIT,
+                            SpillQueue, Submitter, make_server)
+from ..utils.output import error, success, warning
+from ..utils.schema import schema_for
+from ..utils.sharding import parse_size
+
+
+def _interrupt(signum, frame):
+    """Stop serving on SIGTERM the same way as on Ctrl-C, so queued events are spilled."""
+    raise KeyboardInterrupt
+
+
+@click.group(name='ingest')
+def ingest_group():
+    """Receive events from other tools and create them as records.
+
+    \b
+    Examples:
+    Accept webhook and syslog events on port 8514:
+        pyfsr ingest serve --port 8514
+        curl -d '{"name": "Port scan", "severity": "High"}' -H 'Content-Type: application/json' \\
+            http://127.0.0.1:8514/
+
+    Listen on a Unix socket instead:
+        pyfsr ingest serve --socket /run/pyfsr.sock
+    """
+    pass
+
+
+@ingest_group.command('serve')
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on')
+@click.option('--port', default=8514, show_default=True, help='TCP port to listen on')
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Listen on this Unix socket instead of TCP')
+@click.option('--module', default='alerts', show_default=True, help='Module the events are created in')
+@click.option('--source', help='Source set on events that do not carry one')
+@click.option('--batch-size', default=DEFAULT_BATCH_SIZE, show_default=True, type=click.IntRange(min=1),
+              help='Most events created per batch')
+@click.option('--linger', default=DEFAULT_LINGER, show_default=True, type=click.FloatRange(min=0),
+              help='Seconds a batch waits for more events after its first one')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, show_default=True, type=click.IntRange(min=1),
+              help='Create requests in flight per batch')
+@click.option('--memory-limit', default=DEFAULT_MEMORY_LIMIT, show_default=True, type=click.IntRange(min=1),
+              help='Events queued in memory before further events spill to disk')
+@click.option('--spill-dir', type=click.Path(file_okay=False),
+              help='Directory for spilled events (default: ~/.pyfsr/<server>/ingest/<module>)')
+@click.option('--max-spill', default='1G', show_default=True, callback=parse_size,
+              help='Spill size after which events are refused with 503, e.g. 500M')
+@click.option('--max-attempts', default=DEFAULT_MAX_ATTEMPTS, show_default=True, type=click.IntRange(min=1),
+              help='Attempts per event before it is written to rejected.ndjson')
+@dedup_options
+@click.pass_context
+@requires_client
+def serve(ctx, host: str, port: int, socket_path: Optional[str], module: str, source: Optional[str],
+          batch_size: int, linger: float, concurrency: int, memory_limit: int, spill_dir: Optional[str],
+          max_spill: int, max_attempts: int, dedup: bool, dedup_fields: List[str], dedup_ttl: float):
+    """Listen for events and create them in micro-batches until interrupted or terminated.
+
+    Events are POSTed as a JSON object, a JSON array, NDJSON or plain text
+    lines; text lines (e.g. syslog) become records named after the line.
+    When FortiSOAR falls behind, events spill to disk and are created once
+    it catches up, including after a restart. Events it refuses are written
+    to rejected.ndjson in the spill directory. With --dedup, events that
+    repeat one already created are dropped without a request.
+    """
+    client = ctx.obj.client
+    queue_dir = Path(spill_dir) if spill_dir else ctx.obj.state_path('ingest', module)
+    queue = SpillQueue(queue_dir, memory_limit, max_spill)
+    if queue.spilled_bytes:
+        warning(f"Resuming {queue.spilled_bytes} bytes of spilled events")
+
+    schema = schema_for(ctx, module)
+    try:
+        server = make_server(queue, socket_path or (host, port), {'source': source} if source else {},
+                             schema.check_record if schema else None)
+    except OSError as e:
+        error(f"Failed to listen: {str(e)}")
+        ctx.exit(1)
+
+    configure_pool(client, concurrency)
+    index = open_dedup(ctx.obj, module, dedup, dedup_fields, dedup_ttl)
+    submitter = Submitter(queue, lambda event: client.post(f'/api/3/{module}', data=event),
+                          queue_dir / 'rejected.ndjson', batch_size, linger, concurrency, max_attempts, index)
+    submitter.start()
+    where = socket_path or 'http://%s:%d/' % server.server_address[:2]
+    success(f"Listening on {where}, creating {module}")
+    previous = signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        server.server_close()
+        submitter.stop()
+        if index:
+            index.close()
+    stats = submitter.stats
+    success(f"Created {stats['created']} {module}, retried {stats['retried']}, rejected {stats['rejected']}, "
+            f"skipped {stats['duplicates']} duplicates")
+    if queue.spilled_bytes:
+        warning(f"{queue.spilled_bytes} bytes of events left in {queue_dir} for the next run")
@@ -0,0 +1,77 @@
+"""Local mirror management commands for PyFSR CLI."""
+from typing import Optional, List
+
+import click
+
+from ..utils.custom_decorators import requires_client
+from ..utils.mirror import open_mirror
+from ..utils.output import format_output, error, success
+from ..utils.progress import progress_for
+
+
+@click.group(name='mirror')
+def mirror_group():
+    """Maintain a local SQLite replica of FortiSOAR modules.
+
+    \b
+    Examples:
+    Build or refresh the alerts mirror:
+        pyfsr mirror refresh alerts
+
+    Query it without touching the server:
+        pyfsr alerts list --local --severity Critical --sort -createDate
+    """
+    pass
+
+
+@mirror_group.command('refresh')
+@click.argument('modules', nargs=-1)
+@click.option('--db', type=click.Path(dir_okay=False),
+              help='Mirror database file (default: ~/.pyfsr/<server>/mirror.db)')
+@click.option('--page-size', default=100, help='Number of records to fetch per request')
+@click.option('--full', is_flag=True,
+              help='Rebuild from every record instead of only changed ones, dropping deleted records')
+@click.option('--prune', is_flag=True, help='Drop records deleted on the server (scans all IDs)')
+@click.pass_context
+@requires_client
+def refresh_mirror(ctx, modules: List[str], db: Optional[str], page_size: int, full: bool, prune: bool):
+    """Fetch records changed since the last refresh into the mirror.
+
+    Deleted records do not show up as changes; --prune or --full removes them.
+
+    Example:
+        pyfsr mirror refresh alerts incidents --prune
+    """
+    try:
+        mirror = open_mirror(ctx.obj, db)
+        try:
+            for module in modules or ['alerts']:
+                with progress_for(ctx, f'Mirroring {module}') as progress:
+                    written = mirror.refresh(ctx.obj.client, module, page_size=page_size, full=full,
+                                             progress=progress)
+                success(f"Mirrored {written} changed {module} records")
+                if prune and not full:
+                    removed = mirror.prune(ctx.obj.client, module, page_size=page_size)
+                    success(f"Removed {removed} deleted {module} records")
+        finally:
+            mirror.close()
+    except Exception as e:
+        error(f"Failed to refresh mirror: {str(e)}")
+        ctx.exit(1)
+
+
+@mirror_group.command('status')
+@click.option('--db', type=click.Path(dir_okay=False),
+              help='Mirror database file (default: ~/.pyfsr/<server>/mirror.db)')
+@click.pass_context
+def mirror_status(ctx, db: Optional[str]):
+    """Show mirrored modules, record counts and last refresh time."""
+    try:
+        mirror = open_mirror(ctx.obj, db)
+        try:
+            format_output(mirror.status(), ctx.obj.config.output_format)
+        finally:
+            mirror.close()
+    except Exception as e:
+        error(f"Failed to read mirror status: {str(e)}")
+        ctx.exit(1)
@@ -0,0 +1,375 @@
+"""Module-agnostic record commands for PyFSR CLI."""
+import itertools
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import click
+
+from ..utils.batch import DEFAULT_CHUNK_SIZE, collect_ids, fetch_by_ids
+from ..utils.concurrency import DEFAULT_CONCURRENCY, configure_pool
+from ..utils.custom_decorators import (dedup_options, output_file_options, requires_client, stdin_options,
+                                       supports_fan_out)
+from ..utils.dedup import open_dedup
+from ..utils.fanout import iter_fan_out
+from ..utils.jobs import Job
+from ..utils.jsonstream import stream_collection
+from ..utils.output import format_output, error, success
+from ..utils.progress import progress_for
+from ..utils.query import DEFAULT_PAGE_SIZE, PAGING_STRATEGIES, build_filter, iter_keyset, iter_offset
+from ..utils.schema import schema_for, validate_columns, validate_record
+from ..utils.sharding import output_records
+from ..utils.stdin import process_stdin, record_id, writable_fields
+from .api import read_body
+from .export import export_command
+
+# Keyset order of record listings
+RECORDS_KEY = ['createDate', 'uuid']
+
+_MODULE = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+
+
+def parse_filters(filters: Tuple[str, ...]) -> Dict[str, str]:
+    """Parse repeated FIELD=VALUE options into a dict."""
+    parsed = {}
+    for item in filters:
+        field, sep, value = item.partition('=')
+        if not sep or not field:
+            raise click.BadParameter(f"Expected FIELD=VALUE, got '{item}'", param_hint="'--filter'")
+        parsed[field.strip()] = value
+    return parsed
+
+
+def _module(ctx: click.Context) -> str:
+    return ctx.meta['records.module']
+
+
+def _endpoint(module: str, record_uuid: Optional[str] = None) -> str:
+    return f'/api/3/{module}/{record_uuid}' if record_uuid else f'/api/3/{module}'
+
+
+@click.group(name='records')
+@click.argument('module')
+@click.pass_context
+def records_group(ctx, module: str):
+    """Manage the records of any module (incidents, indicators, tasks, ...).
+
+    \b
+    Examples:
+    Stream every open incident as NDJSON:
+        pyfsr --output ndjson records incidents list --all --filter status.itemValue=Open
+
+    \b
+    Copy indicators between servers:
+        pyfsr --servers prod --output ndjson records indicators list --all --view full \\
+            | pyfsr --servers lab records indicators import
+
+    \b
+    Close tasks in bulk:
+        pyfsr --output ndjson records tasks list --all --filter status.itemValue=Open \\
+            | pyfsr records tasks update --stdin --data '{"status": "/api/3/picklists/..."}'
+    """
+    if not _MODULE.match(module):
+        raise click.BadParameter(f"'{module}' is not a module name", param_hint="'MODULE'")
+    ctx.meta['records.module'] = module
+
+
+@records_group.command('list')
+@click.option('--limit', default=30, help='Number of records to retrieve')
+@click.option('--filter', 'filters', multiple=True, metavar='FIELD=VALUE',
+              help='Only list records whose field equals the value (repeatable)')
+@click.option('--columns', help='Comma-separated list of columns to display (dotted paths allowed for csv/tsv)')
+@click.option('--view', default='simple', type=click.Choice(['simple', 'full']),
+              help="View type: 'simple' removes null/empty values, 'full' shows all fields.")
+@click.option('--all', 'fetch_all', is_flag=True,
+              help='Stream every matching record page by page instead of stopping at --limit')
+@click.option('--page-size', default=DEFAULT_PAGE_SIZE, help='Number of records to fetch per request (with --all)')
+@click.option('--concurrency', default=1, help='Number of pages fetched in parallel (with --all --paging offset)')
+@click.option('--paging', type=click.Choice(PAGING_STRATEGIES),
+              help="'keyset' pages by (createDate, uuid) through the query API; 'offset' uses $page. "
+                   "Default: keyset with --all, offset otherwise")
+@output_file_options
+@click.pass_context
+@requires_client
+@supports_fan_out
+def list_records(ctx, limit: int, filters: Tuple[str, ...], columns: Optional[str], view: str, fetch_all: bool,
+                 page_size: int, concurrency: int, paging: Optional[str], output_file: Optional[str],
+                 max_records: Optional[int], max_bytes: Optional[int]):
+    """List records of the module with optional filtering.
+
+    With --servers or --all-profiles the records of every selected server are
+    merged into one stream, each tagged with its profile name in '_server'.
+    """
+    module = _module(ctx)
+    try:
+        table_columns = columns.split(',') if columns else None
+        validate_columns(ctx, module, table_columns)
+        params = parse_filters(filters)
+        paging = paging or ('keyset' if fetch_all else 'offset')
+
+        with progress_for(ctx, f'Fetching {module}') as progress:
+            def fetch(client):
+                if paging == 'keyset':
+                    query_filters = [build_filter(field, 'eq', value) for field, value in params.items()]
+                    records = iter_keyset(client, module, RECORDS_KEY, query_filters,
+                                          page_size if fetch_all else limit,
+                                          on_total=progress.add_total if fetch_all else None)
+                    return records if fetch_all else itertools.islice(records, limit)
+                if fetch_all:
+                    configure_pool(client, concurrency)
+                    return iter_offset(lambda page: stream_collection(client, _endpoint(module), page),
+                                       params, page_size, concurrency, on_total=progress.add_total)
+                return iter(stream_collection(client, _endpoint(module), {**params, '$limit': limit}))
+
+            output_records(ctx, progress.track(iter_fan_out(ctx.obj, fetch)), table_columns, view,
+                           output_file, max_records, max_bytes, module)
+    except Exception as e:
+        error(f"Failed to list {module}: {str(e)}")
+        ctx.exit(1)
+
+
+@records_group.command('get')
+@click.argument('record_ids', nargs=-1)
+@click.option('--ids-file', type=click.File('r'), help="File with one record ID per line ('-' for stdin)")
+@click.option('--chunk-size', default=DEFAULT_CHUNK_SIZE, help='Number of IDs fetched per query')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, help='Number of requests in flight')
+@click.pass_context
+@requires_client
+@supports_fan_out
+def get_records(ctx, record_ids: List[str], ids_file, chunk_size: int, concurrency: int):
+    """Get one or more records by ID.
+
+    Several IDs are fetched with one query per chunk instead of one request each.
+    """
+    module = _module(ctx)
+    try:
+        ids = collect_ids(record_ids, ids_file, sys.stdin)
+        if not ids:
+            raise click.UsageError("Provide at least one record ID")
+
+        if len(ids) == 1 and not ctx.obj.targets:
+            format_output(ctx.obj.client.get(_endpoint(module, ids[0])), ctx.obj.config.output_format)
+            return
+
+        failed = []
+
+        def fetch(client):
+            configure_pool(client, concurrency)
+            return fetch_by_ids(client, module, ids, lambda uuid: client.get(_endpoint(module, uuid)),
+                                chunk_size, concurrency, failed)
+
+        with progress_for(ctx, f'Fetching {module}', len(ids) * max(len(ctx.obj.targets), 1)) as progress:
+            format_output(progress.track(iter_fan_out(ctx.obj, fetch)), ctx.obj.config.output_format)
+        if failed:
+            ctx.exit(1)
+    except click.exceptions.Exit:
+        raise
+    except Exception as e:
+        error(f"Failed to get {module}: {str(e)}")
+        ctx.exit(1)
+
+
+@records_group.command('create')
+@click.option('--data', required=True, help="Record as JSON, a path to a JSON file, or '-' for stdin")
+@click.pass_context
+@requires_client
+def create_record(ctx, data: str):
+    """Create a record from a JSON object."""
+    module = _module(ctx)
+    try:
+        record = read_body(data)
+        if not isinstance(record, dict):
+            raise click.UsageError("--data must be a JSON object")
+        validate_record(ctx, module, record)
+
+        created = ctx.obj.client.post(_endpoint(module), data=record)
+        success(f"Created record with ID: {created.get('@id')}")
+        format_output(created, ctx.obj.config.output_format)
+    except Exception as e:
+        error(f"Failed to create {module} record: {str(e)}")
+        ctx.exit(1)
+
+
+@records_group.command('update')
+@click.argument('record_uuid', required=False)
+@click.option('--data', help="Fields to set as JSON, a path to a JSON file, or '-' for stdin")
+@stdin_options
+@click.pass_context
+@requires_client
+def update_record(ctx, record_uuid: Optional[str], data: Optional[str], from_stdin: bool, batch_size: int,
+                  concurrency: int, resume: Optional[str]):
+    """Update a record, or every record read from stdin.
+
+    With --stdin, the --data fields are applied to each record; without
+    --data, the writable fields of each NDJSON record are used as its
+    update; list with --view full to keep picklists and people.
+    """
+    module = _module(ctx)
+    try:
+        if from_stdin and data == '-':
+            raise click.UsageError("--data cannot be read from stdin together with --stdin")
+        fields = read_body(data)
+        if fields is not None and not isinstance(fields, dict):
+            raise click.UsageError("--data must be a JSON object")
+        if fields:
+            validate_record(ctx, module, fields)
+
+        if from_stdin:
+            schema = schema_for(ctx, module)
+            with Job.start(ctx.obj, f'records {module} update', {'fields': fields}, resume) as job, \
+                    progress_for(ctx, f'Updating {module}') as progress:
+                fixed = job.args['fields']
+
+                def update_one(record):
+                    uuid = record_id(record)
+                    if not uuid:
+                        raise ValueError("record has no uuid or @id")
+                    update = fixed or writable_fields(record, schema)
+                    if not update:
+                        raise ValueError("no fields to update")
+                    if not fixed:
+                        validate_record(ctx, module, update)
+                    return ctx.obj.client.put(_endpoint(module, uuid), data=update)
+
+                configure_pool(ctx.obj.client, concurrency)
+                updated, failed = process_stdin(update_one, f'update {module} record', sys.stdin, batch_size,
+                                                concurrency, job=job, progress=progress)
+                success(f"Updated {updated} {module} records")
+                if failed:
+                    ctx.exit(1)
+            return
+
+        if not record_uuid:
+            raise click.UsageError("Provide a record ID or --stdin")
+        if not fields:
+            raise click.UsageError("Provide the fields to update with --data")
+
+        updated = ctx.obj.client.put(_endpoint(module, record_uuid), data=fields)
+        success(f"Updated record: {record_uuid}")
+        format_output(updated, ctx.obj.config.output_format)
+    except click.exceptions.Exit:
+        raise
+    except Exception as e:
+        error(f"Failed to update {module} record: {str(e)}")
+        ctx.exit(1)
+
+
+@records_group.command('delete')
+@click.argument('record_uuid', required=False)
+@click.option('--force/--no-force', default=False, help='Force deletion without confirmation')
+@stdin_options
+@click.pass_context
+@requires_client
+def delete_record(ctx, record_uuid: Optional[str], force: bool, from_stdin: bool, batch_size: int,
+                  concurrency: int, resume: Optional[str]):
+    """Delete a record.
+
+    With --stdin, every record read from stdin is deleted; this requires --force.
+    """
+    module = _module(ctx)
+    try:
+        if from_stdin:
+            if not force:
+                raise click.UsageError("--stdin requires --force")
+
+            def delete_one(record):
+                uuid = record_id(record)
+                if not uuid:
+                    raise ValueError("record has no uuid or @id")
+                return ctx.obj.client.delete(_endpoint(module, uuid))
+
+            configure_pool(ctx.obj.client, concurrency)
+            with Job.start(ctx.obj, f'records {module} delete', {}, resume) as job, \
+                    progress_for(ctx, f'Deleting {module}') as progress:
+                deleted, failed = process_stdin(delete_one, f'delete {module} record', sys.stdin, batch_size,
+                                                concurrency, job=job, progress=progress)
+                success(f"Deleted {deleted} {module} records")
+                if failed:
+                    ctx.exit(1)
+            return
+
+        if not record_uuid:
+            raise click.UsageError("Provide a record ID or --stdin")
+
+        if not force:
+            if not click.confirm(f"Are you sure you want to delete {module} record {record_uuid}?"):
+                return
+
+        ctx.obj.client.delete(_endpoint(module, record_uuid))
+        success(f"Deleted record: {record_uuid}")
+    except click.exceptions.Exit:
+        raise
+    except Exception as e:
+        error(f"Failed to delete {module} record: {str(e)}")
+        ctx.exit(1)
+
+
+@records_group.command('import')
+@click.argument('source', type=click.File('r'), default='-')
+@click.option('--batch-size', default=100, help='Number of records handled per batch')
+@click.option('--concurrency', default=DEFAULT_CONCURRENCY, help='Number of requests in flight')
+@click.option('--resume', metavar='JOB', help='Skip the records an interrupted import already created')
+@dedup_options
+@click.pass_context
+@requires_client
+def import_records(ctx, source, batch_size: int, concurrency: int, resume: Optional[str],
+                   dedup: bool, dedup_fields: List[str], dedup_ttl: float):
+    """Create a record for every line of an NDJSON file or stdin.
+
+    Identity and server-managed fields such as uuid, createDate and the
+    JSON-LD keys are dropped, so the output of 'list' or 'export' can be
+    imported into another server; list with --view full to keep picklists
+    and people, which the simple view flattens to names. Every record is checked
+    against the module schema before it is sent. With --dedup, records
+    matching one already created from this machine are skipped.
+
+    \b
+    Example:
+        pyfsr records indicators import indicators.ndjson --concurrency 16
+        pyfsr records alerts import feed.ndjson --dedup --dedup-fields name,sourcedata
+    """
+    module = _module(ctx)
+    index = None
+    try:
+        schema = schema_for(ctx, module)
+        index = open_dedup(ctx.obj, module, dedup, dedup_fields, dedup_ttl)
+
+        def post(fields):
+            return ctx.obj.client.post(_endpoint(module), data=fields)
+
+        def create_one(record):
+            fields = writable_fields(record, schema)
+            validate_record(ctx, module, fields)
+            return index.create(fields, post) if index else post(fields)
+
+        configure_pool(ctx.obj.client, concurrency)
+        with Job.start(ctx.obj, f'records {module} import', {}, resume) as job, \
+                progress_for(ctx, f'Importing {module}') as progress:
+            handled, failed = process_stdin(create_one, f'create {module} record', source, batch_size,
+                                            concurrency, job=job, progress=progress)
+            skipped = index.duplicates if index else 0
+            success(f"Created {handled - skipped} {module} records"
+                    + (f", skipped {skipped} duplicates" if skipped else ''))
+            if failed:
+                ctx.exit(1)
+    except click.exceptions.Exit:
+        raise
+    except Exception as e:
+        error(f"Failed to import {module}: {str(e)}")
+        ctx.exit(1)
+    finally:
+        if index:
+            index.close()
+
+
+@click.pass_context
+def _export_records(ctx, **kwargs):
+    ctx.invoke(export_command, module=_module(ctx), **kwargs)
+
+
+records_group.add_command(click.Command(
+    'export', callback=_export_records,
+    params=[param for param in export_command.params if param.name != 'module'],
+    help="Export the module's records in parallel, one shard per createDate window "
+         "(the same as 'pyfsr export MODULE').",
+))
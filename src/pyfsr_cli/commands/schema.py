@@ -0,0 +1,40 @@
+"""Module schema commands for PyFSR CLI."""
+import click
+
+from ..utils.custom_decorators import requires_client
+from ..utils.output import format_output, error
+from ..utils.schema import load_schema
+
+
+@click.group(name='schema')
+def schema_group():
+    """Inspect the cached field metadata used to validate input.
+
+    \b
+    Examples:
+    Show the fields and picklist values of alerts:
+        pyfsr --output table schema show alerts
+
+    Refetch it after changing the module:
+        pyfsr schema show alerts --refresh
+    """
+    pass
+
+
+@schema_group.command('show')
+@click.argument('module')
+@click.option('--refresh', is_flag=True, help='Fetch the schema again instead of using the cached copy')
+@click.pass_context
+@requires_client
+def show_schema(ctx, module: str, refresh: bool):
+    """Show the fields of a module, their types and picklist values."""
+    try:
+        schema = load_schema(ctx.obj, ctx.obj.client, module, ctx.obj.schema_ttl, refresh)
+        fields = [
+            {'name': name, 'type': field['type'], 'values': schema.picklists.get(field['picklist'])}
+            for name, field in sorted(schema.fields.items())
+        ]
+        format_output(fields, ctx.obj.config.output_format, view='full')
+    except Exception as e:
+        error(f"Failed to load schema: {str(e)}")
+        ctx.exit(1)
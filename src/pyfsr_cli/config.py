@@ -1,14 +1,19 @@
 """Configuration loading and management for PyFSR CLI."""
 import os
-from dataclasses import dataclass
+import re
+from dataclasses import dataclass, replace
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 import click
-import yaml
 from pyfsr import FortiSOAR
 
+from .utils.compression import configure_compression
+from .utils.schema import DEFAULT_SCHEMA_TTL
+from .utils.yamlio import dump_yaml, load_yaml
+
 CONFIG_FILE = '.pyfsr.yaml'
+STATE_DIR = '.pyfsr'
 
 
 @dataclass
@@ -46,13 +51,18 @@ class CLIConfig:
             return (self.username, self.password)
         return None
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert config to dictionary for saving."""
+    def to_dict(self, profile: bool = False) -> Dict[str, Any]:
+        """Convert config to dictionary for saving.
+
+        Args:
+            profile: Leave out the settings profiles do not have, such as the output format
+        """
         config = {
             'server': self.server,
             'verify_ssl': self.verify_ssl,
-            'output_format': self.output_format
         }
+        if not profile:
+            config['output_format'] = self.output_format
 
         # Add auth details based on method
         if self.token:
@@ -71,7 +81,26 @@ class CLIState:
     def __init__(self):
         self.config: Optional[CLIConfig] = None
         self.client: Optional[FortiSOAR] = None
+        # Named server profiles from the config file, and the ones selected for fan-out
+        self.profiles: Dict[str, CLIConfig] = {}
+        self.targets: List[str] = []
+        self.clients: Dict[str, FortiSOAR] = {}
         self.config_path = Path.home() / CONFIG_FILE
+        self.state_dir = Path.home() / STATE_DIR
+        self.show_progress = True
+        # Compression for request bodies sent by every client, if any
+        self.compress_requests: Optional[str] = None
+        # Processes flattening listed records off the writer's thread; 0 keeps it inline
+        self.transform_workers = 0
+        # Check payloads and columns against cached module metadata before sending anything
+        self.validate = True
+        self.schema_ttl: float = DEFAULT_SCHEMA_TTL
+        self.schemas: Dict[str, Any] = {}
+
+    def state_path(self, *parts: str) -> Path:
+        """Get a path under the state directory, scoped to the configured server."""
+        server = self.config.server if self.config and self.config.server else 'default'
+        return self.state_dir.joinpath(re.sub(r'[^A-Za-z0-9_.-]', '_', server), *parts)
 
     def load_config(self, cli_params: Optional[dict] = None) -> None:
         """
@@ -95,11 +124,10 @@ class CLIState:
 
     def _load_from_file(self) -> None:
         """Load configuration from file."""
-        click.echo(f"Loading config from {self.config_path}")
+        click.echo(f"Loading config from {self.config_path}", err=True)
         if self.config_path.exists():
             with open(self.config_path) as f:
-                file_config = yaml.safe_load(f) or {}
-            click.echo(f"Loaded config: {file_config}")
+                file_config = load_yaml(f) or {}
 
             # Create new CLIConfig instance with file values
             self.config = CLIConfig(
@@ -112,6 +140,19 @@ class CLIState:
                 save_password=file_config.get('save_password', False)
             )
 
+            # Profiles inherit verify_ssl from the top level unless they set it
+            self.profiles = {
+                name: CLIConfig(
+                    server=profile.get('server'),
+                    token=profile.get('token'),
+                    username=profile.get('username'),
+                    password=profile.get('password'),
+                    verify_ssl=profile.get('verify_ssl', self.config.verify_ssl),
+                    save_password=bool(profile.get('password'))
+                )
+                for name, profile in (file_config.get('profiles') or {}).items()
+            }
+
     def _load_from_env(self) -> None:
         """Load configuration from environment variables."""
         if not self.config:
@@ -155,36 +196,76 @@ class CLIState:
         if 'save_password' in params:
             self.config.save_password = params['save_password']
 
-        click.echo(f"Config after CLI params: {self.config}")
-
-    def init_client(self) -> None:
-        """Initialize the FortiSOAR client and services."""
-        if not self.config:
+    def select_profiles(self, names: Optional[List[str]] = None, all_profiles: bool = False) -> None:
+        """Select the profiles that fan-out commands run against."""
+        if all_profiles:
+            names = list(self.profiles)
+            if not names:
+                raise click.UsageError(f"No profiles defined in {self.config_path}")
+
+        unknown = [name for name in names or [] if name not in self.profiles]
+        if unknown:
+            raise click.UsageError(f"Unknown profile(s): {', '.join(unknown)}")
+
+        self.targets = list(names or [])
+
+    def use_profile(self, name: str) -> None:
+        """Run a single-server command against a profile instead of the configured server."""
+        output_format = self.config.output_format if self.config else 'json'
+        self.config = replace(self.profiles[name], output_format=output_format)
+        self.targets = []
+
+    @staticmethod
+    def _create_client(config: Optional[CLIConfig]) -> FortiSOAR:
+        """Validate a configuration and create a FortiSOAR client for it."""
+        if not config:
             raise click.UsageError("Configuration not loaded")
 
-        if not self.config.server:
+        if not config.server:
             raise click.UsageError("Server must be provided")
 
-        if not self.config.auth:
+        if not config.auth:
             raise click.UsageError(
                 "Either token or username/password must be provided"
             )
 
         try:
-            self.client = FortiSOAR(
-                base_url=self.config.server,
-                auth=self.config.auth,
-                verify_ssl=self.config.verify_ssl
+            return FortiSOAR(
+                base_url=config.server,
+                auth=config.auth,
+                verify_ssl=config.verify_ssl
             )
-
-            # Initialize services here when needed
-            # self.alert_service = AlertService(self.client)
-
         except Exception as e:
             raise click.UsageError(f"Failed to initialize client: {str(e)}")
 
+    def init_client(self) -> None:
+        """Initialize the FortiSOAR client and services."""
+        self.client = self._create_client(self.config)
+        configure_compression(self.client, self.compress_requests)
+
+        # Initialize services here when needed
+        # self.alert_service = AlertService(self.client)
+
+    def init_clients(self) -> None:
+        """Initialize one client per selected profile, logging in to all of them in parallel."""
+        from .utils.concurrency import run_concurrently
+
+        def create(name: str) -> FortiSOAR:
+            try:
+                return self._create_client(self.profiles[name])
+            except click.UsageError as e:
+                raise click.UsageError(f"Profile '{name}': {e.message}")
+
+        clients = run_concurrently(create, self.targets, len(self.targets))
+        for client in clients:
+            configure_compression(client, self.compress_requests)
+        self.clients = dict(zip(self.targets, clients))
+
     def save_config(self) -> None:
         """Save current configuration to file."""
         if self.config:
+            data = self.config.to_dict()
+            if self.profiles:
+                data['profiles'] = {name: profile.to_dict(profile=True) for name, profile in self.profiles.items()}
             with open(self.config_path, 'w') as f:
-                yaml.dump(self.config.to_dict(), f)
+                dump_yaml(data, f)
@@ -0,0 +1,95 @@
+"""Batch record retrieval by ID list."""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .concurrency import DEFAULT_CONCURRENCY, http_status, run_concurrently
+from .output import error, warning
+from .query import build_filter, build_query
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+def _query_unsupported(e: Exception) -> bool:
+    """Check whether the query API refused the request itself, rather than failing to reach the server."""
+    status = http_status(e)
+    return status is not None and 400 <= status < 500 and status not in (401, 403, 408, 429)
+
+
+def _normalize_id(record_id: str) -> str:
+    """Accept either a bare uuid or a record IRI such as /api/3/alerts/<uuid>."""
+    return record_id.strip().rstrip('/').rsplit('/', 1)[-1]
+
+
+def collect_ids(ids: Iterable[str], ids_file: Optional[TextIO] = None,
+                stdin: Optional[TextIO] = None) -> List[str]:
+    """Gather record IDs from arguments, an ID file and stdin, removing duplicates.
+
+    An argument of '-' reads IDs from stdin, one per line (or whitespace separated).
+    """
+    collected: List[str] = []
+    for record_id in ids:
+        if record_id == '-' and stdin is not None:
+            collected.extend(stdin.read().split())
+        else:
+            collected.append(record_id)
+    if ids_file is not None:
+        collected.extend(ids_file.read().split())
+    return list(dict.fromkeys(_normalize_id(record_id) for record_id in collected if record_id.strip()))
+
+
+def fetch_by_ids(client, module: str, ids: List[str],
+                 get_one: Callable[[str], Dict[str, Any]],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 failed: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Fetch many records, using one query per chunk of IDs where possible.
+
+    Each chunk is a single query API request with an ``in`` filter on uuid,
+    and chunks run concurrently. If the query API rejects the module with a
+    4xx response, every ID is fetched with ``get_one`` concurrently instead;
+    any other error, such as a timeout or an authentication failure, is
+    raised. IDs that were not found are reported with a warning once all
+    records have been yielded. IDs whose fetch failed otherwise are reported
+    with an error and added to ``failed``, so the command can exit non-zero.
+
+    Args:
+        client: FortiSOAR client
+        module: Module name (e.g. 'alerts')
+        ids: Deduplicated record uuids
+        get_one: Fallback fetching a single record by uuid
+        chunk_size: Number of IDs per query
+        concurrency: Maximum number of requests in flight
+        failed: List receiving the IDs whose fetch failed
+    """
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+    def query_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+        body = build_query([build_filter('uuid', 'in', chunk)], limit=len(chunk))
+        return client.query(module, body).get('hydra:member', [])
+
+    found = set()
+    errors = set()
+    try:
+        # Probe with the first chunk so an unsupported module falls back before any output
+        first = query_chunk(chunks[0]) if chunks else []
+    except Exception as e:
+        if not _query_unsupported(e):
+            raise
+        results = run_concurrently(get_one, ids, concurrency, return_exceptions=True)
+        for record_id, record in zip(ids, results):
+            if not isinstance(record, Exception):
+                found.add(record_id)
+                yield record
+            elif http_status(record) != 404:
+                errors.add(record_id)
+                if failed is not None:
+                    failed.append(record_id)
+                error(f"Failed to fetch {record_id}: {str(record)}")
+    else:
+        for records in [first] + run_concurrently(query_chunk, chunks[1:], concurrency):
+            for record in records:
+                found.add(record.get('uuid'))
+                yield record
+
+    missing = [record_id for record_id in ids if record_id not in found and record_id not in errors]
+    if missing:
+        warning(f"{len(missing)} record(s) not found: {', '.join(missing)}")
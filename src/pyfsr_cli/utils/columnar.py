@@ -0,0 +1,149 @@
+"""Columnar (Parquet/Arrow) output for PyFSR CLI.
+
+Requires the optional ``pyarrow`` dependency (``pip install 'pyfsr-cli[arrow]'``).
+"""
+import json
+import sys
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set
+
+import click
+
+from .output import warning
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Serialize nested values so every cell is a scalar."""
+    return {
+        key: json.dumps(value) if isinstance(value, (dict, list)) else value
+        for key, value in record.items()
+    }
+
+
+def _infer_schema(rows: List[Dict[str, Any]]) -> 'pa.Schema':
+    """Infer a schema from the first batch, typing all-null columns as strings."""
+    keys = list(dict.fromkeys(key for row in rows for key in row))
+    schema = pa.Table.from_pydict({key: [row.get(key) for row in rows] for key in keys}).schema
+    return pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+        for field in schema
+    ])
+
+
+def _fit(value: Any, type: 'pa.DataType') -> Any:
+    """Convert a value to a column type, raising ValueError if it cannot be converted."""
+    if value is None:
+        return None
+    if pa.types.is_string(type):
+        return value if isinstance(value, str) else str(value)
+    try:
+        return pa.array([value]).cast(type)[0].as_py()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError) as e:
+        raise ValueError(str(e))
+
+
+def _coerce(rows: List[Dict[str, Any]], schema: 'pa.Schema', lossy: Set[str]) -> 'pa.Table':
+    """Build a table for a batch, converting values that do not fit the schema.
+
+    The schema is fixed once the first batch is written, so a column cannot
+    be widened later. A value of another type is stored as a string in string
+    columns and cast in typed ones (e.g. '5' into an integer column); one
+    that cannot be cast is written as null, and its column is added to
+    ``lossy`` so the caller can warn about it.
+    """
+    try:
+        return pa.Table.from_pylist(rows, schema=schema)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    fixed = []
+    for row in rows:
+        cells = {}
+        for field in schema:
+            try:
+                cells[field.name] = _fit(row.get(field.name), field.type)
+            except ValueError:
+                cells[field.name] = None
+                lossy.add(field.name)
+        fixed.append(cells)
+    return pa.Table.from_pylist(fixed, schema=schema)
+
+
+class _ColumnarWriter:
+    """Lazily opened Parquet file or Arrow IPC stream writer."""
+
+    def __init__(self, format: str, sink: BinaryIO):
+        self.format = format
+        self.sink = sink
+        self.writer = None
+
+    def write(self, table: 'pa.Table') -> None:
+        if self.writer is None:
+            if self.format == 'parquet':
+                self.writer = pq.ParquetWriter(self.sink, table.schema)
+            else:
+                self.writer = ipc.new_stream(self.sink, table.schema)
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+def write_columnar(records: Iterable[Dict[str, Any]], format: str = 'parquet',
+                   sink: Optional[BinaryIO] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Write records as Parquet row groups or Arrow record batches.
+
+    Records are consumed lazily and written every ``batch_size`` rows, so
+    memory stays bounded by one batch however many records are streamed.
+
+    Args:
+        records: Records to write, typically a generator yielding page by page
+        format: 'parquet' or 'arrow' (Arrow IPC stream)
+        sink: Binary file to write to (defaults to stdout)
+        batch_size: Number of rows per row group
+
+    Returns:
+        Number of records written
+    """
+    if pa is None:
+        raise click.UsageError(
+            f"{format} output requires pyarrow: pip install 'pyfsr-cli[arrow]'"
+        )
+
+    writer = _ColumnarWriter(format, sink or sys.stdout.buffer)
+    schema = None
+    batch: List[Dict[str, Any]] = []
+    written = 0
+    lossy: Set[str] = set()
+
+    def flush():
+        nonlocal schema
+        if schema is None:
+            schema = _infer_schema(batch)
+        warned = set(lossy)
+        writer.write(_coerce(batch, schema, lossy))
+        for name in sorted(lossy - warned):
+            warning(f"Column '{name}' is {schema.field(name).type} from the first {batch_size} records; "
+                    f"values of another type are written as null")
+
+    try:
+        for record in records:
+            batch.append(_row(record))
+            if len(batch) >= batch_size:
+                flush()
+                written += len(batch)
+                batch = []
+        if batch:
+            flush()
+            written += len(batch)
+    finally:
+        writer.close()
+    return written
@@ -0,0 +1,133 @@
+"""Compressed transfers: negotiated response encodings and compressed request bodies.
+
+Responses are decoded by urllib3 as they stream in, so advertising an
+encoding is all it takes to receive compressed JSON. Request compression is
+opt-in because the server has to accept a Content-Encoding on requests.
+zstd needs Python 3.14 or the ``backports.zstd`` package
+(``pip install pyfsr-cli[compression]``).
+"""
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Optional
+
+import click
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+COMPRESSIONS = ['gzip', 'zstd']
+
+# File name suffix for each encoding
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Request bodies smaller than this are sent as-is; compressing them saves little
+DEFAULT_MIN_SIZE = 64 * 1024
+
+# Bytes read per compression step when compressing a file
+_CHUNK_SIZE = 1024 * 1024
+
+
+def compressor(encoding: str) -> Any:
+    """Create an incremental compressor with ``compress(data)`` and ``flush()`` methods."""
+    if encoding == 'gzip':
+        # wbits=31 writes a gzip header and trailer rather than a raw zlib stream
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if encoding == 'zstd':
+        if zstd is None:
+            raise click.UsageError("zstd compression needs the 'backports.zstd' package: "
+                                   "pip install pyfsr-cli[compression]")
+        return zstd.ZstdCompressor()
+    raise click.UsageError(f"Unsupported compression '{encoding}'. Use one of: {', '.join(COMPRESSIONS)}")
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress a whole payload."""
+    c = compressor(encoding)
+    return c.compress(data) + c.flush()
+
+
+def compress_stream(source: BinaryIO, sink: BinaryIO, encoding: str) -> None:
+    """Compress one stream into another chunk by chunk, never holding the whole payload."""
+    c = compressor(encoding)
+    while chunk := source.read(_CHUNK_SIZE):
+        sink.write(c.compress(chunk))
+    sink.write(c.flush())
+
+
+def compress_file(path: Path, target_dir: Path, encoding: str) -> Path:
+    """Write a compressed copy of a file into a directory, returning its path."""
+    target = target_dir / f"{path.name}{SUFFIXES[encoding]}"
+    with open(path, 'rb') as source, open(target, 'wb') as sink:
+        compress_stream(source, sink, encoding)
+    return target
+
+
+class CompressingAdapter(HTTPAdapter):
+    """HTTP adapter that compresses large request bodies before sending them.
+
+    Bodies that already carry a Content-Encoding, are streamed from a
+    generator or file, or are smaller than ``min_size`` are sent unchanged.
+
+    Args:
+        encoding: 'gzip' or 'zstd'
+        min_size: Smallest body, in bytes, worth compressing
+        **kwargs: Passed to HTTPAdapter (e.g. pool sizes)
+    """
+
+    def __init__(self, encoding: str, min_size: int = DEFAULT_MIN_SIZE, **kwargs):
+        # Fail on an unavailable encoding now rather than on the first request
+        compressor(encoding)
+        self.encoding = encoding
+        self.min_size = min_size
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        if isinstance(body, bytes) and len(body) >= self.min_size and 'Content-Encoding' not in request.headers:
+            request.body = compress(body, self.encoding)
+            request.headers['Content-Encoding'] = self.encoding
+            request.headers['Content-Length'] = str(len(request.body))
+        return super().send(request, **kwargs)
+
+
+def configure_compression(client, encoding: Optional[str] = None, min_size: int = DEFAULT_MIN_SIZE) -> None:
+    """Ask for compressed responses and optionally compress large request bodies.
+
+    Args:
+        client: FortiSOAR client whose session is configured
+        encoding: Compression for request bodies, or None to send them as-is
+        min_size: Smallest request body, in bytes, worth compressing
+    """
+    session = getattr(client, 'session', None)
+    if session is None:
+        return
+    # Every encoding urllib3 can decode here, including zstd when it is installed
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+    if encoding:
+        # Keep the client's retry policy, which the adapter being replaced carries
+        current = session.get_adapter('https://')
+        adapter = CompressingAdapter(encoding, min_size, max_retries=current.max_retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+
+def copy_adapter(session, **kwargs) -> HTTPAdapter:
+    """Create an adapter like the session's current one, with new pool settings.
+
+    The current adapter's retry policy is kept unless ``max_retries`` is given.
+    """
+    current = session.get_adapter('https://')
+    kwargs.setdefault('max_retries', current.max_retries)
+    if isinstance(current, CompressingAdapter):
+        return CompressingAdapter(current.encoding, current.min_size, **kwargs)
+    return HTTPAdapter(**kwargs)
+
@@ -0,0 +1,84 @@
+"""Asyncio execution engine for commands that fan out many API requests.
+
+The FortiSOAR client is synchronous, so each request runs on a worker
+thread while asyncio bounds how many are in flight and cancels the
+pending ones on Ctrl-C.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+from .compression import copy_adapter
+
+DEFAULT_CONCURRENCY = 8
+
+T = TypeVar('T')
+
+
+def http_status(error: BaseException) -> Optional[int]:
+    """Get the HTTP status code of a failed request, or None if the request never got a response."""
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def configure_pool(client, size: int) -> None:
+    """Grow the client's HTTP connection pool so concurrent requests reuse connections.
+
+    The new adapter keeps the retry policy of the one it replaces.
+    """
+    session = getattr(client, 'session', None)
+    if session is None or size <= 1:
+        return
+    current = session.get_adapter('https://')
+    adapter = copy_adapter(session, pool_connections=size, pool_maxsize=size,
+                           pool_block=getattr(current, '_pool_block', False))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+async def _gather(func: Callable[[T], Any], items: List[T], limit: int,
+                  return_exceptions: bool) -> List[Any]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(limit)
+    executor = ThreadPoolExecutor(max_workers=limit)
+
+    async def run_one(item: T) -> Any:
+        async with semaphore:
+            return await loop.run_in_executor(executor, func, item)
+
+    tasks = [asyncio.ensure_future(run_one(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    finally:
+        # On error or cancellation, drop everything that has not started yet
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_concurrently(func: Callable[[T], Any], items: Iterable[T],
+                     limit: int = DEFAULT_CONCURRENCY,
+                     return_exceptions: bool = False) -> List[Any]:
+    """Call ``func`` on every item with at most ``limit`` calls in flight.
+
+    Results are returned in the order of ``items``. On Ctrl-C the pending
+    calls are cancelled and KeyboardInterrupt propagates to the caller.
+
+    Args:
+        func: Blocking callable, typically wrapping a client request
+        items: Arguments to call ``func`` with
+        limit: Maximum number of concurrent calls
+        return_exceptions: Return exceptions in place of results instead of
+            failing on the first one
+    """
+    items = list(items)
+    if limit <= 1 or len(items) <= 1:
+        results = []
+        for item in items:
+            try:
+                results.append(func(item))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+    return asyncio.run(_gather(func, items, limit, return_exceptions))
@@ -1,13 +1,78 @@
 from functools import wraps
 
+import click
+
+from .concurrency import DEFAULT_CONCURRENCY
+from .dedup import DEFAULT_DEDUP_FIELDS, DEFAULT_DEDUP_TTL
+from .sharding import parse_size
+from .stdin import DEFAULT_BATCH_SIZE
+
+
+def ensure_client(ctx, fan_out: bool = False):
+    """Initialize the client, or one client per selected profile for fan-out commands
+
+    A single profile selected for a command that cannot fan out stands in for the configured server.
+    """
+    if ctx.obj.targets and not fan_out:
+        if len(ctx.obj.targets) > 1:
+            raise click.UsageError(f"'{ctx.command_path}' cannot run against multiple servers")
+        ctx.obj.use_profile(ctx.obj.targets[0])
+
+    if ctx.obj.targets:
+        if not ctx.obj.clients:
+            ctx.obj.init_clients()
+    elif ctx.obj.client is None:
+        ctx.obj.init_client()
+
+
+def supports_fan_out(f):
+    """Mark a command as able to run against every server selected with --servers"""
+    f.supports_fan_out = True
+    return f
+
 
 def requires_client(f):
     """Decorator to initialize client only for commands that need it"""
 
     @wraps(f)
     def wrapper(ctx, *args, **kwargs):
-        if ctx.obj.client is None:
-            ctx.obj.init_client()
+        ensure_client(ctx, getattr(f, 'supports_fan_out', False))
         return f(ctx, *args, **kwargs)
 
     return wrapper
+
+
+def stdin_options(f):
+    """Add the options shared by commands that can process records read from stdin"""
+    f = click.option('--resume', metavar='JOB',
+                     help='Skip the records an interrupted run already handled; pipe in the same input (with --stdin)')(f)
+    f = click.option('--concurrency', default=DEFAULT_CONCURRENCY,
+                     help='Number of requests in flight (with --stdin)')(f)
+    f = click.option('--batch-size', default=DEFAULT_BATCH_SIZE,
+                     help='Number of stdin records handled per batch (with --stdin)')(f)
+    f = click.option('--stdin', 'from_stdin', is_flag=True,
+                     help='Read NDJSON records or IDs from stdin, one per line')(f)
+    return f
+
+
+def output_file_options(f):
+    """Add the options that write a command's records to rotating files instead of stdout"""
+    f = click.option('--max-bytes', callback=parse_size, metavar='SIZE',
+                     help='Start a new file after this much uncompressed output, e.g. 256MB (with --output-file)')(f)
+    f = click.option('--max-records', type=int, help='Start a new file after this many records (with --output-file)')(f)
+    f = click.option('--output-file', metavar='PATTERN',
+                     help="Write records to files instead of stdout, e.g. 'alerts-{shard:04d}.ndjson.gz'; "
+                          "a .gz or .zst suffix compresses them")(f)
+    return f
+
+
+def dedup_options(f):
+    """Add the options that drop records created before, without sending them"""
+    f = click.option('--dedup-ttl', default=DEFAULT_DEDUP_TTL, show_default=True, type=click.FloatRange(min=0),
+                     help='Seconds a created record suppresses its duplicates (with --dedup)')(f)
+    f = click.option('--dedup-fields', default=','.join(DEFAULT_DEDUP_FIELDS), show_default=True,
+                     callback=lambda ctx, param, value: [field.strip() for field in value.split(',') if field.strip()],
+                     help='Comma-separated fields identifying a duplicate (with --dedup)')(f)
+    f = click.option('--dedup', is_flag=True,
+                     help='Skip records whose fingerprint fields match a record created within --dedup-ttl')(f)
+    return f
@@ -0,0 +1,171 @@
+"""Client-side duplicate suppression for record creation.
+
+Each record is reduced to a fingerprint, a hash of a few identifying fields,
+and checked against a local SQLite index of the fingerprints created within
+a TTL. A Bloom filter in front of the index answers most checks for new
+records without touching the database.
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+
+DEFAULT_DEDUP_FIELDS = ('name', 'source', 'sourcedata')
+
+# Seconds a fingerprint suppresses duplicates after its record was created
+DEFAULT_DEDUP_TTL = 7 * 24 * 60 * 60
+
+# Smallest number of fingerprints the Bloom filter is sized for
+MIN_CAPACITY = 100_000
+
+# Target false positive rate of the Bloom filter
+ERROR_RATE = 0.01
+
+# Claims written to the index per transaction
+COMMIT_EVERY = 500
+
+T = TypeVar('T')
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex digests.
+
+    Args:
+        capacity: Number of items the filter is sized for
+        error_rate: False positive rate at that capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float = ERROR_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: str):
+        # Double hashing on two halves of the digest stands in for independent hash functions
+        h1, h2 = int(digest[:16], 16), int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: str) -> None:
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+
+class DedupIndex:
+    """Persistent index of the fingerprints of records created within a TTL.
+
+    ``claim`` records a fingerprint before the record is sent, so identical
+    records in the same concurrent batch are caught too; ``release`` forgets
+    it again when the create fails.
+
+    Args:
+        path: SQLite database holding the index
+        fields: Fields whose values make up the fingerprint
+        ttl: Seconds a fingerprint suppresses duplicates
+    """
+
+    def __init__(self, path: Path, fields: Sequence[str] = DEFAULT_DEDUP_FIELDS, ttl: float = DEFAULT_DEDUP_TTL):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fields = list(fields)
+        self.ttl = ttl
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, created REAL)')
+        self.conn.execute('DELETE FROM fingerprints WHERE created < ?', (time.time() - ttl,))
+        self.conn.commit()
+        count = self.conn.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+        self.bloom = BloomFilter(max(MIN_CAPACITY, count * 2))
+        for (fingerprint,) in self.conn.execute('SELECT fingerprint FROM fingerprints'):
+            self.bloom.add(fingerprint)
+
+    def fingerprint(self, record: Dict[str, Any]) -> Optional[str]:
+        """Hash the fingerprint fields of a record, or None if it has none of them.
+
+        The field names are part of the hash, so indexes keyed on different
+        fields never match each other's records.
+        """
+        values = [record.get(field) for field in self.fields]
+        if all(value is None for value in values):
+            return None
+        keyed = dict(zip(self.fields, values))
+        return hashlib.sha256(json.dumps(keyed, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _written(self) -> None:
+        # Called with the lock held after every change to the index
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.conn.commit()
+            self._pending = 0
+
+    def flush(self) -> None:
+        """Commit the claims and releases made since the last commit."""
+        with self._lock:
+            if self._pending:
+                self.conn.commit()
+                self._pending = 0
+
+    def claim(self, record: Dict[str, Any]) -> bool:
+        """Record a fingerprint about to be created. Returns False if the record is a duplicate."""
+        fingerprint = self.fingerprint(record)
+        if fingerprint is None:
+            return True
+        now = time.time()
+        with self._lock:
+            if fingerprint in self.bloom:
+                row = self.conn.execute('SELECT created FROM fingerprints WHERE fingerprint = ?',
+                                        (fingerprint,)).fetchone()
+                if row and row[0] >= now - self.ttl:
+                    self.duplicates += 1
+                    return False
+            self.conn.execute('INSERT OR REPLACE INTO fingerprints VALUES (?, ?)', (fingerprint, now))
+            self.bloom.add(fingerprint)
+            self._written()
+        return True
+
+    def release(self, record: Dict[str, Any]) -> None:
+        """Forget the fingerprint of a record that could not be created."""
+        fingerprint = self.fingerprint(record)
+        if fingerprint is None:
+            return
+        with self._lock:
+            # The Bloom filter keeps the bit; the index lookup behind it settles the check
+            self.conn.execute('DELETE FROM fingerprints WHERE fingerprint = ?', (fingerprint,))
+            self._written()
+
+    def create(self, record: Dict[str, Any], create: Callable[[Dict[str, Any]], T]) -> Optional[T]:
+        """Call ``create`` on a record unless it is a duplicate, returning None if it was skipped."""
+        if not self.claim(record):
+            return None
+        try:
+            return create(record)
+        except BaseException:
+            self.release(record)
+            raise
+
+    def close(self) -> None:
+        """Commit outstanding claims and close the database connection."""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def __enter__(self) -> 'DedupIndex':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_dedup(state, module: str, enabled: bool, fields: Sequence[str],
+               ttl: float) -> Optional[DedupIndex]:
+    """Open the module's dedup index under the state directory, or None if dedup is off."""
+    if not enabled:
+        return None
+    return DedupIndex(state.state_path('dedup', f'{module}.db'), fields, ttl)
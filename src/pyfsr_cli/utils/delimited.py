@@ -0,0 +1,52 @@
+"""Streaming CSV/TSV output for PyFSR CLI."""
+import csv
+import itertools
+import json
+import sys
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+DEFAULT_SAMPLE_SIZE = 100
+
+
+def _cell(value: Any) -> Any:
+    """Convert a value into a single CSV cell."""
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def write_delimited(records: Iterable[Dict[str, Any]], delimiter: str = ',',
+                    columns: Optional[List[str]] = None, sink: Optional[TextIO] = None,
+                    sample_size: int = DEFAULT_SAMPLE_SIZE) -> int:
+    """Write records as delimited text, one row at a time.
+
+    Args:
+        records: Records to write, typically a generator yielding page by page
+        delimiter: Field delimiter (',' for CSV, '\\t' for TSV)
+        columns: Columns to write; defaults to the fields seen in the first
+            ``sample_size`` records
+        sink: Text stream to write to (defaults to stdout)
+        sample_size: Number of records buffered to build the header
+
+    Returns:
+        Number of records written
+    """
+    records = iter(records)
+    if not columns:
+        sample = list(itertools.islice(records, sample_size))
+        if not sample:
+            # Without records or --columns there is no header to write
+            return 0
+        columns = list(dict.fromkeys(key for record in sample for key in record))
+        records = itertools.chain(sample, records)
+
+    writer = csv.writer(sink or sys.stdout, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(columns)
+
+    written = 0
+    for record in records:
+        writer.writerow([_cell(record.get(column)) for column in columns])
+        written += 1
+    return written
@@ -0,0 +1,181 @@
+"""Time-partitioned exports: plan createDate windows and write one shard per window."""
+import math
+import os
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from .concurrency import DEFAULT_CONCURRENCY, run_concurrently
+from .query import DEFAULT_PAGE_SIZE, build_filter, build_query, iter_keyset
+from .sharding import write_records
+
+EXPORT_FORMATS = ['ndjson', 'csv', 'tsv', 'parquet', 'arrow']
+
+# Records per window the planner aims for
+DEFAULT_WINDOW_SIZE = 50_000
+
+# Keyset order within a window
+EXPORT_KEY = ['createDate', 'uuid']
+
+# Windows narrower than this many seconds are never split further
+MIN_WINDOW_SECONDS = 1.0
+
+# Most windows a single split creates, so one bad count cannot explode the plan
+MAX_SPLIT = 64
+
+
+@dataclass
+class Window:
+    """A createDate range [start, end) and the number of records counted in it."""
+    start: float
+    end: float
+    count: int
+
+    def filters(self) -> List[Dict[str, Any]]:
+        """Query filters selecting the records of this window."""
+        return [build_filter('createDate', 'gte', self.start), build_filter('createDate', 'lt', self.end)]
+
+
+def parse_time(value: str) -> float:
+    """Parse an epoch timestamp or an ISO 8601 date/datetime (UTC unless it has an offset)."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise click.BadParameter(f"Expected an ISO date or epoch seconds, got '{value}'")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def count_records(client, module: str, filters: List[Dict[str, Any]]) -> Optional[int]:
+    """Count the records matching filters, or None if the server does not report totals."""
+    body = build_query(filters, limit=1, select=['uuid'])
+    return client.query(module, body).get('hydra:totalItems')
+
+
+def earliest_create_date(client, module: str) -> Optional[float]:
+    """Get the createDate of the oldest record in a module."""
+    body = build_query(sort=['createDate'], limit=1, select=['uuid', 'createDate'])
+    members = client.query(module, body).get('hydra:member', [])
+    return members[0].get('createDate') if members else None
+
+
+def plan_windows(count: Callable[[Window], Optional[int]], start: float, end: float,
+                 window_size: int = DEFAULT_WINDOW_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY) -> List[Window]:
+    """Split a time range into windows of roughly ``window_size`` records each.
+
+    Ranges holding too many records are split into equal time slices sized
+    from their count, then recounted, until every window is small enough or
+    too narrow to split. Counts of one round run concurrently. Empty windows
+    are dropped. If the server reports no totals the whole range is one window.
+
+    Args:
+        count: Counts the records in a window
+        start: Range start, epoch seconds (inclusive)
+        end: Range end, epoch seconds (exclusive)
+        window_size: Target records per window
+        concurrency: Maximum number of count queries in flight
+    """
+    windows: List[Window] = []
+    pending = [Window(start, end, 0)]
+    while pending:
+        counts = run_concurrently(count, pending, concurrency)
+        splits: List[Window] = []
+        for window, total in zip(pending, counts):
+            if total is None:
+                windows.append(Window(window.start, window.end, 0))
+            elif total == 0:
+                continue
+            elif total <= window_size or window.end - window.start <= MIN_WINDOW_SECONDS:
+                windows.append(Window(window.start, window.end, total))
+            else:
+                parts = min(math.ceil(total / window_size), MAX_SPLIT)
+                step = (window.end - window.start) / parts
+                bounds = [window.start + i * step for i in range(parts)] + [window.end]
+                splits.extend(Window(a, b, 0) for a, b in zip(bounds, bounds[1:]))
+        pending = splits
+    return sorted(windows, key=lambda window: window.start)
+
+
+def export_window(client, module: str, window: Window, path: Path, format: str,
+                  page_size: int = DEFAULT_PAGE_SIZE, columns: Optional[List[str]] = None,
+                  view: str = 'full') -> int:
+    """Fetch one window with keyset paging and write it as a shard.
+
+    The shard is written under a '.part' name and renamed when complete, so
+    a shard file that exists is always whole.
+
+    Returns:
+        Number of records written
+    """
+    from .pipeline import pipeline
+    from .transform import RecordTransformer
+
+    records = iter_keyset(client, module, EXPORT_KEY, window.filters(), page_size)
+    part = path.with_name(f"{path.name}.part")
+    # Fetch the next pages while this process serialises the current ones
+    with open(part, 'wb') as sink:
+        transform = RecordTransformer.for_view(view, columns, format)
+        written = write_records(pipeline(records, transform), format, sink, columns)
+    os.replace(part, path)
+    return written
+
+
+def export_window_in_worker(config, compress_requests: Optional[str], module: str, window: Dict[str, Any],
+                            path: str, format: str, page_size: int, columns: Optional[List[str]],
+                            view: str) -> int:
+    """Process pool entry point: log in with a client of its own and export one window."""
+    from ..config import CLIState
+    from .compression import configure_compression
+
+    client = CLIState._create_client(config)
+    configure_compression(client, compress_requests)
+    return export_window(client, module, Window(**window), Path(path), format, page_size, columns, view)
+
+
+def _delimited_header(shard: Path) -> Optional[str]:
+    """Get the header line of a csv or tsv shard, or None if the shard holds no rows."""
+    with open(shard, newline='') as f:
+        header = f.readline()
+        return header if f.readline() else None
+
+
+def merge_shards(shards: List[Path], target: Path, format: str) -> None:
+    """Concatenate ndjson, csv or tsv shards in order into one file and remove them.
+
+    Delimited shards must share a header, which is written once. Shards of
+    windows without records are skipped, since their header, if any, may
+    lack columns.
+    """
+    if format not in ('ndjson', 'csv', 'tsv'):
+        raise click.UsageError(f"{format} shards cannot be merged; write them side by side instead")
+
+    parts = shards
+    if format != 'ndjson':
+        headers = {shard: _delimited_header(shard) for shard in shards}
+        parts = [shard for shard in shards if headers[shard] is not None]
+        if len({headers[shard] for shard in parts}) > 1:
+            raise click.ClickException("Shards have different columns; pass --columns to merge them")
+
+    with open(target, 'wb') as out:
+        for i, shard in enumerate(parts):
+            with open(shard, 'rb') as f:
+                if format != 'ndjson' and i > 0:
+                    f.readline()
+                while chunk := f.read(1024 * 1024):
+                    out.write(chunk)
+    for shard in shards:
+        shard.unlink()
+
+
+def window_dict(window: Window) -> Dict[str, Any]:
+    """Serialise a window for the job journal and manifest."""
+    return asdict(window)
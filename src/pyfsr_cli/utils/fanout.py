@@ -0,0 +1,66 @@
+"""Run the same fetch against several FortiSOAR servers and merge the results."""
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+SERVER_FIELD = '_server'
+
+_DONE = object()
+
+
+class FanOutError(Exception):
+    """Raised after a fan-out when one or more servers failed."""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        super().__init__('; '.join(f"{name}: {error}" for name, error in errors.items()))
+
+
+def iter_fan_out(state, fetch: Callable[[Any], Iterable[Dict[str, Any]]],
+                 buffer_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Yield the records fetched from every selected server as one stream.
+
+    Without selected profiles this is simply ``fetch(state.client)``. With
+    profiles, each server is fetched on its own thread with its own client;
+    records are tagged with the profile name in ``_server`` and yielded in
+    arrival order. A bounded buffer keeps fast servers from running ahead of
+    the consumer. Servers that fail do not stop the others; their errors are
+    raised together as a FanOutError once every server has finished.
+
+    Args:
+        state: CLI state holding the selected profiles and their clients
+        fetch: Callable taking a client and returning its records
+        buffer_size: Maximum number of records buffered across all servers
+    """
+    if not state.targets:
+        yield from fetch(state.client)
+        return
+
+    results: queue.Queue = queue.Queue(maxsize=buffer_size)
+    errors: Dict[str, Exception] = {}
+
+    def worker(name: str) -> None:
+        try:
+            for record in fetch(state.clients[name]):
+                if isinstance(record, dict):
+                    record[SERVER_FIELD] = name
+                results.put(record)
+        except Exception as e:
+            errors[name] = e
+        finally:
+            results.put(_DONE)
+
+    threads = [threading.Thread(target=worker, args=(name,), daemon=True) for name in state.targets]
+    for thread in threads:
+        thread.start()
+
+    remaining = len(threads)
+    while remaining:
+        record = results.get()
+        if record is _DONE:
+            remaining -= 1
+        else:
+            yield record
+
+    if errors:
+        raise FanOutError(errors)
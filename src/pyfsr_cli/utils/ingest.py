@@ -0,0 +1,402 @@
+"""Event ingestion: an HTTP listener, a disk-backed queue and a micro-batching submitter.
+
+Events posted to the listener are queued in memory. When the submitter
+falls behind, e.g. because FortiSOAR is slow, further events spill to NDJSON
+segment files on disk, and once the spill reaches its size limit the
+listener answers 503 so senders back off. The submitter takes events off the
+queue in micro-batches, closed by size or after a short linger, and creates
+each batch with concurrent requests. Failed events are retried with backoff,
+or written to a rejected file when the server refuses them.
+"""
+import json
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from .concurrency import DEFAULT_CONCURRENCY, http_status, run_concurrently
+from .dedup import DedupIndex
+from .output import warning
+
+DEFAULT_BATCH_SIZE = 100
+
+# Seconds a batch waits for more events after its first one arrived
+DEFAULT_LINGER = 1.0
+
+# Events held in memory before new ones spill to disk
+DEFAULT_MEMORY_LIMIT = 10_000
+
+# Bytes of spilled events after which new events are refused
+DEFAULT_MAX_SPILL = 1024 ** 3
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Events per spill segment file
+SEGMENT_SIZE = 1000
+
+# Longest pause between retries while every create fails
+MAX_BACKOFF = 30.0
+
+# Longest event body accepted, in bytes
+MAX_BODY = 16 * 1024 * 1024
+
+
+class SpillQueue:
+    """FIFO queue of events held in memory up to a limit and spilled to disk beyond it.
+
+    Once events spill, every new event goes to disk until the spill has been
+    drained, so events always leave in the order they arrived. Segments left
+    by an earlier run are picked up again.
+
+    Args:
+        spill_dir: Directory for the NDJSON spill segments
+        memory_limit: Events held in memory
+        max_spill_bytes: Spill size after which ``put`` refuses events
+    """
+
+    def __init__(self, spill_dir: Path, memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                 max_spill_bytes: int = DEFAULT_MAX_SPILL):
+        self.spill_dir = spill_dir
+        self.memory_limit = memory_limit
+        self.max_spill_bytes = max_spill_bytes
+        spill_dir.mkdir(parents=True, exist_ok=True)
+        self._cond = threading.Condition()
+        self._memory: Deque[Dict[str, Any]] = deque()
+        self._segments: Deque[Path] = deque(sorted(spill_dir.glob('*.ndjson')))
+        self._writer: Optional[Tuple[Path, Any, int]] = None
+        self.spilled_bytes = sum(path.stat().st_size for path in self._segments)
+        self.closed = False
+
+    def _segment_path(self, sequence: Optional[int] = None) -> Path:
+        return self.spill_dir / f'{sequence if sequence is not None else time.time_ns():020d}.ndjson'
+
+    def _spill(self, item: Dict[str, Any]) -> None:
+        if self._writer is None:
+            path = self._segment_path()
+            self._writer = (path, open(path, 'w'), 0)
+        path, f, count = self._writer
+        line = json.dumps(item, default=str) + '\n'
+        f.write(line)
+        self.spilled_bytes += len(line)
+        if count + 1 >= SEGMENT_SIZE:
+            self._close_writer()
+        else:
+            self._writer = (path, f, count + 1)
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            path, f, _ = self._writer
+            f.close()
+            self._segments.append(path)
+            self._writer = None
+
+    def _load_segment(self) -> None:
+        """Move the oldest spill segment back into memory."""
+        if not self._segments:
+            self._close_writer()
+        if not self._segments:
+            return
+        path = self._segments.popleft()
+        with open(path) as f:
+            self._memory.extend(json.loads(line) for line in f if line.strip())
+        self.spilled_bytes -= path.stat().st_size
+        path.unlink()
+
+    def put(self, items: List[Dict[str, Any]]) -> bool:
+        """Queue events, spilling them to disk if memory is full.
+
+        Returns False if the spill is full too, or the queue has been closed.
+        """
+        with self._cond:
+            if self.closed:
+                return False
+            spilling = bool(self._segments) or self._writer is not None
+            if not spilling and len(self._memory) + len(items) <= self.memory_limit:
+                self._memory.extend(items)
+            elif self.spilled_bytes >= self.max_spill_bytes:
+                return False
+            else:
+                for item in items:
+                    self._spill(item)
+                if self._writer is not None:
+                    self._writer[1].flush()
+            self._cond.notify()
+            return True
+
+    def get_batch(self, size: int, linger: float, timeout: float = 0.5) -> List[Dict[str, Any]]:
+        """Take up to ``size`` events, waiting up to ``linger`` seconds for more once the first is available.
+
+        Returns an empty list if nothing arrived within ``timeout``.
+        """
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while len(batch) < size:
+                if not self._memory:
+                    self._load_segment()
+                if self._memory:
+                    while self._memory and len(batch) < size:
+                        batch.append(self._memory.popleft())
+                    continue
+                if batch and deadline > time.monotonic() + linger:
+                    deadline = time.monotonic() + linger
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return batch
+
+    def close(self) -> None:
+        """Refuse further events, e.g. from requests still in flight when the listener stops."""
+        with self._cond:
+            self.closed = True
+
+    def spill_all(self, items: List[Dict[str, Any]]) -> None:
+        """Write events that were taken off the queue, and everything still in memory, to disk.
+
+        They are written to a segment ordered before the existing ones, so a
+        later run submits them first.
+        """
+        with self._cond:
+            items = items + list(self._memory)
+            self._memory.clear()
+            self._close_writer()
+            if not items:
+                return
+            first = int(self._segments[0].stem) if self._segments else time.time_ns()
+            path = self._segment_path(first - 1)
+            with open(path, 'w') as f:
+                for item in items:
+                    f.write(json.dumps(item, default=str) + '\n')
+            self._segments.appendleft(path)
+            self.spilled_bytes += path.stat().st_size
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._memory)
+
+
+def _is_rejection(error: Exception) -> bool:
+    """Check whether the server refused an event outright, so retrying cannot help."""
+    status = http_status(error)
+    return status is not None and 400 <= status < 500 and status not in (408, 429)
+
+
+class Submitter:
+    """Thread creating queued events in micro-batches of concurrent requests.
+
+    Args:
+        queue: Queue the events are taken from
+        create: Creates one event
+        rejected_path: NDJSON file receiving events the server refused or that ran out of attempts
+        batch_size: Most events per batch
+        linger: Seconds a batch waits for more events after its first one
+        concurrency: Requests in flight per batch
+        max_attempts: Attempts per event before it is rejected
+        dedup: Index of the events created before; duplicates are dropped without a request
+    """
+
+    def __init__(self, queue: SpillQueue, create: Callable[[Dict[str, Any]], Any], rejected_path: Path,
+                 batch_size: int = DEFAULT_BATCH_SIZE, linger: float = DEFAULT_LINGER,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 dedup: Optional[DedupIndex] = None):
+        self.queue = queue
+        self.create = create
+        self.rejected_path = rejected_path
+        self.batch_size = batch_size
+        self.linger = linger
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.dedup = dedup
+        self.stats = {'created': 0, 'retried': 0, 'rejected': 0, 'duplicates': 0}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ingest-submitter', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Finish the batch in flight, close the queue and write whatever is still queued to disk."""
+        self._stop.set()
+        self._thread.join()
+        self.queue.close()
+        self.queue.spill_all([])
+
+    def _reject(self, entries: List[Dict[str, Any]], reason: str) -> None:
+        self.stats['rejected'] += len(entries)
+        warning(f"Rejected {len(entries)} event(s): {reason}")
+        with open(self.rejected_path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps({**entry, 'error': reason}, default=str) + '\n')
+
+    def _requeue(self, entries: List[Dict[str, Any]]) -> None:
+        """Put entries whose outcome is unknown back on disk and forget their dedup claims."""
+        self.queue.spill_all(entries)
+        if self.dedup is not None:
+            for entry in entries:
+                self.dedup.release(entry['event'])
+
+    def submit(self, batch: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Create a batch of queued entries, requeueing or rejecting the ones that fail.
+
+        If handling the batch fails, the entries that were not created,
+        rejected or requeued yet are spilled to disk and the error is raised.
+
+        Returns:
+            How many creates failed, and how many were attempted once duplicates were dropped
+        """
+        if self.dedup is not None:
+            fresh = [entry for entry in batch if self.dedup.claim(entry['event'])]
+            self.stats['duplicates'] += len(batch) - len(fresh)
+            batch = fresh
+        try:
+            results = run_concurrently(lambda entry: self.create(entry['event']), batch, self.concurrency,
+                                       return_exceptions=True)
+        except Exception:
+            self._requeue(batch)
+            raise
+
+        failures = [(entry, result) for entry, result in zip(batch, results) if isinstance(result, Exception)]
+        self.stats['created'] += len(batch) - len(failures)
+        # Failed entries that have been neither rejected nor queued for a retry yet
+        unsettled = [entry for entry, _ in failures]
+        try:
+            retry = []
+            for entry, result in failures:
+                if self.dedup is not None:
+                    self.dedup.release(entry['event'])
+                if _is_rejection(result) or entry['attempts'] + 1 >= self.max_attempts:
+                    self._reject([entry], str(result))
+                    unsettled.remove(entry)
+                else:
+                    retry.append({'event': entry['event'], 'attempts': entry['attempts'] + 1})
+            if self.dedup is not None:
+                # A long-running listener commits every batch, so a crash cannot lose its claims
+                self.dedup.flush()
+            if retry:
+                self.stats['retried'] += len(retry)
+                if not self.queue.put(retry):
+                    self._reject(retry, 'spill queue full')
+        except Exception:
+            self._requeue(unsettled)
+            raise
+        return len(failures), len(batch)
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while not self._stop.is_set():
+            batch = self.queue.get_batch(self.batch_size, self.linger)
+            if not batch:
+                continue
+            try:
+                failed, attempted = self.submit(batch)
+            except Exception as e:
+                warning(f"Batch failed, will retry: {str(e)}")
+                failed = attempted = len(batch)
+            # Back off while nothing gets through, so a down server is not hammered
+            backoff = min(max(backoff * 2, 1.0), MAX_BACKOFF) if failed and failed == attempted else 0.0
+            if backoff:
+                self._stop.wait(backoff)
+
+
+def parse_events(body: bytes, content_type: str) -> List[Any]:
+    """Split a request body into events: a JSON object or array, NDJSON, or plain text lines."""
+    text = body.decode('utf-8', errors='replace')
+    if 'json' in content_type and text.lstrip()[:1] in ('{', '['):
+        try:
+            value = json.loads(text)
+            return value if isinstance(value, list) else [value]
+        except json.JSONDecodeError:
+            pass
+    events: List[Any] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line) if line[0] in '{[' else line)
+        except json.JSONDecodeError:
+            events.append(line)
+    return events
+
+
+def text_event(line: str) -> Dict[str, Any]:
+    """Turn a plain text event, e.g. a syslog line, into record fields."""
+    return {'name': line[:255], 'sourcedata': line}
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('local', 0)
+
+
+def make_server(queue: SpillQueue, address: Union[Tuple[str, int], str], defaults: Dict[str, Any],
+                check: Optional[Callable[[Dict[str, Any]], List[str]]] = None):
+    """Create the HTTP listener queueing posted events.
+
+    POST any path with a JSON object, a JSON array, NDJSON or text lines;
+    the response is 202 with the number of events accepted, 400 if an event
+    is invalid, or 503 with Retry-After when the queue is full. GET /health
+    reports the queue depth.
+
+    Args:
+        queue: Queue receiving the events
+        address: (host, port) to listen on, or the path of a Unix socket
+        defaults: Fields added to events that do not set them (e.g. source)
+        check: Lists the problems with an event, rejecting it before it is queued
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/health':
+                self._reply(200, {'queued': len(queue), 'spilled_bytes': queue.spilled_bytes})
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY:
+                self._reply(413, {'error': f'body larger than {MAX_BODY} bytes'})
+                return
+            events = []
+            for event in parse_events(self.rfile.read(length), self.headers.get('Content-Type', '')):
+                fields = text_event(event) if isinstance(event, str) else event
+                if not isinstance(fields, dict):
+                    self._reply(400, {'error': 'events must be JSON objects or text lines'})
+                    return
+                fields = {**defaults, **fields}
+                problems = check(fields) if check else []
+                if problems:
+                    self._reply(400, {'error': '; '.join(problems)})
+                    return
+                events.append({'event': fields, 'attempts': 0})
+            if events and not queue.put(events):
+                reason = 'ingest shutting down' if queue.closed else 'ingest queue full'
+                self._reply(503, {'error': reason}, {'Retry-After': '5'})
+                return
+            self._reply(202, {'accepted': len(events)})
+
+        def log_message(self, format, *args):
+            pass
+
+    if isinstance(address, str):
+        Path(address).unlink(missing_ok=True)
+        return _UnixHTTPServer(address, Handler)
+    return ThreadingHTTPServer(address, Handler)
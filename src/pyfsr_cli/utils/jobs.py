@@ -0,0 +1,139 @@
+"""Resumable bulk jobs backed by an append-only checkpoint journal."""
+import json
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Set
+
+import click
+
+from .output import warning
+
+JOBS_DIR = 'jobs'
+
+
+class Job:
+    """A bulk operation whose progress is journaled so it can be resumed.
+
+    The journal is a JSON lines file under the state directory. Its first
+    line names the command and the arguments it was started with; every
+    following line is a checkpoint: a unit of work that finished (a page, a
+    record, a file) or the latest value of a cursor such as a byte offset.
+    Entries are appended and flushed as work completes, so replaying the
+    journal after a crash gives exactly the work that was done.
+
+    Use a job as a context manager: the journal is removed when the block
+    finishes cleanly and kept, with a hint on how to resume, when it fails.
+    """
+
+    def __init__(self, path: Path, job_id: str, command: str, args: Dict[str, Any],
+                 completed: Optional[Set[Hashable]] = None, values: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.id = job_id
+        self.command = command
+        self.args = args
+        self.completed = completed or set()
+        self.values = values or {}
+        self._lock = threading.Lock()
+        self._journal = open(path, 'a')
+
+    @classmethod
+    def start(cls, state, command: str, args: Dict[str, Any], resume: Optional[str] = None) -> 'Job':
+        """Start a new job, or reopen the journal of an interrupted one.
+
+        Args:
+            state: CLI state, used to locate the journal directory
+            command: Name of the command running the job (e.g. 'alerts list')
+            args: JSON-serialisable arguments needed to repeat the job
+            resume: ID of a job to resume; its recorded arguments replace ``args``
+        """
+        if resume:
+            return cls._load(state, command, resume)
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        path = state.state_path(JOBS_DIR, f'{job_id}.jsonl')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        job = cls(path, job_id, command, args)
+        job._append({'job': job_id, 'command': command, 'args': args})
+        return job
+
+    @classmethod
+    def _load(cls, state, command: str, job_id: str) -> 'Job':
+        path = state.state_path(JOBS_DIR, f'{job_id}.jsonl')
+        if not path.exists():
+            raise click.UsageError(f"No interrupted job '{job_id}' to resume")
+
+        header: Optional[Dict[str, Any]] = None
+        completed: Set[Hashable] = set()
+        values: Dict[str, Any] = {}
+        good_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                # A crash can leave the last entry half written; drop it and everything after
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                good_size += len(line)
+                if header is None:
+                    header = entry
+                elif 'done' in entry:
+                    completed.add(entry['done'])
+                else:
+                    values[entry['key']] = entry['value']
+
+        if header is None:
+            raise click.UsageError(f"Job '{job_id}' has an empty journal and cannot be resumed")
+        if header.get('command') != command:
+            raise click.UsageError(f"Job '{job_id}' was started by '{header.get('command')}', not '{command}'")
+        with open(path, 'r+b') as f:
+            f.truncate(good_size)
+        return cls(path, job_id, command, header.get('args', {}), completed, values)
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, default=str) + '\n'
+        with self._lock:
+            self._journal.write(line)
+            self._journal.flush()
+
+    def is_done(self, key: Hashable) -> bool:
+        """Check whether a unit of work finished in this or an earlier run."""
+        return key in self.completed
+
+    def done(self, key: Hashable) -> None:
+        """Record that a unit of work finished. Safe to call from worker threads."""
+        with self._lock:
+            self.completed.add(key)
+        self._append({'done': key})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the last checkpointed value of a cursor."""
+        return self.values.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        """Checkpoint the current value of a cursor. Safe to call from worker threads."""
+        with self._lock:
+            self.values[key] = value
+        self._append({'key': key, 'value': value})
+
+    def close(self) -> None:
+        """Close the journal, keeping it for a later resume."""
+        self._journal.close()
+
+    def finish(self) -> None:
+        """Close and remove the journal of a job that completed."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> 'Job':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None or (isinstance(exc, click.exceptions.Exit) and exc.exit_code == 0):
+            self.finish()
+        else:
+            self.close()
+            warning(f"Job {self.id} did not finish; rerun with --resume {self.id} to continue it")
+        return False
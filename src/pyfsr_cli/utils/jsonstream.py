@@ -0,0 +1,171 @@
+"""Incremental parsing of hydra collections straight from the response stream.
+
+A list response is read chunk by chunk and its ``hydra:member`` items are
+decoded and yielded one at a time, so peak memory is one record plus one
+network chunk instead of the whole page. Each item is decoded by the
+standard library's C scanner; only the top-level structure is walked here.
+"""
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+MEMBER_KEY = 'hydra:member'
+
+# Bytes requested from the socket per read
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DECODER = json.JSONDecoder()
+
+
+class _Reader:
+    """Sliding text buffer over a stream of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decode = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk, dropping the consumed text. Returns False at end of stream."""
+        for chunk in self._chunks:
+            if chunk:
+                self.text = self.text[self.pos:] + self._decode.decode(chunk)
+                self.pos = 0
+                return True
+        self.text = self.text[self.pos:] + self._decode.decode(b'', final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, or '' at end of stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of ``chars``."""
+        char = self.peek()
+        if not char or char not in chars:
+            expected = ' or '.join(map(repr, chars))
+            raise ValueError(f"Invalid JSON: expected {expected}, got {char or 'end of input'!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more chunks until it is complete."""
+        self.peek()
+        while True:
+            pending = len(self.text) - self.pos
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # A number that ends the buffer may continue in the next chunk
+                if end < len(self.text) or self.eof or self.text[self.pos] not in '-0123456789':
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read until the pending text doubles so a large record is re-scanned only a few times
+            while len(self.text) - self.pos < 2 * pending + 1 and self.fill():
+                pass
+
+
+def _iter_array(reader: _Reader) -> Iterator[Any]:
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+
+class CollectionStream:
+    """A hydra collection parsed lazily from a stream of byte chunks.
+
+    Iterating yields the members one by one. The collection's other
+    top-level fields (hydra:totalItems, hydra:view, ...) are collected in
+    ``fields`` as they are parsed, so they are complete once iteration ends.
+    A body that is a JSON array yields its items; any other object yields
+    nothing and ends up in ``fields`` with ``is_collection`` False.
+    A stream can be iterated once.
+
+    Args:
+        chunks: Raw response body chunks
+        member_key: Key of the member array
+        close: Called when iteration ends, e.g. to release the connection
+    """
+
+    def __init__(self, chunks: Iterable[bytes], member_key: str = MEMBER_KEY,
+                 close: Optional[Callable[[], None]] = None):
+        self.member_key = member_key
+        self.fields: Dict[str, Any] = {}
+        self.is_collection = False
+        self._reader = _Reader(chunks)
+        self._close = close
+
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            yield from self._iter_items()
+        finally:
+            if self._close:
+                self._close()
+
+    def _iter_items(self) -> Iterator[Any]:
+        reader = self._reader
+        if reader.peek() == '[':
+            self.is_collection = True
+            yield from _iter_array(reader)
+            return
+
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.pos += 1
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == self.member_key and reader.peek() == '[':
+                self.is_collection = True
+                yield from _iter_array(reader)
+            else:
+                self.fields[key] = reader.value()
+            if reader.expect(',}') == '}':
+                return
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a top-level field; only reliable once the members have been consumed."""
+        return self.fields.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Consume the stream into an ordinary collection dict."""
+        members = list(self)
+        return {**self.fields, self.member_key: members}
+
+
+def stream_collection(client, endpoint: str, params: Optional[Dict[str, Any]] = None) -> CollectionStream:
+    """GET a collection and parse its members as the response body arrives.
+
+    Args:
+        client: FortiSOAR client
+        endpoint: Collection endpoint (e.g. /api/3/alerts)
+        params: Query parameters
+    """
+    response = client.request('GET', endpoint, params=params, stream=True)
+    return CollectionStream(response.iter_content(CHUNK_SIZE), close=response.close)
+
+
+def iter_members(collection: Any) -> Iterator[Any]:
+    """Iterate the members of a collection, whether streamed or already decoded."""
+    if isinstance(collection, CollectionStream):
+        return iter(collection)
+    return iter(collection.get(MEMBER_KEY, []))
@@ -0,0 +1,205 @@
+"""Local SQLite mirror of FortiSOAR modules for offline querying."""
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .output import process_value
+from .progress import ProgressReporter
+from .query import DEFAULT_PAGE_SIZE, iter_keyset, record_key
+
+MIRROR_KEY = ['modifyDate', 'uuid']
+
+# Fields stored in their own indexed columns; everything else is only in the JSON document
+INDEXED_FIELDS = ['severity', 'status', 'source', 'createDate', 'modifyDate']
+
+_FIELD_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _check_name(name: str) -> str:
+    """Ensure a module or field name is safe to interpolate into SQL."""
+    if not _FIELD_RE.match(name):
+        raise ValueError(f"Invalid name: {name!r}")
+    return name
+
+
+class Mirror:
+    """SQLite replica of selected modules, refreshed incrementally by modifyDate."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS mirror_meta ('
+            'module TEXT PRIMARY KEY, mark TEXT, refreshed_at REAL)'
+        )
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self.conn.close()
+
+    def _ensure_table(self, module: str) -> str:
+        table = f"records_{_check_name(module)}"
+        columns = ', '.join(f'"{field}"' for field in INDEXED_FIELDS)
+        self.conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            f'uuid TEXT PRIMARY KEY, {columns}, data TEXT NOT NULL)'
+        )
+        for field in INDEXED_FIELDS:
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{field} ON {table} ("{field}")')
+        return table
+
+    def _upsert(self, table: str, records: List[Dict[str, Any]]) -> None:
+        columns = ['uuid'] + INDEXED_FIELDS + ['data']
+        placeholders = ', '.join('?' for _ in columns)
+        column_list = ', '.join(f'"{c}"' for c in columns)
+        rows = [
+            [record.get('uuid')]
+            + [process_value(record.get(field)) for field in INDEXED_FIELDS]
+            + [json.dumps(record)]
+            for record in records
+        ]
+        self.conn.executemany(
+            f'INSERT OR REPLACE INTO {table} ({column_list}) VALUES ({placeholders})', rows
+        )
+
+    def refresh(self, client, module: str, page_size: int = DEFAULT_PAGE_SIZE,
+                full: bool = False, progress: Optional[ProgressReporter] = None) -> int:
+        """Fetch records changed since the last refresh and upsert them.
+
+        Args:
+            client: FortiSOAR client
+            module: Module to mirror
+            page_size: Records per query
+            full: Ignore the saved mark, refetch every record and drop the rows that were not refetched
+            progress: Reporter advanced as records are fetched
+
+        Returns:
+            Number of records written
+        """
+        table = self._ensure_table(module)
+        row = self.conn.execute('SELECT mark FROM mirror_meta WHERE module = ?', (module,)).fetchone()
+        mark = json.loads(row[0]) if row and row[0] and not full else None
+
+        written = 0
+        seen = set()
+        batch: List[Dict[str, Any]] = []
+        records = iter_keyset(client, module, MIRROR_KEY, page_size=page_size, after=mark)
+        for record in progress.track(records) if progress else records:
+            seen.add(record.get('uuid'))
+            batch.append(record)
+            if len(batch) >= page_size:
+                written += self._commit_batch(module, table, batch)
+                batch = []
+        if batch:
+            written += self._commit_batch(module, table, batch)
+        if full:
+            self._delete_missing(table, seen)
+
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO mirror_meta (module, mark, refreshed_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(module) DO UPDATE SET refreshed_at = excluded.refreshed_at',
+                (module, None, time.time())
+            )
+        return written
+
+    def prune(self, client, module: str, page_size: int = DEFAULT_PAGE_SIZE) -> int:
+        """Delete mirrored records that no longer exist on the server.
+
+        Deletions leave no trace in modifyDate, so this scans every uuid of
+        the module and drops the rows that are missing from it.
+
+        Returns:
+            Number of records removed
+        """
+        table = self._ensure_table(module)
+        live = (record['uuid'] for record in iter_keyset(client, module, ['uuid'], page_size=page_size,
+                                                          select=['uuid']))
+        return self._delete_missing(table, live)
+
+    def _delete_missing(self, table: str, live: Iterable[str]) -> int:
+        with self.conn:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS live_uuids (uuid TEXT PRIMARY KEY)')
+            self.conn.execute('DELETE FROM live_uuids')
+            self.conn.executemany('INSERT OR IGNORE INTO live_uuids VALUES (?)', ((uuid,) for uuid in live))
+            removed = self.conn.execute(
+                f'DELETE FROM {table} WHERE uuid NOT IN (SELECT uuid FROM live_uuids)').rowcount
+            self.conn.execute('DELETE FROM live_uuids')
+        return removed
+
+    def _commit_batch(self, module: str, table: str, batch: List[Dict[str, Any]]) -> int:
+        # Store the mark in the same transaction as the rows so the two never disagree
+        mark = json.dumps(record_key(batch[-1], MIRROR_KEY))
+        with self.conn:
+            self._upsert(table, batch)
+            self.conn.execute(
+                'INSERT INTO mirror_meta (module, mark, refreshed_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(module) DO UPDATE SET mark = excluded.mark',
+                (module, mark, time.time())
+            )
+        return len(batch)
+
+    def query(self, module: str, filters: Optional[Dict[str, Any]] = None,
+              sort: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Query mirrored records.
+
+        Args:
+            module: Mirrored module
+            filters: Field equality filters; indexed fields use their column,
+                other fields are matched inside the JSON document
+            sort: Field to sort by, prefixed with '-' for descending order
+            limit: Maximum number of records to return
+        """
+        table = self._ensure_table(module)
+        where, params = self._where(filters)
+        sql = f'SELECT data FROM {table}{where}'
+        if sort:
+            direction = 'DESC' if sort.startswith('-') else 'ASC'
+            sql += f' ORDER BY {self._column(sort.lstrip("-"))} {direction}'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def count(self, module: str, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Count mirrored records matching the filters."""
+        table = self._ensure_table(module)
+        where, params = self._where(filters)
+        return self.conn.execute(f'SELECT COUNT(*) FROM {table}{where}', params).fetchone()[0]
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Describe every mirrored module."""
+        rows = self.conn.execute('SELECT module, refreshed_at FROM mirror_meta ORDER BY module').fetchall()
+        result = []
+        for module, refreshed_at in rows:
+            result.append({
+                'module': module,
+                'records': self.count(module),
+                'refreshed_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(refreshed_at)),
+            })
+        return result
+
+    @staticmethod
+    def _column(field: str) -> str:
+        if field in INDEXED_FIELDS or field == 'uuid':
+            return f'"{field}"'
+        return f"json_extract(data, '$.{_check_name(field)}')"
+
+    def _where(self, filters: Optional[Dict[str, Any]]) -> tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for field, value in (filters or {}).items():
+            if value is None:
+                continue
+            clauses.append(f'{self._column(field)} = ?')
+            params.append(value)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ''), params
+
+
+def open_mirror(state, db: Optional[str] = None) -> Mirror:
+    """Open the mirror database given on the command line, or the server's default one under the state directory."""
+    return Mirror(Path(db) if db else state.state_path('mirror.db'))
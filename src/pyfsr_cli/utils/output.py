@@ -1,12 +1,16 @@
 """Output formatting utilities for PyFSR CLI."""
 import json
 import warnings
-from typing import Any, List, Optional
+from typing import Any, Iterator, List, Optional
 
+import click
 from rich.console import Console
-from rich.table import Table
 
 console = Console()
+# Status messages go to stderr so they never mix with data written to stdout
+err_console = Console(stderr=True)
+
+OUTPUT_FORMATS = ['json', 'ndjson', 'table', 'yaml', 'csv', 'tsv', 'parquet', 'arrow']
 
 
 def custom_ssl_warning(*args: Any) -> None:
@@ -17,90 +21,98 @@ def custom_ssl_warning(*args: Any) -> None:
 warnings.showwarning = custom_ssl_warning
 
 
+def process_value(value: Any) -> Any:
+    """Process individual values to handle specific transformations."""
+    if isinstance(value, dict):
+        # Handle dictionaries with @type == "Person"
+        if value.get("@type") == "Person":
+            firstname = value.get("firstname", "")
+            lastname = value.get("lastname", "")
+            return f"{firstname} {lastname}".strip()
+        # Handle dictionaries with itemValue
+        if "itemValue" in value:
+            return value["itemValue"]
+    return value
+
+
 def format_output(data: Any, format: str = 'json', table_columns: Optional[List[str]] = None,
-                  view: str = 'simple') -> None:
+                  view: str = 'simple', workers: int = 0) -> None:
     """Format and display output data.
 
     Args:
-        data: Data to display
-        format: Output format ('json', 'table', 'yaml')
-        table_columns: Column names for table format
+        data: Data to display; a record iterator is consumed lazily by the streaming formats
+            ('ndjson', 'yaml', 'table', 'csv', 'tsv', 'parquet', 'arrow') and collected for the others
+        format: Output format ('json', 'ndjson', 'table', 'yaml', 'csv', 'tsv', 'parquet', 'arrow')
+        table_columns: Columns to display (dotted paths are resolved against each record)
         view: Output view ('simple' removes null/empty values, 'full' shows all fields)
+        workers: Processes that transform the records of an iterator; 0 transforms them while writing
     """
+    from .transform import RecordTransformer
+
+    transform = RecordTransformer.for_view(view, table_columns, format)
+    if isinstance(data, dict):
+        records = iter([transform(data)])
+    elif isinstance(data, Iterator):
+        # Keep fetching the next records while these are transformed and written
+        from .pipeline import pipeline
+        records = pipeline(data, transform, workers)
+    elif isinstance(data, list):
+        records = transform.stream(data)
+    else:
+        records = None
 
-    def process_value(value):
-        """Process individual values to handle specific transformations."""
-        if isinstance(value, dict):
-            # Handle dictionaries with @type == "Person"
-            if value.get("@type") == "Person":
-                firstname = value.get("firstname", "")
-                lastname = value.get("lastname", "")
-                return f"{firstname} {lastname}".strip()
-            # Handle dictionaries with itemValue
-            if "itemValue" in value:
-                return value["itemValue"]
-        return value
-
-    def filter_data(data):
-        """Remove null/empty values and process special cases if view is 'simple'."""
-        if view == 'simple':
-            if isinstance(data, list):
-                return [
-                    {
-                        k: process_value(v)
-                        for k, v in item.items() if v not in [None, '', []]
-                    }
-                    for item in data
-                ]
-            elif isinstance(data, dict):
-                return {
-                    k: process_value(v)
-                    for k, v in data.items() if v not in [None, '', []]
-                }
-        return data
-
-    # Apply filtering
-    data = filter_data(data)
+    if records is not None:
+        if format == 'ndjson':
+            for record in records:
+                emit_ndjson(record)
+            return
 
-    if format == 'json':
-        console.print(json.dumps(data, indent=2))
-    elif format == 'table' and isinstance(data, (list, dict)):
-        table = Table()
+        if format in ('csv', 'tsv'):
+            from .delimited import write_delimited
+            write_delimited(records, ',' if format == 'csv' else '\t', table_columns)
+            return
 
-        # If data is a dict, convert to list
-        if isinstance(data, dict):
-            data = [data]
+        if format in ('parquet', 'arrow'):
+            from .columnar import write_columnar
+            write_columnar(records, format)
+            return
 
-        # Get columns from first item if not provided
-        if not table_columns and data:
-            if isinstance(data[0], dict):
-                table_columns = list(data[0].keys())
+        if format == 'yaml':
+            from .yamlio import write_yaml
+            write_yaml(records)
+            return
 
-        # Add columns
-        if table_columns:
-            for column in table_columns:
-                table.add_column(column)
+        if format == 'table':
+            from .table import render_table
+            render_table(records, table_columns)
+            return
 
-            # Add rows
-            for item in data:
-                if isinstance(item, dict):
-                    table.add_row(*[str(item.get(col, '')) for col in table_columns])
+        data = next(records) if isinstance(data, dict) else list(records)
 
-        console.print(table)
+    if format == 'json':
+        console.print(json.dumps(data, indent=2))
+    elif format == 'yaml':
+        from .yamlio import write_yaml
+        write_yaml([data])
     else:
         console.print(str(data))
 
 
+def emit_ndjson(record: Any) -> None:
+    """Write a single record as one line of newline-delimited JSON."""
+    click.echo(json.dumps(record, default=str))
+
+
 def error(message: str) -> None:
     """Display error message."""
-    console.print(f"[red]Error:[/red] {message}")
+    err_console.print(f"[red]Error:[/red] {message}")
 
 
 def success(message: str) -> None:
     """Display success message."""
-    console.print(f"[green]{message}[/green]")
+    err_console.print(f"[green]{message}[/green]")
 
 
 def warning(message: str) -> None:
     """Display warning message."""
-    console.print(f"[yellow]Warning:[/yellow] {message}")
+    err_console.print(f"[yellow]Warning:[/yellow] {message}")
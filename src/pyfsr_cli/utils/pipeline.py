@@ -0,0 +1,188 @@
+"""Pipelined record processing: fetch, transform and write stages joined by bounded queues.
+
+Records are fetched on a background thread while the caller transforms and
+writes the ones already received. The queue between them holds at most
+``queue_size`` records, so memory stays bounded and a slow writer pauses
+the fetching instead of piling records up. The transform stage runs in the
+writer's thread or, for heavy flattening, in a process pool fed with chunks
+of records.
+"""
+import functools
+import multiprocessing
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Iterable, Iterator, List, Optional, Union
+
+# Records buffered between the fetching thread and the writer
+DEFAULT_QUEUE_SIZE = 1000
+
+# Records per task sent to a transform process
+DEFAULT_CHUNK_SIZE = 500
+
+# Seconds a blocked producer waits before checking whether the consumer went away
+_PUT_TIMEOUT = 0.1
+
+_END = object()
+_local = threading.local()
+
+
+class _Barrier:
+    """A callback travelling with the records, run once every record before it was written."""
+    __slots__ = ('func',)
+
+    def __init__(self, func: Callable[[], Any]):
+        self.func = func
+
+
+class _Failure:
+    """An exception raised by the source, re-raised in the consumer."""
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class _Stopped(Exception):
+    """Raised in the fetching thread when the consumer stopped early."""
+
+
+def after_output(func: Callable[..., Any]) -> Callable[..., None]:
+    """Wrap a callback so that, in a pipeline, it runs only after the records before it were written.
+
+    Used for checkpoints: a source calls the wrapper from the fetching thread
+    as soon as a page is complete, but ``func`` runs when the writer has
+    consumed that page. Outside a pipeline ``func`` is called straight away.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs) -> None:
+        put = getattr(_local, 'put', None)
+        if put is None:
+            func(*args, **kwargs)
+        else:
+            put(_Barrier(functools.partial(func, *args, **kwargs)))
+
+    return wrapper
+
+
+def _prefetch(items: Iterable[Any], maxsize: int) -> Iterator[Any]:
+    """Iterate ``items`` on a background thread, buffering at most ``maxsize`` ahead of the consumer."""
+    buffer: queue.Queue = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item: Any) -> None:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped()
+
+    def produce() -> None:
+        _local.put = put
+        source = iter(items)
+        try:
+            for item in source:
+                put(item)
+            put(_END)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            try:
+                put(_Failure(e))
+            except _Stopped:
+                pass
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=produce, name='pipeline-fetch', daemon=True).start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+
+
+def _apply(func: Callable[[Any], Any], chunk: List[Any]) -> List[Any]:
+    return [func(item) for item in chunk]
+
+
+def _transform_in_pool(func: Callable[[Any], Any], items: Iterator[Any], workers: int,
+                       chunk_size: int) -> Iterator[Any]:
+    """Apply a picklable function to items in worker processes, yielding results in order."""
+    # Spawned workers start clean instead of inheriting the fetching thread mid-request
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    pending: Deque[Union[Future, _Barrier]] = deque()
+    chunk: List[Any] = []
+
+    def submit() -> None:
+        nonlocal chunk
+        if chunk:
+            pending.append(pool.submit(_apply, func, chunk))
+            chunk = []
+
+    def ready() -> Iterator[Any]:
+        # Hand on finished work in order; wait for the oldest chunk once enough are queued
+        while pending and (isinstance(pending[0], _Barrier) or pending[0].done() or len(pending) > 2 * workers):
+            head = pending.popleft()
+            if isinstance(head, _Barrier):
+                yield head
+            else:
+                yield from head.result()
+
+    try:
+        for item in items:
+            if isinstance(item, _Barrier):
+                submit()
+                pending.append(item)
+            else:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    submit()
+            yield from ready()
+        submit()
+        while pending:
+            head = pending.popleft()
+            if isinstance(head, _Barrier):
+                yield head
+            else:
+                yield from head.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def pipeline(records: Iterable[Any], transform: Optional[Callable[[Any], Any]] = None, workers: int = 0,
+             queue_size: int = DEFAULT_QUEUE_SIZE, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Any]:
+    """Fetch records on a background thread and transform them on the way to the caller.
+
+    Args:
+        records: Record source, typically a generator that pages through the API
+        transform: Applied to each record; must be picklable when ``workers`` is set
+        workers: Processes to transform in; 0 transforms in the caller's thread
+        queue_size: Most records fetched ahead of the caller
+        chunk_size: Records per task sent to a transform process
+
+    Returns:
+        Iterator over the transformed records, in source order
+    """
+    items = _prefetch(records, queue_size)
+    if transform is not None:
+        if workers > 0:
+            items = _transform_in_pool(transform, items, workers, chunk_size)
+        else:
+            items = (item if isinstance(item, _Barrier) else transform(item) for item in items)
+
+    for item in items:
+        if isinstance(item, _Barrier):
+            item.func()
+        else:
+            yield item
@@ -0,0 +1,200 @@
+"""Progress reporting for bulk operations.
+
+Progress always goes to stderr so it never mixes with the records written
+to stdout. On a terminal it is a Rich progress bar refreshed from its own
+thread; otherwise it is a log line every few seconds. Nothing is shown for
+operations that finish within a second.
+"""
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+import click
+from rich.console import Console
+from rich.filesize import decimal
+from rich.progress import BarColumn, Progress, ProgressColumn, Task, TextColumn, TimeRemainingColumn
+from rich.text import Text
+
+from .output import err_console
+
+# Seconds an operation runs before progress is shown, so quick commands stay quiet
+DEFAULT_DELAY = 1.0
+
+# Seconds between log lines when stderr is not a terminal
+DEFAULT_LOG_INTERVAL = 10.0
+
+# Seconds between updates pushed to the progress bar
+_UPDATE_INTERVAL = 0.1
+
+T = TypeVar('T')
+
+
+def format_amount(amount: float, unit: str) -> str:
+    """Format a count of records, or a size when the unit is bytes."""
+    return decimal(int(amount)) if unit == 'bytes' else f"{amount:,.0f}"
+
+
+def format_rate(rate: float, unit: str) -> str:
+    """Format a throughput as records/s or MB/s."""
+    return f"{decimal(int(rate))}/s" if unit == 'bytes' else f"{rate:,.0f} {unit}/s"
+
+
+class _AmountColumn(ProgressColumn):
+    def render(self, task: Task) -> Text:
+        unit = task.fields['unit']
+        done = format_amount(task.completed, unit)
+        if task.total is None:
+            return Text(f"{done} {unit if unit != 'bytes' else ''}".rstrip())
+        return Text(f"{done}/{format_amount(task.total, unit)}")
+
+
+class _RateColumn(ProgressColumn):
+    def render(self, task: Task) -> Text:
+        speed = task.finished_speed or task.speed
+        return Text(format_rate(speed, task.fields['unit']) if speed else '', style='progress.data.speed')
+
+
+class _InFlightColumn(ProgressColumn):
+    def render(self, task: Task) -> Text:
+        in_flight = task.fields['in_flight']
+        return Text(f"{in_flight} in flight" if in_flight else '', style='dim')
+
+
+class ProgressReporter:
+    """Track the progress of one bulk operation and report it on stderr.
+
+    All methods are safe to call from worker threads.
+
+    Args:
+        description: Short label for the operation (e.g. 'Downloading')
+        total: Expected amount of work, if known; can be set or grown later
+        unit: 'records', 'files', 'bytes' or any other plural noun
+        enabled: Report anything at all
+        console: Console the bar is drawn on
+        delay: Seconds before anything is shown
+        log_interval: Seconds between log lines when the console is not a terminal
+    """
+
+    def __init__(self, description: str, total: Optional[float] = None, unit: str = 'records',
+                 enabled: bool = True, console: Console = err_console, delay: float = DEFAULT_DELAY,
+                 log_interval: float = DEFAULT_LOG_INTERVAL):
+        self.description = description
+        self.total = total
+        self.unit = unit
+        self.completed = 0
+        self.in_flight = 0
+        self.enabled = enabled
+        self.console = console
+        self.delay = delay
+        self.log_interval = log_interval
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_update = self._last_log = self._started
+        self._bar: Optional[Progress] = None
+        self._task = None
+        self._reported = False
+        self._closed = False
+
+    def set_total(self, total: Optional[float]) -> None:
+        """Set the expected amount of work."""
+        self.total = total
+        self._update()
+
+    def add_total(self, amount: float) -> None:
+        """Grow the expected amount of work, e.g. as file sizes become known."""
+        with self._lock:
+            self.total = (self.total or 0) + amount
+        self._update()
+
+    def advance(self, amount: float = 1) -> None:
+        """Record finished work."""
+        with self._lock:
+            self.completed += amount
+        self._update()
+
+    def wrap(self, func: Callable[[T], Any], size: Optional[Callable[[T], float]] = None) -> Callable[[T], Any]:
+        """Wrap a worker function so calls count as in flight and finished calls advance progress.
+
+        Failed calls still advance progress, so the ETA covers the work that is left.
+        """
+        def wrapper(item: T) -> Any:
+            with self._lock:
+                self.in_flight += 1
+            try:
+                return func(item)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self.advance(size(item) if size else 1)
+
+        return wrapper
+
+    def track(self, items: Iterable[T]) -> Iterator[T]:
+        """Yield items, advancing progress by one for each."""
+        for item in items:
+            yield item
+            self.advance()
+
+    def _update(self) -> None:
+        if not self.enabled or self._closed:
+            return
+        now = time.monotonic()
+        if now - self._last_update < _UPDATE_INTERVAL or now - self._started < self.delay:
+            return
+        self._last_update = now
+
+        if self.console.is_terminal:
+            with self._lock:
+                if self._closed:
+                    return
+                if self._bar is None:
+                    self._bar = Progress(TextColumn('{task.description}'), BarColumn(), _AmountColumn(),
+                                         _RateColumn(), TimeRemainingColumn(), _InFlightColumn(),
+                                         console=self.console, transient=True)
+                    self._task = self._bar.add_task(self.description, total=self.total, unit=self.unit,
+                                                    in_flight=0)
+                    self._bar.start()
+                bar = self._bar
+            bar.update(self._task, completed=self.completed, total=self.total, in_flight=self.in_flight)
+        elif now - self._last_log >= self.log_interval:
+            self._last_log = now
+            self._reported = True
+            self.console.print(self.status_line(now), highlight=False, soft_wrap=True)
+
+    def status_line(self, now: Optional[float] = None) -> str:
+        """Describe progress so far as one line of text."""
+        elapsed = max((now or time.monotonic()) - self._started, 1e-9)
+        rate = self.completed / elapsed
+        done = format_amount(self.completed, self.unit)
+        if self.total:
+            done = f"{done}/{format_amount(self.total, self.unit)}"
+        parts = [f"{self.description}: {done}{'' if self.unit == 'bytes' else ' ' + self.unit}",
+                 format_rate(rate, self.unit)]
+        if self.total and rate:
+            remaining = max(self.total - self.completed, 0) / rate
+            parts.append(f"ETA {time.strftime('%H:%M:%S', time.gmtime(remaining))}")
+        if self.in_flight:
+            parts.append(f"{self.in_flight} in flight")
+        return ', '.join(parts)
+
+    def close(self) -> None:
+        """Remove the progress bar, or log a final line if progress was logged."""
+        with self._lock:
+            self._closed = True
+            bar, self._bar = self._bar, None
+        if bar is not None:
+            bar.stop()
+        elif self._reported:
+            self.console.print(self.status_line(), highlight=False, soft_wrap=True)
+
+    def __enter__(self) -> 'ProgressReporter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def progress_for(ctx: click.Context, description: str, total: Optional[float] = None,
+                 unit: str = 'records') -> ProgressReporter:
+    """Create a progress reporter for a command, honouring --no-progress."""
+    return ProgressReporter(description, total, unit, enabled=ctx.obj.show_progress)
@@ -0,0 +1,156 @@
+"""Query API helpers for PyFSR CLI."""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .concurrency import run_concurrently
+from .jsonstream import CollectionStream, iter_members
+
+DEFAULT_PAGE_SIZE = 100
+
+# 'offset' pages with $limit/$page; 'keyset' asks the query API for records after the last key seen
+PAGING_STRATEGIES = ['offset', 'keyset']
+
+
+def build_filter(field: str, operator: str, value: Any) -> Dict[str, Any]:
+    """Build a single query API filter clause."""
+    return {'field': field, 'operator': operator, 'value': value}
+
+
+def build_query(filters: Optional[List[Dict[str, Any]]] = None, logic: str = 'AND',
+                sort: Optional[Sequence[str]] = None, limit: Optional[int] = None,
+                page: Optional[int] = None, select: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Build a query API request body.
+
+    Args:
+        filters: Filter clauses or nested filter groups
+        logic: Logic used to combine the top-level filters ('AND' or 'OR')
+        sort: Field names to sort by, ascending
+        limit: Page size
+        page: 1-based page number
+        select: Restrict returned fields to these names
+    """
+    body: Dict[str, Any] = {'logic': logic, 'filters': filters or []}
+    if sort:
+        body['sort'] = [{'field': field, 'direction': 'ASC'} for field in sort]
+    if limit is not None:
+        body['limit'] = limit
+    if page is not None:
+        body['page'] = page
+    if select:
+        body['__selectFields'] = list(select)
+    return body
+
+
+def after_key_filter(key_fields: Sequence[str], key_values: Sequence[Any]) -> Dict[str, Any]:
+    """Build a filter group matching records strictly after a compound sort key.
+
+    ``(a, b) > (x, y)`` expands to ``a > x OR (a == x AND b > y)``.
+    """
+    clauses = []
+    for i, field in enumerate(key_fields):
+        group = [build_filter(f, 'eq', v) for f, v in zip(key_fields[:i], key_values[:i])]
+        group.append(build_filter(field, 'gt', key_values[i]))
+        clauses.append(group[0] if len(group) == 1 else {'logic': 'AND', 'filters': group})
+    return {'logic': 'OR', 'filters': clauses}
+
+
+def record_key(record: Dict[str, Any], key_fields: Sequence[str]) -> List[Any]:
+    """Extract the sort key of a record."""
+    return [record.get(field) for field in key_fields]
+
+
+def iter_keyset(client, module: str, key_fields: Sequence[str],
+                filters: Optional[List[Dict[str, Any]]] = None,
+                page_size: int = DEFAULT_PAGE_SIZE,
+                after: Optional[Sequence[Any]] = None,
+                select: Optional[Sequence[str]] = None,
+                on_page: Optional[Callable[[List[Any]], None]] = None,
+                on_total: Optional[Callable[[int], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records of a module in key order, one query per page.
+
+    Each page asks for records after the last key seen instead of using an
+    offset, so the query stays cheap however deep the scan goes.
+
+    Args:
+        client: FortiSOAR client
+        module: Module name (e.g. 'alerts')
+        key_fields: Unique, sortable compound key (e.g. ['modifyDate', 'uuid'])
+        filters: Additional filter clauses
+        page_size: Records per query
+        after: Resume strictly after this key
+        select: Restrict returned fields to these names
+        on_page: Called with the key of a page's last record once all of its records have been consumed
+        on_total: Called with the first page's hydra:totalItems, if the server reports it
+    """
+    first = True
+    while True:
+        page_filters = list(filters or [])
+        if after is not None:
+            page_filters.append(after_key_filter(key_fields, after))
+
+        body = build_query(page_filters, sort=key_fields, limit=page_size, select=select)
+        collection = client.query(module, body)
+        if on_total and first and collection.get('hydra:totalItems') is not None:
+            on_total(collection['hydra:totalItems'])
+        first = False
+        members = collection.get('hydra:member', [])
+        yield from members
+
+        if members:
+            after = record_key(members[-1], key_fields)
+            if on_page:
+                on_page(after)
+        if len(members) < page_size:
+            return
+
+
+def iter_offset(fetch_page: Callable[[Dict[str, Any]], Dict[str, Any]],
+                params: Optional[Dict[str, Any]] = None,
+                page_size: int = DEFAULT_PAGE_SIZE,
+                concurrency: int = 1,
+                start_page: int = 1,
+                on_page: Optional[Callable[[int], None]] = None,
+                on_total: Optional[Callable[[int], None]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield records page by page using ``$limit``/``$page`` offset paging.
+
+    Pages are only requested as the caller consumes records, so streaming
+    consumers can start writing before the last page has been fetched.
+    ``fetch_page`` may return a CollectionStream; with a concurrency of 1 its
+    members are then yielded straight from the socket, one record at a time.
+
+    Args:
+        fetch_page: Callable taking query parameters and returning a hydra collection
+        params: Query parameters sent with every page
+        page_size: Records per page
+        concurrency: Number of pages fetched at once; records are still yielded in page order
+        start_page: First page to fetch, for resuming an earlier run
+        on_page: Called with each page number once all of its records have been consumed
+        on_total: Called with the first page's hydra:totalItems, if the server reports it
+    """
+    def fetch(page: int) -> Any:
+        return fetch_page({**(params or {}), '$limit': page_size, '$page': page})
+
+    def fetch_decoded(page: int) -> Dict[str, Any]:
+        # Pages fetched ahead of the consumer are decoded in full on the worker thread
+        collection = fetch(page)
+        return collection.to_dict() if isinstance(collection, CollectionStream) else collection
+
+    page = start_page
+    while True:
+        pages = range(page, page + concurrency)
+        if concurrency > 1:
+            collections = run_concurrently(fetch_decoded, pages, concurrency)
+        else:
+            collections = [fetch(page)]
+        for number, collection in zip(pages, collections):
+            count = 0
+            for member in iter_members(collection):
+                count += 1
+                yield member
+            if on_total and number == start_page and collection.get('hydra:totalItems') is not None:
+                on_total(collection.get('hydra:totalItems'))
+            if on_page:
+                on_page(number)
+
+            if count < page_size:
+                return
+        page += concurrency
@@ -0,0 +1,175 @@
+"""Cached module metadata for validating payloads and column selections locally.
+
+The fields of a module and the values of its picklists are fetched from the
+model metadata API once and kept in the state directory for ``ttl``
+seconds, so mistakes such as an unknown column or an invalid picklist value
+are caught before any request is sent.
+"""
+import difflib
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import click
+
+from .concurrency import run_concurrently
+from .output import warning
+from .state import load_state, save_state
+
+SCHEMA_DIR = 'schema'
+
+# Seconds a cached schema is trusted before it is fetched again
+DEFAULT_SCHEMA_TTL = 24 * 60 * 60
+
+# Fields every record carries that are not module attributes
+META_FIELDS = {'@id', '@type', '@context', 'id', 'uuid', '_server',
+               'createDate', 'createUser', 'modifyDate', 'modifyUser'}
+
+_PICKLIST_IRI = '/api/3/picklists/'
+
+# Attribute types holding references to other records, which list output flattens to display strings
+REFERENCE_TYPES = {'picklists', 'lookup', 'manyToMany', 'manyToOne', 'oneToMany'}
+
+
+class ModuleSchema:
+    """Fields and picklist values of one module.
+
+    Args:
+        module: Module name (e.g. 'alerts')
+        fields: Field name to its type and, for picklist fields, the name of its list
+        picklists: Picklist name to its item values
+        fetched_at: Epoch time the metadata was fetched
+    """
+
+    def __init__(self, module: str, fields: Dict[str, Dict[str, Any]], picklists: Dict[str, List[str]],
+                 fetched_at: float):
+        self.module = module
+        self.fields = fields
+        self.picklists = picklists
+        self.fetched_at = fetched_at
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ModuleSchema':
+        return cls(data['module'], data['fields'], data['picklists'], data['fetched_at'])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'module': self.module, 'fields': self.fields, 'picklists': self.picklists,
+                'fetched_at': self.fetched_at}
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Check whether the schema was fetched less than ``ttl`` seconds ago."""
+        return time.time() - self.fetched_at < ttl
+
+    def is_reference(self, name: str) -> bool:
+        """Check whether a field holds a picklist item or another record rather than a plain value."""
+        field = self.fields.get(name) or {}
+        return bool(field.get('picklist')) or field.get('type') in REFERENCE_TYPES
+
+    def _unknown(self, name: str) -> Optional[str]:
+        if name in self.fields or name in META_FIELDS:
+            return None
+        close = difflib.get_close_matches(name, self.fields, n=1)
+        hint = f"; did you mean '{close[0]}'?" if close else ''
+        return f"{self.module} has no field '{name}'{hint}"
+
+    def check_record(self, record: Dict[str, Any]) -> List[str]:
+        """List the problems with a create or update payload: unknown fields and invalid picklist values."""
+        problems = []
+        for name, value in record.items():
+            unknown = self._unknown(name)
+            if unknown:
+                problems.append(unknown)
+                continue
+            values = self.picklists.get((self.fields.get(name) or {}).get('picklist'))
+            if values is None or value is None:
+                continue
+            item = value.get('itemValue') if isinstance(value, dict) else value
+            if not isinstance(item, str) or item.startswith(_PICKLIST_IRI) or item in values:
+                continue
+            close = difflib.get_close_matches(item, values, n=1)
+            hint = f"did you mean '{close[0]}'?" if close else f"expected one of: {', '.join(values)}"
+            problems.append(f"'{item}' is not a valid {name}; {hint}")
+        return problems
+
+    def check_columns(self, columns: Iterable[str]) -> List[str]:
+        """List the columns, possibly dotted paths, whose first field the module does not have."""
+        return [problem for problem in (self._unknown(column.split('.', 1)[0]) for column in columns) if problem]
+
+
+def _picklist_name(attribute: Dict[str, Any]) -> Optional[str]:
+    """Get the list a picklist attribute draws its values from."""
+    source = attribute.get('dataSource') or {}
+    if source.get('model') != 'picklists':
+        return None
+    for clause in (source.get('query') or {}).get('filters', []):
+        if clause.get('field') in ('listName__name', 'listName'):
+            return clause.get('value')
+    return None
+
+
+def fetch_schema(client, module: str) -> ModuleSchema:
+    """Fetch a module's fields and the values of its picklists."""
+    response = client.get('/api/3/model_metadatas', params={'type': module, '$relationships': 'true'})
+    members = response.get('hydra:member', [])
+    if not members:
+        raise click.UsageError(f"Unknown module '{module}'")
+
+    fields = {}
+    for attribute in members[0].get('attributes', []):
+        fields[attribute['name']] = {'type': attribute.get('type'), 'picklist': _picklist_name(attribute)}
+
+    def fetch_picklist(name: str) -> List[str]:
+        lists = client.get('/api/3/picklist_names', params={'name': name, '$relationships': 'true'})
+        items = (lists.get('hydra:member') or [{}])[0].get('picklists', [])
+        return [item['itemValue'] for item in items if 'itemValue' in item]
+
+    names = sorted({field['picklist'] for field in fields.values() if field['picklist']})
+    picklists = dict(zip(names, run_concurrently(fetch_picklist, names)))
+    return ModuleSchema(module, fields, picklists, time.time())
+
+
+def load_schema(state, client, module: str, ttl: float = DEFAULT_SCHEMA_TTL, refresh: bool = False) -> ModuleSchema:
+    """Get a module's schema from the cache, fetching it if missing, stale or ``refresh`` is set."""
+    path = state.state_path(SCHEMA_DIR, f'{module}.json')
+    if not refresh:
+        cached = load_state(path)
+        if cached:
+            schema = ModuleSchema.from_dict(cached)
+            if schema.is_fresh(ttl):
+                return schema
+    schema = fetch_schema(client, module)
+    save_state(path, schema.to_dict())
+    return schema
+
+
+def schema_for(ctx: click.Context, module: str) -> Optional[ModuleSchema]:
+    """Get the schema used to validate a command's input, or None if validation is off or unavailable.
+
+    The schema is loaded once per run. If it cannot be fetched, e.g. for lack
+    of permission on the metadata API, validation is skipped with a warning.
+    """
+    state = ctx.obj
+    if not state.validate or state.client is None or state.targets:
+        return None
+    if module not in state.schemas:
+        try:
+            state.schemas[module] = load_schema(state, state.client, module, state.schema_ttl)
+        except Exception as e:
+            warning(f"Could not load the {module} schema, skipping validation: {str(e)}")
+            state.schemas[module] = None
+    return state.schemas[module]
+
+
+def validate_record(ctx: click.Context, module: str, record: Dict[str, Any]) -> None:
+    """Raise a UsageError listing everything wrong with a payload, before it is sent."""
+    schema = schema_for(ctx, module)
+    problems = schema.check_record(record) if schema else []
+    if problems:
+        raise click.UsageError('; '.join(problems))
+
+
+def validate_columns(ctx: click.Context, module: str, columns: Optional[List[str]]) -> None:
+    """Raise a UsageError for columns the module does not have, before anything is fetched."""
+    schema = schema_for(ctx, module)
+    problems = schema.check_columns(columns) if schema and columns else []
+    if problems:
+        raise click.UsageError('; '.join(problems))
@@ -0,0 +1,264 @@
+"""Record output to rotating shard files written from a background thread.
+
+Records are serialised by the usual format writers into an in-memory shard
+buffer; full blocks are handed to a writer thread that compresses them and
+writes them to disk, so fetching and serialising never wait on a disk flush.
+A shard is closed and the next one opened at the first record boundary
+after it reaches ``max_records`` or ``max_bytes``. Every shard is a complete
+file in its own right: delimited shards repeat the header and columnar
+shards have their own schema.
+"""
+import io
+import itertools
+import json
+import queue
+import re
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+import click
+
+from .compression import SUFFIXES, compressor
+from .output import format_output, success
+
+SHARD_FORMATS = ['ndjson', 'csv', 'tsv', 'yaml', 'parquet', 'arrow']
+
+# Bytes collected before a block is handed to the writer thread
+BLOCK_SIZE = 1024 * 1024
+
+# Blocks waiting for the disk before serialising blocks, i.e. the most memory the writer may hold
+MAX_PENDING_BLOCKS = 32
+
+_SIZE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([kmgt]?i?b?)?\s*$', re.IGNORECASE)
+_UNITS = {'': 1, 'k': 1000, 'm': 1000 ** 2, 'g': 1000 ** 3, 't': 1000 ** 4,
+          'ki': 1024, 'mi': 1024 ** 2, 'gi': 1024 ** 3, 'ti': 1024 ** 4}
+
+
+def parse_size(ctx: Optional[click.Context], param: Any, value: Optional[str]) -> Optional[int]:
+    """Click callback parsing a size such as 500000, 100MB or 1GiB into bytes."""
+    if value is None:
+        return None
+    match = _SIZE.match(value)
+    if not match:
+        raise click.BadParameter(f"Expected a size such as 100MB or 1GiB, got '{value}'")
+    unit = (match.group(2) or '').lower().rstrip('b')
+    return int(float(match.group(1)) * _UNITS[unit])
+
+
+def write_records(records: Iterable[Dict[str, Any]], format: str, sink: BinaryIO,
+                  columns: Optional[List[str]] = None) -> int:
+    """Write records to a binary stream in one of the file formats, returning how many were written."""
+    if format in ('parquet', 'arrow'):
+        from .columnar import write_columnar
+        return write_columnar(records, format, sink)
+
+    text = io.TextIOWrapper(sink, encoding='utf-8', newline='', write_through=True)
+    try:
+        if format in ('csv', 'tsv'):
+            from .delimited import write_delimited
+            return write_delimited(records, ',' if format == 'csv' else '\t', columns, text)
+        if format == 'yaml':
+            from .yamlio import write_yaml
+            return write_yaml(records, text)
+        written = 0
+        for record in records:
+            text.write(json.dumps(record, default=str) + '\n')
+            written += 1
+        return written
+    finally:
+        text.detach()
+
+
+class _DiskWriter:
+    """Thread writing queued blocks to files, compressing them on the way."""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(MAX_PENDING_BLOCKS)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name='shard-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, *command: Any) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put(command)
+
+    def _run(self) -> None:
+        file = encoder = None
+        while True:
+            command = self._queue.get()
+            if command[0] == 'stop':
+                return
+            if self._error is not None:
+                continue
+            try:
+                if command[0] == 'open':
+                    path, encoding = command[1:]
+                    file = open(path, 'wb')
+                    encoder = compressor(encoding) if encoding else None
+                elif command[0] == 'write':
+                    file.write(encoder.compress(command[1]) if encoder else command[1])
+                else:
+                    if encoder:
+                        file.write(encoder.flush())
+                    file.close()
+            except BaseException as e:
+                self._error = e
+
+    def stop(self) -> None:
+        self._queue.put(('stop',))
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+class _ShardFile(io.RawIOBase):
+    """Write-only file that buffers bytes in memory and passes full blocks to the disk writer."""
+
+    def __init__(self, writer: _DiskWriter, path: Path, encoding: Optional[str]):
+        super().__init__()
+        self.path = path
+        self.size = 0
+        self._writer = writer
+        self._buffer = bytearray()
+        writer.submit('open', path, encoding)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= BLOCK_SIZE:
+            self._writer.submit('write', bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self._buffer:
+            self._writer.submit('write', bytes(self._buffer))
+            self._buffer.clear()
+        self._writer.submit('close')
+        super().close()
+
+
+def _compression_for(path: str) -> Optional[str]:
+    for encoding, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return encoding
+    return None
+
+
+def write_shards(records: Iterable[Dict[str, Any]], format: str, pattern: str,
+                 max_records: Optional[int] = None, max_bytes: Optional[int] = None,
+                 columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Write records to files named by a pattern, starting a new file when one is full.
+
+    Args:
+        records: Records to write, typically a generator yielding page by page
+        format: One of SHARD_FORMATS
+        pattern: File name pattern with a ``{shard}`` field (e.g. 'alerts-{shard:04d}.ndjson.gz');
+            a '.gz' or '.zst' suffix compresses the shards
+        max_records: Most records per shard
+        max_bytes: Uncompressed bytes after which a shard is closed
+        columns: Columns of delimited shards; defaults to the fields seen in the first records,
+            so every shard has the same header
+
+    Returns:
+        One entry per shard with its file name, record count and size on disk
+    """
+    if format not in SHARD_FORMATS:
+        raise click.UsageError(f"{format} output cannot be written to files; use one of: {', '.join(SHARD_FORMATS)}")
+    if (max_records or max_bytes) and '{shard' not in pattern:
+        raise click.UsageError("--output-file needs a {shard} field to rotate, e.g. alerts-{shard:04d}.ndjson")
+
+    encoding = _compression_for(pattern)
+    records = iter(records)
+    if format in ('csv', 'tsv') and not columns:
+        from .delimited import DEFAULT_SAMPLE_SIZE
+        sample = list(itertools.islice(records, DEFAULT_SAMPLE_SIZE))
+        columns = list(dict.fromkeys(key for record in sample for key in record))
+        records = itertools.chain(sample, records)
+    writer = _DiskWriter()
+    shards: List[_ShardFile] = []
+    counts: List[int] = []
+    try:
+        for number in itertools.count():
+            # Only open a shard once there is a record to put in it
+            try:
+                first = next(records)
+            except StopIteration:
+                break
+            path = Path(pattern.format(shard=number))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shard = _ShardFile(writer, path, encoding)
+            shards.append(shard)
+            counts.append(write_records(_fill(itertools.chain([first], records), shard, max_records, max_bytes),
+                                        format, shard, columns))
+            shard.close()
+    finally:
+        for shard in shards:
+            shard.close()
+        writer.stop()
+
+    return [{'file': str(shard.path), 'records': count, 'bytes': shard.path.stat().st_size}
+            for shard, count in zip(shards, counts)]
+
+
+def _fill(records: Iterator[Dict[str, Any]], shard: _ShardFile, max_records: Optional[int],
+          max_bytes: Optional[int]) -> Iterator[Dict[str, Any]]:
+    """Yield records for one shard until it is full, leaving the rest in ``records``."""
+    count = 0
+    while max_records is None or count < max_records:
+        if max_bytes and count and shard.size >= max_bytes:
+            return
+        try:
+            record = next(records)
+        except StopIteration:
+            return
+        yield record
+        count += 1
+
+
+def write_manifest(shards: List[Dict[str, Any]], format: str, path: Path) -> None:
+    """List the shards of an output with their record counts and sizes."""
+    manifest = {'format': format, 'records': sum(shard['records'] for shard in shards), 'shards': shards}
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def write_output_files(records: Iterable[Any], format: str, pattern: str, max_records: Optional[int] = None,
+                       max_bytes: Optional[int] = None, columns: Optional[List[str]] = None,
+                       view: str = 'simple', workers: int = 0) -> List[Dict[str, Any]]:
+    """Transform records for an output view and write them to shard files described by a manifest.
+
+    The manifest is written as manifest.json next to the shards.
+
+    Returns:
+        One entry per shard with its file name, record count and size on disk
+    """
+    from .pipeline import pipeline
+    from .transform import RecordTransformer
+
+    transformed = pipeline(iter(records), RecordTransformer.for_view(view, columns, format), workers)
+    shards = write_shards(transformed, format, pattern, max_records, max_bytes, columns)
+    write_manifest(shards, format, Path(pattern.format(shard=0)).parent / 'manifest.json')
+    return shards
+
+
+def output_records(ctx: click.Context, records: Iterable[Dict[str, Any]], table_columns: Optional[List[str]],
+                   view: str, output_file: Optional[str], max_records: Optional[int], max_bytes: Optional[int],
+                   noun: str = 'records') -> None:
+    """Print listed records, or write them to rotating files with --output-file."""
+    if not output_file:
+        format_output(records, ctx.obj.config.output_format, table_columns, view, ctx.obj.transform_workers)
+        return
+    shards = write_output_files(records, ctx.obj.config.output_format, output_file, max_records, max_bytes,
+                                table_columns, view, ctx.obj.transform_workers)
+    success(f"Wrote {sum(shard['records'] for shard in shards)} {noun} to {len(shards)} files")
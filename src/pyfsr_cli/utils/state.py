@@ -0,0 +1,26 @@
+"""Local state file helpers for PyFSR CLI."""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+
+def load_state(path: Path) -> Dict[str, Any]:
+    """Load a JSON state file, returning an empty dict if it does not exist."""
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f) or {}
+
+
+def save_state(path: Path, state: Dict[str, Any]) -> None:
+    """Atomically write a JSON state file.
+
+    The state is written to a temporary file next to the target and renamed
+    into place, so an interrupted run never leaves a truncated state file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
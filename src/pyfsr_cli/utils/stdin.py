@@ -0,0 +1,150 @@
+"""Record streams read from stdin for pipeline mode."""
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, TypeVar
+
+import click
+
+from .concurrency import DEFAULT_CONCURRENCY, run_concurrently
+from .jobs import Job
+from .progress import ProgressReporter
+from .output import error
+from .schema import META_FIELDS
+
+DEFAULT_BATCH_SIZE = 100
+
+# Fields that identify a record rather than describe it
+IDENTITY_FIELDS = ('@id', '@type', '@context', 'uuid', 'id')
+
+T = TypeVar('T')
+
+
+def iter_stdin_records(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Lazily read NDJSON records or bare IDs, one per line.
+
+    Lines holding a JSON object are yielded as records; any other line is
+    treated as a record ID and yielded as ``{'uuid': line}``. Lines are read
+    as they arrive, so processing starts while the producer is still writing.
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] in '{"':
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise click.UsageError(f"Invalid JSON on stdin line {line_number}: {e}")
+            yield value if isinstance(value, dict) else {'uuid': str(value)}
+        else:
+            yield {'uuid': line}
+
+
+def record_id(record: Dict[str, Any]) -> Optional[str]:
+    """Get a record's uuid, falling back to the last segment of its IRI."""
+    if record.get('uuid'):
+        return str(record['uuid'])
+    if record.get('@id'):
+        return str(record['@id']).rstrip('/').rsplit('/', 1)[-1]
+    return None
+
+
+def record_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Get a record's fields without the ones identifying it."""
+    return {k: v for k, v in record.items() if k not in IDENTITY_FIELDS}
+
+
+def _reference(value: Any) -> Any:
+    """Replace related records, as listed with --view full, by their IRIs."""
+    if isinstance(value, dict) and '@id' in value:
+        return value['@id']
+    if isinstance(value, list):
+        return [_reference(item) for item in value]
+    return value
+
+
+def writable_fields(record: Dict[str, Any], schema=None) -> Dict[str, Any]:
+    """Get the fields of a listed record that can be sent back in a create or update.
+
+    Identity and server-managed fields (uuid, createDate, _server, @-keys,
+    ...) are dropped and related records are replaced by their IRIs. With a
+    schema, reference fields holding a flattened display string, as the
+    simple view prints picklists and people, are dropped too, since the
+    server cannot resolve them; list with ``--view full`` to round-trip them.
+    """
+    fields = {}
+    for key, value in record.items():
+        if key in META_FIELDS or key.startswith(('@', '_')):
+            continue
+        value = _reference(value)
+        if schema is not None and schema.is_reference(key) and isinstance(value, str) \
+                and not value.startswith('/api/'):
+            continue
+        fields[key] = value
+    return fields
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Lazily group items into lists of at most ``size``."""
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def iter_batches(func: Callable[[T], Any], items: Iterable[T],
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY) -> Iterator[Tuple[T, Any]]:
+    """Apply ``func`` to a stream of items, one concurrent batch at a time.
+
+    Yields ``(item, result)`` pairs in input order; a failed call yields its
+    exception as the result so one bad record does not stop the stream.
+    """
+    for batch in batched(items, batch_size):
+        yield from zip(batch, run_concurrently(func, batch, concurrency, return_exceptions=True))
+
+
+def process_stdin(func: Callable[[Dict[str, Any]], Any], action: str, stream: TextIO,
+                  batch_size: int = DEFAULT_BATCH_SIZE, concurrency: int = DEFAULT_CONCURRENCY,
+                  on_result: Optional[Callable[[Dict[str, Any], Any], None]] = None,
+                  job: Optional[Job] = None,
+                  progress: Optional[ProgressReporter] = None) -> Tuple[int, int]:
+    """Run ``func`` on every record read from stdin, reporting failures as they happen.
+
+    With a job, each record is checkpointed by its line position as soon as it
+    succeeds; when the same input is piped to a resumed job, the records that
+    already succeeded are skipped.
+
+    Args:
+        func: Callable handling one record
+        action: Verb used in error messages (e.g. 'update alert')
+        stream: Stream to read records from
+        batch_size: Number of records handled per concurrent batch
+        concurrency: Maximum number of requests in flight
+        on_result: Called with each record and its result after a successful call
+        job: Job recording which records succeeded
+        progress: Reporter advanced as records are handled
+
+    Returns:
+        Number of records that succeeded and failed
+    """
+    def run(item: Tuple[int, Dict[str, Any]]) -> Any:
+        position, record = item
+        result = func(record)
+        if job:
+            job.done(position)
+        return result
+
+    if progress:
+        run = progress.wrap(run)
+    items = ((position, record) for position, record in enumerate(iter_stdin_records(stream))
+             if not (job and job.is_done(position)))
+    succeeded = failed = 0
+    for (_, record), result in iter_batches(run, items, batch_size, concurrency):
+        if isinstance(result, Exception):
+            failed += 1
+            error(f"Failed to {action} {record_id(record) or 'record'}: {str(result)}")
+            continue
+        succeeded += 1
+        if on_result:
+            on_result(record, result)
+    return succeeded, failed
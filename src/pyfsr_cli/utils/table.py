@@ -0,0 +1,131 @@
+"""Chunked table rendering for large result sets."""
+import itertools
+import os
+import shlex
+import subprocess
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from .output import console as default_console
+
+DEFAULT_SAMPLE_SIZE = 100
+DEFAULT_CHUNK_SIZE = 200
+MAX_COLUMN_WIDTH = 40
+MIN_COLUMN_WIDTH = 4
+DEFAULT_PAGER = 'less -FRSX'
+
+
+def _cell(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+def _column_widths(columns: List[str], sample: List[List[str]], total_width: int) -> List[int]:
+    """Compute column widths from sampled rows, shrinking the widest columns to fit the screen."""
+    widths = [
+        min(MAX_COLUMN_WIDTH, max([len(column)] + [len(row[i]) for row in sample]))
+        for i, column in enumerate(columns)
+    ]
+    # Each column costs its padding and separator on top of its content
+    available = total_width - (3 * len(columns) + 1)
+    while sum(widths) > available and max(widths) > MIN_COLUMN_WIDTH:
+        widest = widths.index(max(widths))
+        widths[widest] -= 1
+    return widths
+
+
+def _chunk_tables(columns: List[str], widths: List[int],
+                  rows: Iterator[List[str]], chunk_size: int) -> Iterator[Table]:
+    """Yield tables of at most ``chunk_size`` rows that line up when printed one after another."""
+    first = True
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            if first:
+                yield _new_table(columns, widths, show_header=True)
+            return
+        table = _new_table(columns, widths, show_header=first)
+        for row in chunk:
+            table.add_row(*row)
+        yield table
+        first = False
+
+
+def _new_table(columns: List[str], widths: List[int], show_header: bool) -> Table:
+    table = Table(show_header=show_header, show_edge=False)
+    for column, width in zip(columns, widths):
+        table.add_column(column, width=width, no_wrap=True, overflow='ellipsis')
+    return table
+
+
+def _pager_command() -> Optional[List[str]]:
+    """Get the pager command, or None when paging is disabled or stdout is not a terminal."""
+    pager = os.getenv('PYFSR_PAGER', os.getenv('PAGER', DEFAULT_PAGER))
+    if not pager or pager == '0' or not sys.stdout.isatty():
+        return None
+    return shlex.split(pager)
+
+
+def render_table(records: Iterable[Dict[str, Any]], columns: Optional[List[str]] = None,
+                 console: Optional[Console] = None, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Render records as a table in chunks while they stream in.
+
+    Column widths are computed from the first ``sample_size`` records, so the
+    first rows are printed without measuring the whole result set. When
+    stdout is a terminal the output is piped into a pager (``PYFSR_PAGER``,
+    then ``PAGER``, default ``less``); the pipe only accepts rows as the user
+    scrolls, so later pages are fetched lazily and quitting the pager stops
+    the fetch.
+
+    Args:
+        records: Records to render, typically a generator yielding page by page
+        columns: Columns to show; defaults to the fields of the sampled records
+        console: Console to print to (defaults to the shared output console)
+        sample_size: Number of records used to compute column widths
+        chunk_size: Number of rows rendered per chunk
+    """
+    records = iter(records)
+    sample = list(itertools.islice(records, sample_size))
+    if not columns:
+        columns = list(dict.fromkeys(key for record in sample for key in record))
+
+    def to_row(record: Dict[str, Any]) -> List[str]:
+        return [_cell(record.get(column)) for column in columns]
+
+    sample_rows = [to_row(record) for record in sample]
+    rows = itertools.chain(sample_rows, (to_row(record) for record in records))
+
+    pager = _pager_command() if console is None else None
+    if pager is None:
+        console = console or default_console
+        widths = _column_widths(columns, sample_rows, console.width)
+        for table in _chunk_tables(columns, widths, rows, chunk_size):
+            console.print(table)
+        return
+
+    width = default_console.width
+    widths = _column_widths(columns, sample_rows, width)
+    try:
+        process = subprocess.Popen(pager, stdin=subprocess.PIPE, text=True)
+    except OSError:
+        for table in _chunk_tables(columns, widths, rows, chunk_size):
+            default_console.print(table)
+        return
+
+    pager_console = Console(file=process.stdin, force_terminal=True, width=width)
+    try:
+        for table in _chunk_tables(columns, widths, rows, chunk_size):
+            pager_console.print(table)
+            process.stdin.flush()
+    except BrokenPipeError:
+        # The user quit the pager; stop rendering (and fetching) the remaining rows
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
@@ -0,0 +1,84 @@
+"""Streaming per-record transformations for output views."""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .output import process_value
+
+_NESTED = (dict, list)
+
+# Formats whose columns are fixed from the first records; pruning empty values there would drop whole columns
+FIXED_COLUMN_FORMATS = ('table', 'csv', 'tsv', 'parquet', 'arrow')
+
+
+def flatten_value(value: Any) -> Any:
+    """Flatten persons and picklists at any depth of a value."""
+    if type(value) is dict:
+        flat = process_value(value)
+        if flat is not value:
+            return flat
+        return {k: flatten_value(v) for k, v in value.items()}
+    if type(value) is list:
+        return [flatten_value(v) for v in value]
+    return value
+
+
+def get_path(record: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted field path such as 'assignedTo.firstname' in a record."""
+    if '.' not in path:
+        return record.get(path)
+    value: Any = record
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class RecordTransformer:
+    """Single-pass record transformer.
+
+    The steps always run in the same order for each field: project the
+    requested columns (dotted paths are resolved against the raw record),
+    prune empty values, then flatten persons and picklists. Every record is
+    walked once and produces exactly one new dict.
+    """
+
+    def __init__(self, columns: Optional[List[str]] = None, prune_empty: bool = False,
+                 flatten: bool = False):
+        self.columns = list(columns) if columns else None
+        self.prune_empty = prune_empty
+        self.flatten = flatten
+
+    @classmethod
+    def for_view(cls, view: str, columns: Optional[List[str]] = None,
+                 format: Optional[str] = None) -> 'RecordTransformer':
+        """Build the transformer for an output view ('simple' or 'full').
+
+        Empty values are kept in formats with fixed columns, which write them
+        as empty cells or nulls.
+        """
+        simple = view == 'simple'
+        return cls(columns=columns, prune_empty=simple and format not in FIXED_COLUMN_FORMATS, flatten=simple)
+
+    def __call__(self, record: Any) -> Any:
+        if not isinstance(record, dict):
+            return record
+        if self.columns is None:
+            if not self.prune_empty and not self.flatten:
+                return record
+            items = record.items()
+        else:
+            items = ((column, get_path(record, column)) for column in self.columns)
+
+        prune_empty, flatten = self.prune_empty, self.flatten
+        result = {}
+        for key, value in items:
+            if prune_empty and (value is None or value == '' or (type(value) is list and not value)):
+                continue
+            if flatten and type(value) in _NESTED:
+                value = flatten_value(value)
+            result[key] = value
+        return result
+
+    def stream(self, records: Iterable[Any]) -> Iterator[Any]:
+        """Lazily transform a stream of records."""
+        return map(self, records)
@@ -0,0 +1,50 @@
+"""Streaming YAML output and config loading for PyFSR CLI.
+
+The C LibYAML bindings are used when PyYAML was built with them; they are
+several times faster than the pure Python emitter and parser.
+"""
+import sys
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper, CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeDumper, SafeLoader
+
+
+def load_yaml(stream: TextIO) -> Any:
+    """Parse a single YAML document."""
+    return yaml.load(stream, Loader=SafeLoader)
+
+
+def dump_yaml(data: Any, stream: TextIO) -> None:
+    """Write a single YAML document."""
+    yaml.dump(data, stream, Dumper=SafeDumper, sort_keys=False, allow_unicode=True)
+
+
+def write_yaml(records: Iterable[Any], sink: Optional[TextIO] = None) -> int:
+    """Write records as a stream of YAML documents, one per record.
+
+    Each document is emitted as its record arrives, so memory stays bounded
+    by one record however many are streamed.
+
+    Args:
+        records: Records to write, typically a generator yielding page by page
+        sink: Text stream to write to (defaults to stdout)
+
+    Returns:
+        Number of records written
+    """
+    written = 0
+
+    def counted() -> Iterator[Any]:
+        nonlocal written
+        for record in records:
+            yield record
+            written += 1
+
+    yaml.dump_all(counted(), sink or sys.stdout, Dumper=SafeDumper, explicit_start=True,
+                  sort_keys=False, allow_unicode=True, default_flow_style=False)
+    return written
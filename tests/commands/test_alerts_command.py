@@ -1,3 +1,12 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+import yaml
+
+from pyfsr_cli.utils.schema import ModuleSchema
+
+
 def test_list_alerts(cli_runner, mock_fortisoar):
     """Test listing alerts."""
     result = cli_runner(['list'])
@@ -97,3 +106,291 @@ def test_client_error_handling(cli_runner, mock_fortisoar):
     result = cli_runner(['list'])
     assert result.exit_code != 0
     assert 'Failed to list alerts' in result.output
+
+
+def test_sync_alerts_saves_mark(cli_runner, mock_fortisoar):
+    """Test syncing alerts emits upserts and resumes after the saved mark."""
+    mock_fortisoar.query.return_value = {
+        'hydra:member': [
+            {'uuid': 'a', 'modifyDate': 100, 'name': 'Alert A'},
+            {'uuid': 'b', 'modifyDate': 200, 'name': 'Alert B'}
+        ]
+    }
+
+    result = cli_runner(['sync'])
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.output.splitlines()]
+    assert [line['record']['uuid'] for line in lines] == ['a', 'b']
+    assert all(line['op'] == 'upsert' for line in lines)
+
+    mock_fortisoar.query.return_value = {'hydra:member': []}
+    result = cli_runner(['sync'])
+    assert result.exit_code == 0
+    assert result.output == ''
+
+    body = mock_fortisoar.query.call_args[0][1]
+    assert body['sort'] == [{'field': 'modifyDate', 'direction': 'ASC'},
+                            {'field': 'uuid', 'direction': 'ASC'}]
+    assert body['filters'][0]['logic'] == 'OR'
+    assert body['filters'][0]['filters'][0] == {'field': 'modifyDate', 'operator': 'gt', 'value': 200}
+
+
+def test_sync_alerts_tombstones(cli_runner, mock_fortisoar):
+    """Test syncing alerts emits tombstones for alerts that disappeared."""
+    mock_fortisoar.query.side_effect = [
+        {'hydra:member': []},
+        {'hydra:member': [{'uuid': 'a'}, {'uuid': 'b'}]},
+        {'hydra:member': []},
+        {'hydra:member': [{'uuid': 'a'}]},
+    ]
+
+    assert cli_runner(['sync', '--tombstones']).output == ''
+
+    result = cli_runner(['sync', '--tombstones'])
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {'op': 'delete', 'uuid': 'b'}
+
+
+def test_list_alerts_all_parquet(cli_runner, cli_state, mock_fortisoar, serve_pages):
+    """Test streaming every page of alerts as Parquet."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    pa = pytest.importorskip('pyarrow')
+    cli_state.config.output_format = 'parquet'
+    pages = [
+        {'hydra:member': [{'uuid': 'a', 'severity': {'itemValue': 'High'}, 'owner': None},
+                          {'uuid': 'b', 'severity': {'itemValue': 'Low'}, 'owner': None}]},
+        {'hydra:member': [{'uuid': 'c', 'owner': {'@type': 'Person', 'firstname': 'Jane', 'lastname': 'Doe'}}]},
+    ]
+    serve_pages(lambda endpoint, params: pages[params['$page'] - 1])
+
+    result = cli_runner(['list', '--all', '--paging', 'offset', '--page-size', '2'])
+    assert result.exit_code == 0
+    assert mock_fortisoar.request.call_args_list[1].kwargs['params'] == {'$limit': 2, '$page': 2}
+
+    table = pq.read_table(pa.BufferReader(result.stdout_bytes))
+    assert table.to_pylist() == [
+        {'uuid': 'a', 'severity': 'High', 'owner': None},
+        {'uuid': 'b', 'severity': 'Low', 'owner': None},
+        {'uuid': 'c', 'severity': None, 'owner': 'Jane Doe'},
+    ]
+
+
+def test_list_alerts_csv_columns(cli_runner, cli_state, mock_fortisoar):
+    """Test CSV output with dotted column paths."""
+    cli_state.config.output_format = 'csv'
+    mock_fortisoar.alerts.list.return_value = {
+        'hydra:member': [
+            {'name': 'A, quoted', 'severity': {'itemValue': 'High'}, 'assignedTo': {'firstname': 'Jane'}},
+            {'name': 'B', 'severity': None},
+        ]
+    }
+
+    result = cli_runner(['list', '--columns', 'name,severity,assignedTo.firstname'])
+    assert result.exit_code == 0
+    assert result.output == (
+        'name,severity,assignedTo.firstname\n'
+        '"A, quoted",High,Jane\n'
+        'B,,\n'
+    )
+
+
+def test_list_alerts_tsv_header_from_records(cli_runner, cli_state, mock_fortisoar):
+    """Test TSV output builds the header from the sampled records."""
+    cli_state.config.output_format = 'tsv'
+    mock_fortisoar.alerts.list.return_value = {
+        'hydra:member': [{'name': 'A'}, {'name': 'B', 'tags': ['x', 'y']}]
+    }
+
+    result = cli_runner(['list', '--view', 'full'])
+    assert result.exit_code == 0
+    assert result.output == 'name\ttags\nA\t\nB\t"[""x"", ""y""]"\n'
+
+
+def test_get_alerts_batch(cli_runner, mock_fortisoar):
+    """Test many IDs are deduplicated and fetched with chunked queries."""
+    mock_fortisoar.query.side_effect = lambda module, body: {
+        'hydra:member': [{'uuid': uuid} for uuid in body['filters'][0]['value'] if uuid != 'c']
+    }
+
+    result = cli_runner(['get', 'a', '/api/3/alerts/b', '-', '--chunk-size', '2'], input='a\nc\nd\n')
+    assert result.exit_code == 0
+    queried = [call.args[1]['filters'][0]['value'] for call in mock_fortisoar.query.call_args_list]
+    assert queried == [['a', 'b'], ['c', 'd']]
+    assert 'not found: c' in result.output
+    mock_fortisoar.alerts.get.assert_not_called()
+
+
+def _http_error(status):
+    e = Exception(f'HTTP {status}')
+    e.response = Mock(status_code=status)
+    return e
+
+
+def test_get_alerts_batch_fallback(cli_runner, mock_fortisoar):
+    """Test falling back to single GETs when the query API rejects the module."""
+    mock_fortisoar.query.side_effect = _http_error(400)
+
+    def get(uuid):
+        if uuid == 'c':
+            raise _http_error(404)
+        if uuid == 'd':
+            raise _http_error(500)
+        return {'uuid': uuid}
+
+    mock_fortisoar.alerts.get.side_effect = get
+
+    result = cli_runner(['get', 'a', 'b', 'a', 'c', 'd'])
+    assert result.exit_code == 1
+    assert sorted(call.args[0] for call in mock_fortisoar.alerts.get.call_args_list) == ['a', 'b', 'c', 'd']
+    assert '"uuid": "a"' in result.output and '"uuid": "b"' in result.output
+    assert '1 record(s) not found: c' in result.output
+    assert 'Failed to fetch d: HTTP 500' in result.output
+
+
+def test_get_alerts_batch_raises_query_errors(cli_runner, mock_fortisoar):
+    """Test errors other than a rejected query are not hidden behind single GETs."""
+    mock_fortisoar.query.side_effect = _http_error(401)
+
+    result = cli_runner(['get', 'a', 'b'])
+    assert result.exit_code != 0
+    assert 'HTTP 401' in result.output
+    mock_fortisoar.alerts.get.assert_not_called()
+
+
+def test_update_alerts_from_stdin(cli_runner, mock_fortisoar):
+    """Test updating every alert read from stdin."""
+    mock_fortisoar.alerts.update.side_effect = lambda uuid, data: {'uuid': uuid, **data}
+    stdin = '\n'.join([
+        json.dumps({'@id': '/api/3/alerts/a', 'name': 'A'}),
+        'b',
+        '',
+        json.dumps({'name': 'no id'}),
+    ])
+
+    result = cli_runner(['update', '--stdin', '--status', 'Closed', '--batch-size', '2'], input=stdin)
+    assert result.exit_code == 1
+    updated = sorted(call.args for call in mock_fortisoar.alerts.update.call_args_list)
+    assert updated == [('a', {'status': 'Closed'}), ('b', {'status': 'Closed'})]
+    assert 'Updated 2 alerts' in result.output
+    assert 'Failed to update alert record: record has no uuid' in result.output
+
+
+def test_update_alerts_from_stdin_record_fields(cli_runner, mock_fortisoar):
+    """Test NDJSON record fields are used when no update options are given."""
+    result = cli_runner(['update', '--stdin'], input=json.dumps({'uuid': 'a', 'status': 'Open'}) + '\n')
+    assert result.exit_code == 0
+    mock_fortisoar.alerts.update.assert_called_once_with('a', {'status': 'Open'})
+
+
+def test_update_alerts_from_stdin_strips_list_fields(cli_runner, cli_state, mock_fortisoar):
+    """Test piped list output is written back without metadata or flattened references."""
+    cli_state.validate = True
+    cli_state.schemas['alerts'] = ModuleSchema(
+        'alerts', {'name': {'type': 'text', 'picklist': None},
+                   'status': {'type': 'picklists', 'picklist': 'AlertStatus'},
+                   'severity': {'type': 'picklists', 'picklist': 'Severity'},
+                   'assignedTo': {'type': 'lookup', 'picklist': None}},
+        {'AlertStatus': ['Open'], 'Severity': ['High']}, 0)
+    listed = {'@id': '/api/3/alerts/a', '@type': 'Alert', 'uuid': 'a', 'id': 7, '_server': 'prod',
+              'createDate': 1, 'modifyDate': 2, 'name': 'A', 'status': 'Open', 'assignedTo': 'Jane Doe',
+              'severity': {'@id': '/api/3/picklists/high', 'itemValue': 'High'}}
+
+    result = cli_runner(['update', '--stdin'], input=json.dumps(listed) + '\n')
+
+    assert result.exit_code == 0, result.output
+    mock_fortisoar.alerts.update.assert_called_once_with(
+        'a', {'name': 'A', 'severity': '/api/3/picklists/high'})
+
+
+def test_delete_alerts_from_stdin_requires_force(cli_runner, mock_fortisoar):
+    """Test bulk deletion from stdin needs --force."""
+    result = cli_runner(['delete', '--stdin'], input='a\n')
+    assert result.exit_code != 0
+    mock_fortisoar.alerts.delete.assert_not_called()
+
+    result = cli_runner(['delete', '--stdin', '--force'], input='a\nb\n')
+    assert result.exit_code == 0
+    assert mock_fortisoar.alerts.delete.call_count == 2
+
+
+def test_list_all_resumes_after_last_written_page(cli_runner, cli_state, serve_pages, tmp_path):
+    """Test an interrupted NDJSON export continues from the page after the last one written."""
+    cli_state.config.output_format = 'ndjson'
+
+    def list_page(endpoint, params):
+        return {'hydra:member': [{'page': params['$page']}] * (2 if params['$page'] < 3 else 1)}
+
+    def failing_page(endpoint, params):
+        if params['$page'] == 2:
+            raise ConnectionError('VPN dropped')
+        return list_page(endpoint, params)
+
+    serve_pages(failing_page)
+    result = cli_runner(['list', '--all', '--paging', 'offset', '--page-size', '2'])
+    assert result.exit_code == 1
+    job_id = result.output.split('--resume ')[1].split()[0]
+
+    serve_pages(list_page)
+    result = cli_runner(['list', '--all', '--paging', 'offset', '--page-size', '2', '--resume', job_id])
+    assert result.exit_code == 0
+    pages = [json.loads(line)['page'] for line in result.output.splitlines()]
+    assert pages == [2, 2, 3]
+    assert not list(tmp_path.rglob('*.jsonl'))
+
+
+def test_list_all_defaults_to_keyset_paging(cli_runner, cli_state, mock_fortisoar):
+    """Test --all asks for alerts after the last (createDate, uuid) seen instead of using offsets."""
+    cli_state.config.output_format = 'ndjson'
+    pages = iter([
+        {'hydra:member': [{'uuid': 'a', 'createDate': 1}, {'uuid': 'b', 'createDate': 2}]},
+        {'hydra:member': [{'uuid': 'c', 'createDate': 2}]},
+    ])
+    mock_fortisoar.query.side_effect = lambda module, body: next(pages)
+
+    result = cli_runner(['list', '--all', '--page-size', '2', '--severity', 'High'])
+    assert result.exit_code == 0
+    assert [json.loads(line)['uuid'] for line in result.output.splitlines()] == ['a', 'b', 'c']
+
+    first, second = (call.args[1] for call in mock_fortisoar.query.call_args_list)
+    assert first['sort'] == [{'field': 'createDate', 'direction': 'ASC'}, {'field': 'uuid', 'direction': 'ASC'}]
+    assert first['filters'] == [{'field': 'severity.itemValue', 'operator': 'eq', 'value': 'High'}]
+    assert second['filters'][1]['filters'][1]['filters'] == [
+        {'field': 'createDate', 'operator': 'eq', 'value': 2},
+        {'field': 'uuid', 'operator': 'gt', 'value': 'b'},
+    ]
+    mock_fortisoar.alerts.list.assert_not_called()
+
+
+def test_list_alerts_yaml(cli_runner, cli_state):
+    """Test --output yaml prints one document per alert."""
+    cli_state.config.output_format = 'yaml'
+    result = cli_runner(['list'])
+    assert result.exit_code == 0
+    documents = list(yaml.safe_load_all(result.output))
+    assert [doc['name'] for doc in documents] == ['Test Alert 1', 'Test Alert 2']
+
+
+def test_list_alerts_to_rotating_files(cli_runner, cli_state, tmp_path):
+    """Test --output-file writes shards and a manifest instead of stdout."""
+    cli_state.config.output_format = 'ndjson'
+    pattern = str(tmp_path / 'alerts-{shard}.ndjson')
+    result = cli_runner(['list', '--output-file', pattern, '--max-records', '1'])
+    assert result.exit_code == 0, result.output
+    assert 'Test Alert' not in result.output
+
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert [shard['records'] for shard in manifest['shards']] == [1, 1]
+    assert json.loads((tmp_path / 'alerts-1.ndjson').read_text())['name'] == 'Test Alert 2'
+
+
+def test_watch_once_streams_new_alerts(cli_runner, mock_fortisoar):
+    """Test a single watch poll filters by severity and createDate and prints NDJSON."""
+    mock_fortisoar.query.return_value = {'hydra:member': [{'uuid': 'a1', 'name': 'New', 'createDate': 5.0}]}
+
+    result = cli_runner(['watch', '--severity', 'Critical', '--since', '0', '--once'])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output.strip())['name'] == 'New'
+    filters = mock_fortisoar.query.call_args.args[1]['filters']
+    assert filters[:2] == [{'field': 'severity.itemValue', 'operator': 'eq', 'value': 'Critical'},
+                           {'field': 'createDate', 'operator': 'gte', 'value': -5.0}]
@@ -0,0 +1,105 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.api import api_group, parse_params
+
+
+@pytest.fixture
+def http_runner(cli_state):
+    """Invoke the http group with the mocked client."""
+
+    def invoke(*args, **kwargs):
+        return CliRunner().invoke(api_group, *args, obj=cli_state, **kwargs)
+
+    return invoke
+
+
+def make_response(payload):
+    """Build a fake response whose body arrives in two chunks."""
+    body = json.dumps(payload).encode()
+    response = Mock()
+    response.iter_content.return_value = [body[:5], body[5:]]
+    response.json.return_value = payload
+    return response
+
+
+def test_parse_params_splits_on_first_equals():
+    """Test values may contain '=' and repeated keys become lists."""
+    assert parse_params(('q=a=b', 'tag=x', 'tag=y')) == {'q': 'a=b', 'tag': ['x', 'y']}
+
+
+def test_get_streams_raw_json(http_runner, mock_fortisoar):
+    """Test a single GET writes the response body unchanged."""
+    mock_fortisoar.request.return_value = make_response({'name': 'Alert'})
+    result = http_runner(['get', '/api/3/alerts/1', '-p', '$relationships=true'])
+    assert result.exit_code == 0
+    assert json.loads(result.output) == {'name': 'Alert'}
+    mock_fortisoar.request.assert_called_once_with('GET', '/api/3/alerts/1', params={'$relationships': 'true'},
+                                                   data=None, stream=True)
+
+
+def test_get_paginate_follows_hydra_next(http_runner, mock_fortisoar):
+    """Test --paginate writes every member of every page as NDJSON."""
+    mock_fortisoar.request.side_effect = [
+        make_response({'hydra:member': [{'id': 1}, {'id': 2}], 'hydra:next': '/api/3/alerts?$page=2'}),
+        make_response({'hydra:member': [{'id': 3}]}),
+    ]
+    result = http_runner(['get', '/api/3/alerts', '--paginate'])
+    assert result.exit_code == 0
+    assert [json.loads(line)['id'] for line in result.output.splitlines()] == [1, 2, 3]
+    assert mock_fortisoar.request.call_args_list[1].args == ('GET', '/api/3/alerts?$page=2')
+
+
+def test_get_parallel_endpoints_from_stdin(http_runner, mock_fortisoar):
+    """Test several endpoints are fetched and written in order, with failures reported."""
+    responses = {'/a': make_response({'id': 'a'}), '/c': make_response({'id': 'c'})}
+
+    def request(method, endpoint, **kwargs):
+        if endpoint not in responses:
+            raise Exception('not found')
+        return responses[endpoint]
+
+    mock_fortisoar.request.side_effect = request
+    result = http_runner(['get', '-', '--parallel', '4'], input='/a\n/b\n/c\n')
+    assert result.exit_code == 1
+    assert 'GET /b failed: not found' in result.output
+    records = [json.loads(line) for line in result.output.splitlines() if line.startswith('{')]
+    assert records == [{'id': 'a'}, {'id': 'c'}]
+
+
+def test_post_reads_body_from_stdin(http_runner, mock_fortisoar, tmp_path):
+    """Test --data - sends the JSON read from stdin and --output-file receives the body."""
+    mock_fortisoar.request.return_value = make_response({'uuid': 'new'})
+    out = tmp_path / 'created.json'
+    result = http_runner(['post', '/api/3/alerts', '-d', '-', '-o', str(out)], input='{"name": "A"}')
+    assert result.exit_code == 0
+    assert mock_fortisoar.request.call_args.kwargs['data'] == {'name': 'A'}
+    assert json.loads(out.read_text()) == {'uuid': 'new'}
+
+
+def test_post_missing_body_file_is_a_usage_error(http_runner, mock_fortisoar, tmp_path, monkeypatch):
+    """Test a --data file that cannot be read fails as a usage error, even if its name looks like JSON."""
+    result = http_runner(['post', '/api/3/alerts', '-d', str(tmp_path / 'missing.json')])
+    assert result.exit_code == 2
+    assert "Invalid value for '--data': Cannot read" in result.output
+    mock_fortisoar.request.assert_not_called()
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / '[alert].json').write_text('{"name": "A"}')
+    mock_fortisoar.request.return_value = make_response({'uuid': 'new'})
+    result = http_runner(['post', '/api/3/alerts', '-d', '[alert].json'])
+    assert result.exit_code == 0, result.output
+    assert mock_fortisoar.request.call_args.kwargs['data'] == {'name': 'A'}
+
+
+def test_delete_parallel_endpoints_with_empty_bodies(http_runner, mock_fortisoar):
+    """Test a 204 without a body counts as success and is written as its status."""
+    mock_fortisoar.request.return_value = Mock(content=b'', status_code=204)
+
+    result = http_runner(['delete', '/api/3/alerts/a', '/api/3/alerts/b'])
+
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line) for line in result.output.splitlines()] == [{'status': 204}, {'status': 204}]
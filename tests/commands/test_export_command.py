@@ -0,0 +1,111 @@
+import csv
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.export import export_command
+from pyfsr_cli.utils.export import Window, merge_shards, plan_windows
+
+OPERATORS = {
+    'eq': lambda a, b: a == b,
+    'gt': lambda a, b: a > b,
+    'gte': lambda a, b: a >= b,
+    'lt': lambda a, b: a < b,
+}
+
+
+def matches(record, clause):
+    if 'logic' in clause:
+        results = [matches(record, c) for c in clause['filters']]
+        return all(results) if clause['logic'] == 'AND' else any(results)
+    return OPERATORS[clause['operator']](record[clause['field']], clause['value'])
+
+
+@pytest.fixture
+def alerts_table(mock_fortisoar):
+    """Answer query API calls from ten alerts created one second apart."""
+    records = [{'uuid': f'a{i}', 'name': f'Alert {i}', 'createDate': float(i)} for i in range(10)]
+
+    def query(module, body):
+        found = [r for r in records if matches(r, {'logic': body['logic'], 'filters': body['filters']})]
+        for sort in reversed(body.get('sort', [])):
+            found.sort(key=lambda r: r[sort['field']])
+        return {'hydra:member': found[:body.get('limit')], 'hydra:totalItems': len(found)}
+
+    mock_fortisoar.query.side_effect = query
+    return records
+
+
+@pytest.fixture
+def export_runner(cli_state, tmp_path):
+    cli_state.state_dir = tmp_path / 'state'
+
+    def invoke(*args):
+        return CliRunner().invoke(export_command, *args, obj=cli_state)
+
+    return invoke
+
+
+def test_plan_windows_splits_until_windows_fit():
+    """Test ranges over the target are split by count and empty windows dropped."""
+    created = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+    def count(window):
+        return sum(window.start <= c < window.end for c in created)
+
+    windows = plan_windows(count, 0, 20, window_size=3, concurrency=1)
+    assert sum(w.count for w in windows) == 10
+    assert all(0 < w.count <= 3 for w in windows)
+    assert windows == sorted(windows, key=lambda w: w.start)
+    assert plan_windows(lambda w: None, 0, 20) == [Window(0, 20, 0)]
+
+
+def test_export_writes_shards_and_manifest(export_runner, alerts_table, tmp_path):
+    """Test each window becomes a shard and the manifest accounts for every record."""
+    out = tmp_path / 'out'
+    result = export_runner(['alerts', '--out-dir', str(out), '--since', '1970-01-01T00:00:00', '--until', '10',
+                            '--window-size', '3', '--page-size', '2', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+
+    manifest = json.loads((out / 'manifest.json').read_text())
+    assert len(manifest['windows']) == 4
+    names = []
+    for entry in manifest['windows']:
+        lines = (out / entry['file']).read_text().splitlines()
+        assert len(lines) == entry['records'] == entry['count']
+        names += [json.loads(line)['name'] for line in lines]
+    assert names == [f'Alert {i}' for i in range(10)]
+    assert not list((tmp_path / 'state').rglob('*.jsonl'))
+
+
+def test_export_merges_csv_shards(export_runner, alerts_table, tmp_path):
+    """Test --merge concatenates CSV shards under a single header."""
+    out = tmp_path / 'out'
+    result = export_runner(['alerts', '--out-dir', str(out), '--since', '0', '--until', '10', '--window-size', '4',
+                            '--format', 'csv', '--columns', 'uuid,name', '--merge', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+
+    rows = list(csv.DictReader((out / 'alerts.csv').open()))
+    assert [row['uuid'] for row in rows] == [f'a{i}' for i in range(10)]
+    assert sorted(p.name for p in out.iterdir()) == ['alerts.csv', 'manifest.json']
+
+
+def test_merge_skips_shards_without_rows(tmp_path):
+    """Test empty shards, with or without a header, do not end up in the merged file."""
+    contents = ['', 'uuid,name\na0,A\n', '\n', 'uuid,name\n', 'uuid,name\na1,B\n']
+    shards = []
+    for i, text in enumerate(contents):
+        shards.append(tmp_path / f'alerts-{i}.csv')
+        shards[-1].write_text(text)
+
+    merge_shards(shards, tmp_path / 'alerts.csv', 'csv')
+
+    assert (tmp_path / 'alerts.csv').read_text() == 'uuid,name\na0,A\na1,B\n'
+    assert [p.name for p in tmp_path.iterdir()] == ['alerts.csv']
+
+
+def test_export_rejects_merging_parquet(export_runner, alerts_table, tmp_path):
+    result = export_runner(['--format', 'parquet', '--merge', '--out-dir', str(tmp_path)])
+    assert result.exit_code != 0
+    assert '--merge is not supported for parquet' in result.output
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.alerts import alerts_group
+from pyfsr_cli.commands.mirror import mirror_group
+from pyfsr_cli.utils.mirror import Mirror
+
+
+@pytest.fixture
+def mirrored_alerts(cli_state, mock_fortisoar):
+    """Populate a mirror database with a few alerts."""
+    mock_fortisoar.query.return_value = {
+        'hydra:member': [
+            {'uuid': 'a', 'modifyDate': 1, 'createDate': 3, 'name': 'Alert A',
+             'severity': {'itemValue': 'High'}},
+            {'uuid': 'b', 'modifyDate': 2, 'createDate': 1, 'name': 'Alert B',
+             'severity': {'itemValue': 'Low'}},
+            {'uuid': 'c', 'modifyDate': 3, 'createDate': 2, 'name': 'Alert C',
+             'severity': {'itemValue': 'High'}},
+        ]
+    }
+    result = CliRunner().invoke(mirror_group, ['refresh', 'alerts'], obj=cli_state)
+    assert result.exit_code == 0
+    assert 'Mirrored 3 changed alerts records' in result.output
+    return cli_state
+
+
+def test_refresh_is_incremental(mirrored_alerts, mock_fortisoar):
+    """Test a second refresh only asks for records after the saved mark."""
+    mock_fortisoar.query.return_value = {'hydra:member': []}
+    result = CliRunner().invoke(mirror_group, ['refresh'], obj=mirrored_alerts)
+    assert result.exit_code == 0
+
+    body = mock_fortisoar.query.call_args[0][1]
+    assert body['filters'][0]['filters'][0] == {'field': 'modifyDate', 'operator': 'gt', 'value': 3}
+
+
+def test_list_alerts_local(mirrored_alerts, mock_fortisoar):
+    """Test alerts list --local filters and sorts from the mirror."""
+    mock_fortisoar.reset_mock()
+    result = CliRunner().invoke(
+        alerts_group, ['list', '--local', '--severity', 'High', '--sort', '-createDate'],
+        obj=mirrored_alerts
+    )
+    assert result.exit_code == 0
+    assert [alert['uuid'] for alert in json.loads(result.output)] == ['a', 'c']
+    mock_fortisoar.alerts.list.assert_not_called()
+
+
+def test_list_alerts_local_count(mirrored_alerts):
+    """Test counting mirrored alerts."""
+    result = CliRunner().invoke(alerts_group, ['list', '--local', '--count', '--severity', 'Low'],
+                                obj=mirrored_alerts)
+    assert result.exit_code == 0
+    assert result.output.strip() == '1'
+
+
+def test_mirror_rejects_unsafe_field(tmp_path):
+    """Test field names are validated before being used in SQL."""
+    mirror = Mirror(tmp_path / 'mirror.db')
+    with pytest.raises(ValueError):
+        mirror.query('alerts', sort='name; DROP TABLE records_alerts')
+    mirror.close()
+
+
+def test_full_refresh_drops_deleted_records(mirrored_alerts, mock_fortisoar):
+    """Test --full removes mirrored records the server no longer returns."""
+    mock_fortisoar.query.return_value = {
+        'hydra:member': [{'uuid': 'a', 'modifyDate': 1, 'createDate': 3, 'name': 'Alert A'}]
+    }
+    result = CliRunner().invoke(mirror_group, ['refresh', 'alerts', '--full'], obj=mirrored_alerts)
+    assert result.exit_code == 0
+
+    mirror = Mirror(mirrored_alerts.state_path('mirror.db'))
+    assert [alert['uuid'] for alert in mirror.query('alerts')] == ['a']
+    mirror.close()
+
+
+def test_prune_removes_records_missing_from_the_uuid_scan(mirrored_alerts, mock_fortisoar):
+    """Test --prune diffs the server's uuids against the mirror."""
+    pages = iter([{'hydra:member': []}, {'hydra:member': [{'uuid': 'b'}]}])
+    mock_fortisoar.query.side_effect = lambda module, body: next(pages)
+    result = CliRunner().invoke(mirror_group, ['refresh', 'alerts', '--prune'], obj=mirrored_alerts)
+    assert result.exit_code == 0, result.output
+    assert 'Removed 2 deleted alerts records' in result.output
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.records import records_group
+
+
+@pytest.fixture
+def records_runner(cli_state):
+    """Invoke the records group with the mocked client."""
+
+    def invoke(*args, **kwargs):
+        return CliRunner().invoke(records_group, *args, obj=cli_state, **kwargs)
+
+    return invoke
+
+
+def test_list_records_streams_module_collection(records_runner, cli_state, serve_pages):
+    """Test list pages the module endpoint with the --filter parameters."""
+    cli_state.config.output_format = 'ndjson'
+    seen = []
+
+    def page_for(endpoint, params):
+        seen.append((endpoint, params))
+        return {'hydra:member': [{'uuid': 'i1', 'name': 'Incident 1'}]}
+
+    serve_pages(page_for)
+    result = records_runner(['incidents', 'list', '--filter', 'status.itemValue=Open', '--limit', '5'])
+
+    assert result.exit_code == 0, result.output
+    assert seen == [('/api/3/incidents', {'status.itemValue': 'Open', '$limit': 5})]
+    assert json.loads(result.output.splitlines()[0])['name'] == 'Incident 1'
+
+
+def test_get_record(records_runner, mock_fortisoar):
+    mock_fortisoar.get.return_value = {'uuid': 't1', 'name': 'Task'}
+
+    result = records_runner(['tasks', 'get', 't1'])
+
+    assert result.exit_code == 0
+    mock_fortisoar.get.assert_called_once_with('/api/3/tasks/t1')
+    assert 'Task' in result.output
+
+
+def test_import_creates_each_record_without_metadata(records_runner, mock_fortisoar):
+    mock_fortisoar.post.return_value = {'@id': '/api/3/indicators/new'}
+    lines = '\n'.join(json.dumps({'@id': f'/api/3/indicators/{i}', '@type': 'Indicator', 'uuid': str(i),
+                                  'createDate': 1, 'modifyDate': 2, 'value': f'10.0.0.{i}'}) for i in range(3))
+
+    result = records_runner(['indicators', 'import', '--concurrency', '1'], input=lines)
+
+    assert result.exit_code == 0, result.output
+    assert [c.kwargs['data'] for c in mock_fortisoar.post.call_args_list] == [
+        {'value': f'10.0.0.{i}'} for i in range(3)
+    ]
+    assert 'Created 3 indicators records' in result.output
+
+
+def test_update_from_stdin_applies_fixed_fields(records_runner, mock_fortisoar):
+    result = records_runner(['tasks', 'update', '--stdin', '--data', '{"status": "Done"}'], input='t1\nt2\n')
+
+    assert result.exit_code == 0, result.output
+    assert sorted(c.args[0] for c in mock_fortisoar.put.call_args_list) == ['/api/3/tasks/t1', '/api/3/tasks/t2']
+
+
+def test_invalid_module_name(records_runner):
+    result = records_runner(['../alerts', 'list'])
+    assert result.exit_code != 0
+    assert 'not a module name' in result.output
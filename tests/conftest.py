@@ -1,3 +1,4 @@
+import json
 from unittest.mock import Mock
 
 import pytest
@@ -35,10 +36,31 @@ def mock_fortisoar():
 
 
 @pytest.fixture
-def cli_state(mock_fortisoar):
+def serve_pages(mock_fortisoar):
+    """Serve responses from mock_fortisoar.request as JSON bodies streamed in small chunks."""
+
+    def serve(page_for):
+        def request(method, endpoint, params=None, **kwargs):
+            body = json.dumps(page_for(endpoint, params or {})).encode()
+            response = Mock()
+            response.iter_content.return_value = [body[i:i + 7] for i in range(0, len(body), 7)]
+            response.json.return_value = json.loads(body)
+            return response
+
+        mock_fortisoar.request.side_effect = request
+
+    return serve
+
+
+@pytest.fixture
+def cli_state(mock_fortisoar, tmp_path):
     """Create CLI state with mocked client."""
     state = CLIState()
     state.client = mock_fortisoar
+    # Keep job journals, caches and mirrors out of the real ~/.pyfsr
+    state.state_dir = tmp_path
+    # The mock has no model metadata; schema validation is tested on its own
+    state.validate = False
     state.config = CLIConfig(
         server='test-server',
         token='test-token',
@@ -0,0 +1,58 @@
+import gzip
+import io
+import json
+from unittest.mock import Mock, patch
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pyfsr_cli.utils.compression import CompressingAdapter, compress_stream, configure_compression
+from pyfsr_cli.utils.concurrency import configure_pool
+
+
+def prepare(body):
+    return requests.Request('POST', 'https://soar.example/api/3/alerts', json=body).prepare()
+
+
+def test_adapter_compresses_large_bodies_only():
+    """Test bodies over the threshold are gzipped and small ones are sent unchanged."""
+    adapter = CompressingAdapter('gzip', min_size=1024)
+    large = prepare([{'name': 'Alert', 'description': 'x' * 100}] * 100)
+    small = prepare({'name': 'Alert'})
+    small_body = small.body
+
+    with patch('requests.adapters.HTTPAdapter.send') as send:
+        adapter.send(large)
+        adapter.send(small)
+
+    sent_large, sent_small = (call.args[0] for call in send.call_args_list)
+    assert sent_large.headers['Content-Encoding'] == 'gzip'
+    assert int(sent_large.headers['Content-Length']) == len(sent_large.body) < 1024
+    assert json.loads(gzip.decompress(sent_large.body))[0]['name'] == 'Alert'
+    assert 'Content-Encoding' not in sent_small.headers
+    assert sent_small.body == small_body
+
+
+def test_compress_stream_round_trips():
+    """Test streamed compression produces a valid gzip file."""
+    data = b'evidence ' * 500_000
+    sink = io.BytesIO()
+    compress_stream(io.BytesIO(data), sink, 'gzip')
+    assert len(sink.getvalue()) < len(data) // 10
+    assert gzip.decompress(sink.getvalue()) == data
+
+
+def test_request_compression_keeps_the_client_retries():
+    """Test --compress-requests and a larger pool keep the session's retry policy."""
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=Retry(total=2)))
+    client = Mock(session=session)
+
+    configure_compression(client, 'gzip')
+    assert session.get_adapter('https://soar.example').max_retries.total == 2
+
+    configure_pool(client, 16)
+    adapter = session.get_adapter('https://soar.example')
+    assert isinstance(adapter, CompressingAdapter)
+    assert adapter.max_retries.total == 2
@@ -0,0 +1,69 @@
+"""Tests for the concurrent execution engine."""
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pyfsr_cli.utils.concurrency import configure_pool, run_concurrently
+from pyfsr_cli.utils.query import iter_offset
+
+
+def test_run_concurrently_bounds_in_flight():
+    """Test results keep input order and never exceed the limit in flight."""
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+
+    def work(n):
+        with lock:
+            in_flight.append(n)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.remove(n)
+        return n * 2
+
+    assert run_concurrently(work, range(20), limit=4) == [n * 2 for n in range(20)]
+    assert 1 < max(peak) <= 4
+
+
+def test_run_concurrently_errors():
+    """Test errors are raised or returned in place."""
+    def work(n):
+        if n == 2:
+            raise ValueError('boom')
+        return n
+
+    with pytest.raises(ValueError):
+        run_concurrently(work, range(4), limit=2)
+
+    results = run_concurrently(work, range(4), limit=2, return_exceptions=True)
+    assert results[:2] == [0, 1] and isinstance(results[2], ValueError) and results[3] == 3
+
+
+def test_iter_offset_prefetches_pages_in_order():
+    """Test concurrent page fetching still yields records in page order."""
+    pages = {1: [1, 2], 2: [3, 4], 3: [5, 6], 4: [7]}
+
+    def fetch_page(params):
+        return {'hydra:member': pages.get(params['$page'], [])}
+
+    assert list(iter_offset(fetch_page, page_size=2, concurrency=3)) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_configure_pool_keeps_the_client_retries():
+    """Test growing the connection pool does not drop the session's retry policy."""
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(max_retries=Retry(total=2, status_forcelist=[429, 503])))
+    client = Mock(session=session)
+
+    configure_pool(client, 16)
+
+    adapter = session.get_adapter('https://fortisoar.example/api/3/alerts')
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.status_forcelist == [429, 503]
+    assert adapter._pool_maxsize == 16
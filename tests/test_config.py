@@ -104,3 +104,11 @@ def test_config_file_persistence(cli_state, monkeypatch):
     new_state.load_config()
     assert new_state.config.server == 'test-server'
     assert new_state.config.token == 'test-token'
+
+
+def test_cli_params_are_not_echoed(cli_state, capsys):
+    """Test loading CLI parameters never prints the credentials."""
+    cli_state.load_config({'server': 'test-server', 'token': 'secret-token', 'password': 'secret-password'})
+
+    captured = capsys.readouterr()
+    assert 'secret' not in captured.out + captured.err
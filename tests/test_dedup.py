@@ -0,0 +1,98 @@
+import hashlib
+import json
+
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.records import records_group
+from pyfsr_cli.utils.dedup import BloomFilter, DedupIndex
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(2000)]
+    for digest in digests[:1000]:
+        bloom.add(digest)
+
+    assert all(digest in bloom for digest in digests[:1000])
+    assert sum(digest in bloom for digest in digests[1000:]) < 50
+
+
+def test_claim_suppresses_duplicates_across_runs(tmp_path):
+    path = tmp_path / 'alerts.db'
+    with DedupIndex(path) as index:
+        assert index.claim({'name': 'Port scan', 'source': 'ids'})
+        assert not index.claim({'source': 'ids', 'name': 'Port scan', 'severity': 'High'})
+        assert index.claim({'name': 'Port scan', 'source': 'edr'})
+        assert index.claim({'severity': 'High'})
+        assert index.claim({'severity': 'High'})
+
+    with DedupIndex(path) as index:
+        assert not index.claim({'name': 'Port scan', 'source': 'ids'})
+        assert index.duplicates == 1
+
+
+def test_fingerprints_depend_on_the_dedup_fields(tmp_path):
+    path = tmp_path / 'alerts.db'
+    with DedupIndex(path, fields=['name', 'source']) as index:
+        assert index.claim({'name': 'Port scan', 'source': 'ids'})
+
+    with DedupIndex(path, fields=['name', 'sourcedata']) as index:
+        assert index.claim({'name': 'Port scan', 'sourcedata': 'ids'})
+
+
+def test_fingerprints_expire_after_the_ttl(tmp_path):
+    with DedupIndex(tmp_path / 'alerts.db', ttl=0) as index:
+        assert index.claim({'name': 'Port scan'})
+        assert index.claim({'name': 'Port scan'})
+
+
+def test_failed_create_releases_the_fingerprint(tmp_path):
+    with DedupIndex(tmp_path / 'alerts.db', fields=['name']) as index:
+        def fail(record):
+            raise ConnectionError('timed out')
+
+        try:
+            index.create({'name': 'Port scan'}, fail)
+        except ConnectionError:
+            pass
+
+        assert index.create({'name': 'Port scan'}, lambda record: 'created') == 'created'
+        assert index.create({'name': 'Port scan'}, lambda record: 'created') is None
+
+
+def test_flush_makes_claims_and_releases_visible_to_other_processes(tmp_path):
+    path = tmp_path / 'alerts.db'
+    index = DedupIndex(path, fields=['name'])
+    index.claim({'name': 'Port scan'})
+    index.claim({'name': 'Brute force'})
+    index.release({'name': 'Brute force'})
+
+    index.flush()
+
+    with DedupIndex(path, fields=['name']) as other:
+        assert not other.claim({'name': 'Port scan'})
+        assert other.claim({'name': 'Brute force'})
+    index.close()
+
+
+def test_create_alert_skips_duplicates(cli_runner, mock_fortisoar):
+    mock_fortisoar.alerts.create.return_value = {'@id': '/api/3/alerts/a1'}
+
+    first = cli_runner(['create', '--name', 'Port scan', '--source', 'ids', '--dedup'])
+    second = cli_runner(['create', '--name', 'Port scan', '--source', 'ids', '--dedup'])
+
+    assert first.exit_code == 0 and second.exit_code == 0, second.output
+    assert 'Skipped duplicate alert' in second.output
+    mock_fortisoar.alerts.create.assert_called_once()
+
+
+def test_import_drops_duplicates_before_posting(cli_state, mock_fortisoar):
+    mock_fortisoar.post.return_value = {'@id': '/api/3/alerts/new'}
+    lines = '\n'.join(json.dumps({'name': 'Port scan', 'sourcedata': data}) for data in ['a', 'b', 'a', 'a'])
+
+    result = CliRunner().invoke(records_group, ['alerts', 'import', '--dedup', '--concurrency', '1'],
+                                obj=cli_state, input=lines)
+
+    assert result.exit_code == 0, result.output
+    assert mock_fortisoar.post.call_count == 2
+    assert 'Created 2 alerts records, skipped 2 duplicates' in result.output
@@ -0,0 +1,103 @@
+"""Tests for multi-server fan-out."""
+from unittest.mock import MagicMock, Mock
+
+import pytest
+import yaml
+from click.testing import CliRunner
+
+from pyfsr_cli.commands.alerts import alerts_group
+from pyfsr_cli.config import CLIState
+from pyfsr_cli.utils.fanout import FanOutError, iter_fan_out
+
+
+@pytest.fixture
+def profile_state(tmp_path, monkeypatch):
+    """CLI state with two profiles loaded from a config file."""
+    for var in ('PYFSR_SERVER', 'PYFSR_TOKEN', 'PYFSR_VERIFY_SSL'):
+        monkeypatch.delenv(var, raising=False)
+    config_path = tmp_path / '.pyfsr.yaml'
+    config_path.write_text(yaml.dump({
+        'server': 'default-server',
+        'token': 'default-token',
+        'verify_ssl': False,
+        'profiles': {
+            'a': {'server': 'server-a', 'token': 'token-a'},
+            'b': {'server': 'server-b', 'token': 'token-b', 'verify_ssl': True},
+        }
+    }))
+    state = CLIState()
+    state.config_path = config_path
+    state.load_config()
+    return state
+
+
+def test_profiles_loaded(profile_state):
+    """Test profiles inherit verify_ssl from the top level."""
+    assert profile_state.profiles['a'].server == 'server-a'
+    assert profile_state.profiles['a'].verify_ssl is False
+    assert profile_state.profiles['b'].verify_ssl is True
+
+
+def test_select_unknown_profile(profile_state):
+    """Test selecting an undefined profile fails."""
+    with pytest.raises(Exception, match='Unknown profile'):
+        profile_state.select_profiles(['a', 'missing'])
+
+
+def test_list_alerts_fan_out(profile_state):
+    """Test alerts from every selected server are merged and tagged."""
+    profile_state.select_profiles(all_profiles=True)
+    profile_state.clients = {name: Mock() for name in ('a', 'b')}
+    for name, client in profile_state.clients.items():
+        client.alerts.list.return_value = {'hydra:member': [{'name': f'Alert {name}'}]}
+
+    result = CliRunner().invoke(alerts_group, ['list'], obj=profile_state)
+    assert result.exit_code == 0
+    assert 'Alert a' in result.output and 'Alert b' in result.output
+    assert '"_server": "a"' in result.output and '"_server": "b"' in result.output
+
+
+def test_fan_out_unsupported_command(profile_state):
+    """Test commands without fan-out support refuse multiple servers."""
+    profile_state.select_profiles(['a', 'b'])
+    result = CliRunner().invoke(alerts_group, ['delete', 'alert-1', '--force'], obj=profile_state)
+    assert result.exit_code != 0
+    assert 'cannot run against multiple servers' in result.output
+
+
+def test_single_profile_runs_unsupported_command(profile_state, monkeypatch):
+    """Test a single selected profile stands in for the configured server."""
+    client = MagicMock()
+    monkeypatch.setattr('pyfsr_cli.config.FortiSOAR', lambda **kwargs: client)
+    profile_state.config.output_format = 'ndjson'
+    profile_state.select_profiles(['b'])
+
+    result = CliRunner().invoke(alerts_group, ['delete', 'alert-1', '--force'], obj=profile_state)
+    assert result.exit_code == 0, result.output
+    client.alerts.delete.assert_called_once_with('alert-1')
+    assert profile_state.config.server == 'server-b'
+    assert profile_state.config.output_format == 'ndjson'
+
+
+def test_fan_out_reports_failed_servers(profile_state):
+    """Test one failing server does not stop the others."""
+    profile_state.select_profiles(all_profiles=True)
+    good, bad = Mock(), Mock()
+    bad.fetch.side_effect = Exception('unreachable')
+    good.fetch.return_value = [{'name': 'ok'}]
+    profile_state.clients = {'a': good, 'b': bad}
+
+    records = []
+    with pytest.raises(FanOutError, match='b: unreachable'):
+        for record in iter_fan_out(profile_state, lambda client: client.fetch()):
+            records.append(record)
+    assert records == [{'name': 'ok', '_server': 'a'}]
+
+
+def test_saved_profiles_leave_out_the_output_format(profile_state):
+    """Test profiles are saved with only the settings they read."""
+    profile_state.save_config()
+
+    saved = yaml.safe_load(profile_state.config_path.read_text())
+    assert saved['output_format'] == 'json'
+    assert saved['profiles']['a'] == {'server': 'server-a', 'token': 'token-a', 'verify_ssl': False}
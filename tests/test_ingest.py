@@ -0,0 +1,198 @@
+import json
+import os
+import signal
+import threading
+import time
+import urllib.error
+import urllib.request
+from unittest.mock import Mock
+
+import pytest
+
+from click.testing import CliRunner
+
+from pyfsr_cli.commands import ingest as ingest_command
+from pyfsr_cli.utils.dedup import DedupIndex
+from pyfsr_cli.utils.ingest import SpillQueue, Submitter, make_server, parse_events
+
+
+def _entries(n, start=0):
+    return [{'event': {'name': f'e{i}'}, 'attempts': 0} for i in range(start, start + n)]
+
+
+def _names(batch):
+    return [entry['event']['name'] for entry in batch]
+
+
+def test_queue_spills_past_memory_limit_and_keeps_order(tmp_path):
+    queue = SpillQueue(tmp_path, memory_limit=2)
+    for i in range(5):
+        assert queue.put(_entries(1, i))
+
+    assert len(queue) == 2
+    assert queue.spilled_bytes > 0
+    assert _names(queue.get_batch(10, linger=0, timeout=0)) == ['e0', 'e1', 'e2', 'e3', 'e4']
+    assert queue.spilled_bytes == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_queue_refuses_events_when_spill_is_full(tmp_path):
+    queue = SpillQueue(tmp_path, memory_limit=1, max_spill_bytes=1)
+
+    assert queue.put(_entries(1))
+    assert queue.put(_entries(1, 1))
+    assert not queue.put(_entries(1, 2))
+
+
+def test_spill_all_is_picked_up_first_by_the_next_run(tmp_path):
+    queue = SpillQueue(tmp_path, memory_limit=2)
+    queue.put(_entries(2))
+    queue.put(_entries(2, 2))
+    in_flight = queue.get_batch(1, linger=0, timeout=0)
+
+    queue.spill_all(in_flight)
+
+    assert _names(SpillQueue(tmp_path).get_batch(10, linger=0, timeout=0)) == ['e0', 'e1', 'e2', 'e3']
+
+
+def test_submitter_retries_transient_failures_and_rejects_refused_events(tmp_path):
+    queue = SpillQueue(tmp_path / 'queue')
+    refused = Exception('bad request')
+    refused.response = Mock(status_code=400)
+
+    def create(event):
+        if event['name'] == 'e1':
+            raise ConnectionError('timed out')
+        if event['name'] == 'e2':
+            raise refused
+
+    submitter = Submitter(queue, create, tmp_path / 'rejected.ndjson', max_attempts=2)
+
+    assert submitter.submit(_entries(3)) == (2, 3)
+    assert submitter.stats == {'created': 1, 'retried': 1, 'rejected': 1, 'duplicates': 0}
+    assert queue.get_batch(10, linger=0, timeout=0) == [{'event': {'name': 'e1'}, 'attempts': 1}]
+    rejected = [json.loads(line) for line in (tmp_path / 'rejected.ndjson').read_text().splitlines()]
+    assert [(r['event']['name'], r['error']) for r in rejected] == [('e2', 'bad request')]
+
+
+def test_submitter_spills_only_unsettled_events_when_a_batch_fails(tmp_path):
+    queue = SpillQueue(tmp_path / 'queue')
+    index = DedupIndex(tmp_path / 'dedup.db', ['name'])
+
+    def create(event):
+        if event['name'] == 'e1':
+            raise ConnectionError('timed out')
+
+    submitter = Submitter(queue, create, tmp_path / 'rejected.ndjson', dedup=index)
+    queue.put = Mock(side_effect=OSError('disk full'))
+
+    with pytest.raises(OSError):
+        submitter.submit(_entries(2))
+
+    assert queue.get_batch(10, linger=0, timeout=0) == [{'event': {'name': 'e1'}, 'attempts': 0}]
+    assert not index.claim({'name': 'e0'})
+    assert index.claim({'name': 'e1'})
+    index.close()
+
+
+def test_closed_queue_refuses_events(tmp_path):
+    queue = SpillQueue(tmp_path)
+    queue.close()
+
+    assert not queue.put(_entries(1))
+    assert len(queue) == 0
+
+
+def test_submitter_counts_only_events_sent_after_dedup(tmp_path):
+    queue = SpillQueue(tmp_path / 'queue')
+    index = DedupIndex(tmp_path / 'dedup.db', ['name'])
+    index.claim({'name': 'e0'})
+    index.claim({'name': 'e1'})
+
+    def create(event):
+        raise ConnectionError('timed out')
+
+    submitter = Submitter(queue, create, tmp_path / 'rejected.ndjson', dedup=index)
+
+    assert submitter.submit(_entries(3)) == (1, 1)
+    assert submitter.stats['duplicates'] == 2
+    index.close()
+
+
+class _IdleSubmitter(Submitter):
+    """Submitter that never takes events off the queue."""
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.queue.close()
+        self.queue.spill_all([])
+
+
+def test_serve_spills_queued_events_on_sigterm(cli_state, monkeypatch, tmp_path):
+    queues = []
+
+    class Server:
+        server_address = ('127.0.0.1', 0)
+
+        def serve_forever(self):
+            queues[0].put(_entries(2))
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(5)
+
+        def server_close(self):
+            pass
+
+    def make_server(queue, *args):
+        queues.append(queue)
+        return Server()
+
+    monkeypatch.setattr(ingest_command, 'make_server', make_server)
+    monkeypatch.setattr(ingest_command, 'Submitter', _IdleSubmitter)
+    previous = signal.getsignal(signal.SIGTERM)
+
+    result = CliRunner().invoke(ingest_command.ingest_group, ['serve', '--spill-dir', str(tmp_path)], obj=cli_state)
+
+    assert result.exit_code == 0, result.output
+    assert signal.getsignal(signal.SIGTERM) is previous
+    assert _names(SpillQueue(tmp_path).get_batch(10, linger=0, timeout=0)) == ['e0', 'e1']
+
+
+def test_parse_events_accepts_json_ndjson_and_text():
+    assert parse_events(b'[{"a": 1}, {"a": 2}]', 'application/json') == [{'a': 1}, {'a': 2}]
+    assert parse_events(b'{"a": 1}\n{"a": 2}\n', 'application/x-ndjson') == [{'a': 1}, {'a': 2}]
+    assert parse_events(b'<13>Oct 18 host sshd: failed login\n', 'text/plain') == [
+        '<13>Oct 18 host sshd: failed login']
+
+
+@pytest.fixture
+def listener(tmp_path):
+    queue = SpillQueue(tmp_path, memory_limit=2, max_spill_bytes=0)
+    server = make_server(queue, ('127.0.0.1', 0), {'source': 'test'},
+                         lambda event: ['missing name'] if 'name' not in event else [])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield queue, 'http://127.0.0.1:%d/' % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body, content_type='application/json'):
+    request = urllib.request.Request(url, data=body.encode(), headers={'Content-Type': content_type})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_listener_queues_events_and_applies_backpressure(listener):
+    queue, url = listener
+
+    assert _post(url, '[{"name": "a"}, {"name": "b", "source": "ids"}]') == (202, {'accepted': 2})
+    assert _post(url, '{"severity": "High"}')[0] == 400
+    assert _post(url, 'one more', 'text/plain')[0] == 503
+
+    assert [entry['event'] for entry in queue.get_batch(10, linger=0, timeout=0)] == [
+        {'source': 'test', 'name': 'a'}, {'source': 'ids', 'name': 'b'}]
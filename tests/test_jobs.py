@@ -0,0 +1,39 @@
+import pytest
+import click
+
+from pyfsr_cli.utils.jobs import Job
+
+
+@pytest.fixture
+def state(cli_state):
+    return cli_state
+
+
+def test_job_journal_survives_interruption(state):
+    """Test a failed job keeps its journal and a resumed job replays it."""
+    with pytest.raises(RuntimeError):
+        with Job.start(state, 'files upload', {'files': ['a', 'b', 'c']}) as job:
+            job.done('a')
+            job.set('offset:b', 1024)
+            raise RuntimeError('connection reset')
+
+    # Simulate a crash in the middle of writing an entry
+    with open(job.path, 'a') as f:
+        f.write('{"done": "b"')
+
+    with Job.start(state, 'files upload', {}, resume=job.id) as resumed:
+        assert resumed.args == {'files': ['a', 'b', 'c']}
+        assert resumed.is_done('a') and not resumed.is_done('b')
+        assert resumed.get('offset:b') == 1024
+        resumed.done('b')
+    assert not job.path.exists()
+
+
+def test_resume_checks_command(state):
+    """Test a job cannot be resumed by a different command."""
+    job = Job.start(state, 'alerts list', {})
+    job.close()
+    with pytest.raises(click.UsageError, match="started by 'alerts list'"):
+        Job.start(state, 'files upload', {}, resume=job.id)
+    with pytest.raises(click.UsageError, match='No interrupted job'):
+        Job.start(state, 'alerts list', {}, resume='missing')
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from pyfsr_cli.utils.jsonstream import CollectionStream
+
+
+def chunked(payload, size):
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize('size', [1, 3, 64, 10_000])
+def test_members_are_yielded_one_by_one(size):
+    """Test members split across arbitrary chunk boundaries decode exactly."""
+    payload = {
+        '@context': '/api/3/contexts/Alert',
+        'hydra:member': [{'name': 'Ünïcode ✓', 'score': 12345.5, 'ok': True, 'tags': []},
+                         {'nested': {'deep': [1, -20, None]}}, 1234567890],
+        'hydra:totalItems': 3,
+    }
+    stream = CollectionStream(chunked(payload, size))
+    assert list(stream) == payload['hydra:member']
+    assert stream.is_collection
+    assert stream.fields == {'@context': '/api/3/contexts/Alert', 'hydra:totalItems': 3}
+
+
+def test_members_stream_before_body_ends():
+    """Test the first member is available before later chunks are read."""
+    read = []
+    body = chunked({'hydra:member': [{'id': i} for i in range(20)]}, 8)
+
+    def chunks():
+        for chunk in body:
+            read.append(chunk)
+            yield chunk
+
+    members = iter(CollectionStream(chunks()))
+    assert next(members) == {'id': 0}
+    assert len(read) < len(body) // 2
+
+
+def test_plain_object_and_invalid_json():
+    """Test a non-collection body ends up in fields and truncated input raises."""
+    stream = CollectionStream(chunked({'name': 'Alert'}, 4))
+    assert list(stream) == []
+    assert not stream.is_collection and stream.fields == {'name': 'Alert'}
+
+    with pytest.raises(ValueError):
+        list(CollectionStream([b'{"hydra:member": [{"id": 1}, {"id"']))
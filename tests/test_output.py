@@ -0,0 +1,141 @@
+"""Tests for output formatting utilities."""
+import io
+import time
+
+import pytest
+import yaml
+from rich.console import Console
+
+from pyfsr_cli.utils.progress import ProgressReporter
+from pyfsr_cli.utils.table import render_table
+from pyfsr_cli.utils.transform import RecordTransformer
+from pyfsr_cli.utils.yamlio import write_yaml
+
+
+def test_render_table_streams_chunks():
+    """Test the table is rendered in aligned chunks with a single header."""
+    console = Console(record=True, width=80, file=io.StringIO())
+    records = ({'id': i, 'severity': 'High'} for i in range(5))
+
+    render_table(records, console=console, sample_size=2, chunk_size=2)
+
+    lines = console.export_text().splitlines()
+    assert sum('severity' in line for line in lines) == 1
+    assert [line.split()[0] for line in lines if 'High' in line] == ['0', '1', '2', '3', '4']
+    assert len({len(line) for line in lines if 'High' in line}) == 1
+
+
+def test_render_table_truncates_wide_columns():
+    """Test column widths come from the sample and are capped."""
+    console = Console(record=True, width=80, file=io.StringIO())
+    records = [{'name': 'short'}, {'name': 'x' * 200}]
+
+    render_table(records, console=console, sample_size=1)
+
+    assert all(len(line) <= 80 for line in console.export_text().splitlines())
+
+
+def test_record_transformer_simple_view():
+    """Test the simple view prunes empties and flattens at any depth."""
+    transform = RecordTransformer.for_view('simple')
+    record = {
+        'name': 'Alert',
+        'description': '',
+        'tags': [],
+        'closedDate': None,
+        'count': 0,
+        'severity': {'itemValue': 'High', '@id': '/api/3/picklists/1'},
+        'indicators': [{'value': '1.2.3.4', 'type': {'itemValue': 'IP Address'}}],
+        'assignedTo': {'@type': 'Person', 'firstname': 'Jane', 'lastname': 'Doe'},
+    }
+
+    assert transform(record) == {
+        'name': 'Alert',
+        'count': 0,
+        'severity': 'High',
+        'indicators': [{'value': '1.2.3.4', 'type': 'IP Address'}],
+        'assignedTo': 'Jane Doe',
+    }
+    assert record['severity'] == {'itemValue': 'High', '@id': '/api/3/picklists/1'}
+
+
+def test_record_transformer_projects_dotted_columns():
+    """Test projection resolves dotted paths before flattening."""
+    transform = RecordTransformer.for_view('simple', ['name', 'assignedTo.firstname', 'missing'])
+    record = {'name': 'Alert', 'assignedTo': {'@type': 'Person', 'firstname': 'Jane'}}
+
+    assert list(transform.stream([record])) == [{'name': 'Alert', 'assignedTo.firstname': 'Jane'}]
+
+
+def test_progress_logs_status_lines_when_not_a_terminal():
+    """Test progress falls back to periodic log lines with rate, ETA and work in flight."""
+    console = Console(file=io.StringIO(), force_terminal=False)
+    progress = ProgressReporter('Uploading', total=4_000_000, unit='bytes', console=console,
+                                delay=0, log_interval=0)
+    slow_upload = progress.wrap(lambda size: time.sleep(0.11), size=lambda size: size)
+    with progress:
+        slow_upload(1_000_000)
+    lines = console.file.getvalue().splitlines()
+    assert lines
+    assert lines[-1].startswith('Uploading: 1.0 MB/4.0 MB, ')
+    assert 'MB/s' in lines[-1] and 'ETA' in lines[-1]
+
+
+def test_progress_status_line_counts_records_in_flight():
+    """Test the status line reports records and calls in flight."""
+    progress = ProgressReporter('Updating alerts', total=10, enabled=False)
+    progress.in_flight = 3
+    progress.advance(5)
+    assert progress.status_line().startswith('Updating alerts: 5/10 records, ')
+    assert progress.status_line().endswith('3 in flight')
+
+
+def test_write_yaml_emits_one_document_per_record():
+    """Test records are written as a stream of YAML documents in field order."""
+    sink = io.StringIO()
+    records = ({'name': f'Alert {i}', 'severity': 'High', 'tags': ['a']} for i in range(3))
+
+    assert write_yaml(records, sink) == 3
+
+    documents = list(yaml.safe_load_all(sink.getvalue()))
+    assert [doc['name'] for doc in documents] == ['Alert 0', 'Alert 1', 'Alert 2']
+    assert sink.getvalue().count('---') == 3
+    assert sink.getvalue().index('name') < sink.getvalue().index('severity')
+
+
+def test_columnar_output_survives_type_changes_after_the_first_batch(capsys):
+    """Test later values of another type are cast or nulled instead of aborting the write."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    from pyfsr_cli.utils.columnar import write_columnar
+
+    records = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'},
+               {'id': '3', 'name': 4}, {'id': 'x', 'name': {'nested': True}}]
+    sink = io.BytesIO()
+
+    assert write_columnar(records, 'parquet', sink, batch_size=2) == 4
+
+    table = pq.read_table(io.BytesIO(sink.getvalue())).to_pylist()
+    assert [row['id'] for row in table] == [1, 2, 3, None]
+    assert [row['name'] for row in table] == ['a', 'b', '4', '{"nested": true}']
+    assert "Column 'id'" in capsys.readouterr().err
+
+
+def test_simple_view_keeps_columns_empty_in_the_first_records(capsys):
+    """Test CSV output keeps a column that only later records fill."""
+    from pyfsr_cli.utils.output import format_output
+
+    format_output(iter([{'uuid': 'a', 'name': None}, {'uuid': 'b', 'name': 'Bob'}]), 'csv')
+
+    assert capsys.readouterr().out.splitlines() == ['uuid,name', 'a,', 'b,Bob']
+
+
+def test_delimited_output_without_records_or_columns_is_empty():
+    """Test an empty result without --columns writes no blank header line."""
+    from pyfsr_cli.utils.delimited import write_delimited
+
+    sink = io.StringIO()
+    assert write_delimited(iter([]), sink=sink) == 0
+    assert sink.getvalue() == ''
+
+    write_delimited(iter([]), columns=['name'], sink=sink)
+    assert sink.getvalue() == 'name\n'
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from pyfsr_cli.utils.pipeline import after_output, pipeline
+from pyfsr_cli.utils.transform import RecordTransformer
+
+
+def pages(count, size, on_page=None):
+    for page in range(count):
+        yield from ({'n': page * size + i, 'empty': None} for i in range(size))
+        if on_page:
+            on_page(page)
+
+
+def test_pipeline_transforms_in_order():
+    records = pipeline(pages(5, 10), RecordTransformer(prune_empty=True), queue_size=3)
+    assert list(records) == [{'n': n} for n in range(50)]
+
+
+def test_checkpoints_run_after_their_records_are_consumed():
+    """Test a page is checkpointed only once the consumer has taken every record of it."""
+    consumed, checkpoints = [], []
+    source = pages(3, 4, after_output(lambda page: checkpoints.append((page, len(consumed)))))
+
+    for record in pipeline(source, queue_size=100):
+        consumed.append(record)
+
+    assert checkpoints == [(0, 4), (1, 8), (2, 12)]
+
+
+def test_source_errors_reach_the_consumer():
+    def failing():
+        yield {'n': 1}
+        raise RuntimeError('connection reset')
+
+    records = pipeline(failing())
+    assert next(records) == {'n': 1}
+    with pytest.raises(RuntimeError, match='connection reset'):
+        next(records)
+
+
+def test_queue_bounds_how_far_the_source_runs_ahead():
+    fetched = []
+    stopped = threading.Event()
+
+    def source():
+        try:
+            for n in range(1000):
+                fetched.append(n)
+                yield n
+        finally:
+            stopped.set()
+
+    records = pipeline(source(), queue_size=5)
+    assert next(records) == 0
+    records.close()
+    assert stopped.wait(5)
+    assert len(fetched) < 10
+
+
+def test_transform_in_worker_processes():
+    records = pipeline(pages(4, 25), RecordTransformer(columns=['n']), workers=2, chunk_size=10)
+    assert [r['n'] for r in records] == list(range(100))
@@ -0,0 +1,73 @@
+from unittest.mock import Mock
+
+import pytest
+
+from pyfsr_cli.utils.schema import fetch_schema, load_schema
+
+METADATA = {
+    'hydra:member': [{
+        'type': 'alerts',
+        'attributes': [
+            {'name': 'name', 'type': 'text'},
+            {'name': 'severity', 'type': 'picklists',
+             'dataSource': {'model': 'picklists',
+                            'query': {'filters': [{'field': 'listName__name', 'value': 'Severity'}]}}},
+            {'name': 'source', 'type': 'text'},
+        ],
+    }]
+}
+SEVERITIES = {'hydra:member': [{'name': 'Severity', 'picklists': [{'itemValue': 'High'}, {'itemValue': 'Low'}]}]}
+
+
+@pytest.fixture
+def metadata_client():
+    client = Mock()
+    client.get.side_effect = lambda endpoint, params=None: (
+        METADATA if endpoint == '/api/3/model_metadatas' else SEVERITIES)
+    return client
+
+
+def test_fetch_schema_resolves_picklists(metadata_client):
+    schema = fetch_schema(metadata_client, 'alerts')
+
+    assert schema.fields['severity'] == {'type': 'picklists', 'picklist': 'Severity'}
+    assert schema.picklists == {'Severity': ['High', 'Low']}
+
+
+def test_check_record_reports_unknown_fields_and_picklist_values(metadata_client):
+    schema = fetch_schema(metadata_client, 'alerts')
+
+    assert schema.check_record({'name': 'x', 'severity': 'High', 'uuid': 'u1'}) == []
+    assert schema.check_record({'severity': '/api/3/picklists/abc'}) == []
+    problems = schema.check_record({'sevrity': 'High', 'severity': 'Hihg'})
+    assert problems == ["alerts has no field 'sevrity'; did you mean 'severity'?",
+                        "'Hihg' is not a valid severity; did you mean 'High'?"]
+
+
+def test_check_columns_uses_the_first_path_segment(metadata_client):
+    schema = fetch_schema(metadata_client, 'alerts')
+
+    assert schema.check_columns(['name', 'severity.itemValue', '@id']) == []
+    assert len(schema.check_columns(['nmae'])) == 1
+
+
+def test_load_schema_caches_until_the_ttl_expires(metadata_client, cli_state):
+
+    load_schema(cli_state, metadata_client, 'alerts', ttl=60)
+    load_schema(cli_state, metadata_client, 'alerts', ttl=60)
+    assert metadata_client.get.call_count == 2
+
+    load_schema(cli_state, metadata_client, 'alerts', ttl=0)
+    assert metadata_client.get.call_count == 4
+
+
+def test_create_rejects_invalid_picklist_value_before_sending(cli_runner, cli_state, mock_fortisoar,
+                                                              metadata_client):
+    cli_state.validate = True
+    mock_fortisoar.get.side_effect = metadata_client.get.side_effect
+
+    result = cli_runner(['create', '--name', 'New Alert', '--severity', 'Critcal'])
+
+    assert result.exit_code != 0
+    assert "'Critcal' is not a valid severity" in result.output
+    mock_fortisoar.alerts.create.assert_not_called()
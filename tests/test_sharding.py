@@ -0,0 +1,65 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from pyfsr_cli.utils.sharding import parse_size, write_manifest, write_shards
+
+
+def alerts(count):
+    return ({'id': i, 'name': f'Alert {i}'} for i in range(count))
+
+
+def test_parse_size():
+    assert parse_size(None, None, '1500') == 1500
+    assert parse_size(None, None, '256MB') == 256_000_000
+    assert parse_size(None, None, '1GiB') == 1024 ** 3
+    assert parse_size(None, None, None) is None
+
+
+def test_rotates_by_record_count_into_gzip_shards(tmp_path):
+    pattern = str(tmp_path / 'alerts-{shard:04d}.ndjson.gz')
+    shards = write_shards(alerts(25), 'ndjson', pattern, max_records=10)
+
+    assert [s['records'] for s in shards] == [10, 10, 5]
+    ids = []
+    for shard in shards:
+        with gzip.open(shard['file'], 'rt') as f:
+            ids += [json.loads(line)['id'] for line in f]
+    assert ids == list(range(25))
+    assert shards[0]['file'].endswith('alerts-0000.ndjson.gz')
+
+
+def test_delimited_shards_each_have_the_same_header(tmp_path):
+    shards = write_shards(alerts(7), 'csv', str(tmp_path / 'a-{shard}.csv'), max_bytes=40)
+
+    assert len(shards) > 1
+    rows = []
+    for shard in shards:
+        with open(shard['file'], newline='') as f:
+            reader = csv.reader(f)
+            assert next(reader) == ['id', 'name']
+            rows += list(reader)
+    assert [row[0] for row in rows] == [str(i) for i in range(7)]
+
+
+def test_columnar_shards_are_complete_files(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    shards = write_shards(alerts(5), 'parquet', str(tmp_path / 'a-{shard}.parquet'), max_records=2)
+
+    assert [pq.read_table(s['file']).num_rows for s in shards] == [2, 2, 1]
+
+
+def test_rotation_needs_a_shard_field(tmp_path):
+    with pytest.raises(Exception, match='shard'):
+        write_shards(alerts(1), 'ndjson', str(tmp_path / 'alerts.ndjson'), max_records=1)
+
+
+def test_manifest_totals_records(tmp_path):
+    shards = write_shards(alerts(3), 'ndjson', str(tmp_path / 'a-{shard}.ndjson'), max_records=2)
+    write_manifest(shards, 'ndjson', tmp_path / 'manifest.json')
+
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert manifest['records'] == 3
+    assert [s['records'] for s in manifest['shards']] == [2, 1]
@@ -0,0 +1,43 @@
+from unittest.mock import Mock
+
+from pyfsr_cli.utils.watch import SeenRecords, Watcher, next_interval
+
+
+def test_seen_records_drops_repeats_and_forgets_oldest():
+    """Test repeated (uuid, timestamp) pairs are dropped and the oldest entries forgotten."""
+    seen = SeenRecords(size=2)
+    assert seen.add('a', 1)
+    assert not seen.add('a', 1)
+    assert seen.add('a', 2)
+    seen.add('b', 1)
+    seen.add('c', 1)
+    assert len(seen) == 2
+    assert seen.add('a', 2)
+
+
+def test_next_interval_backs_off_when_idle():
+    """Test the poll interval resets after new records and grows while idle, up to the maximum."""
+    assert next_interval(8, True, 2, 60) == 2
+    assert next_interval(2, False, 2, 60) == 3
+    assert next_interval(50, False, 2, 60) == 60
+
+
+def test_watcher_emits_each_alert_once_and_advances_watermark():
+    """Test overlapping polls emit each alert once and query from the watermark minus the lookback."""
+    client = Mock()
+    batches = [
+        [{'uuid': 'a1', 'createDate': 100.0}],
+        [{'uuid': 'a1', 'createDate': 100.0}, {'uuid': 'a2', 'createDate': 103.0}],
+        [],
+    ]
+    client.query.side_effect = lambda module, body: {'hydra:member': batches.pop(0)}
+    watcher = Watcher(client, 'alerts', 'createDate', since=90.0, lookback=5)
+    emitted, sleeps = [], []
+
+    watcher.run(emitted.append, min_interval=1, max_interval=10, max_polls=3, sleep=sleeps.append)
+
+    assert [r['uuid'] for r in emitted] == ['a1', 'a2']
+    assert watcher.watermark == 103.0
+    assert sleeps == [1, 1]
+    last_filter = client.query.call_args.args[1]['filters'][-1]
+    assert last_filter == {'field': 'createDate', 'operator': 'gte', 'value': 98.0}